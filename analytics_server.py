@@ -0,0 +1,339 @@
+#!/usr/bin/env python3
+"""
+Analytics Server - Serves OHLCV and indicator data to the HTML/JS front end on demand
+
+    python analytics_server.py --port 8000
+
+then open http://localhost:8000/stock_visualizer.html. Endpoints:
+
+    GET /api/data/<SYMBOL>?period=6mo&interval=1d&format=json&max_points=2000
+        format: json (prepare_data_for_js layout), records (list of rows),
+                columnar (manifest) or binary (typed column buffer)
+    GET /<symbol>_data.json        records for the default period, the file
+                                   visualization.js used to load from disk
+    GET /health                    cache statistics
+    anything else                  static files from the project directory
+
+Downloads and indicator calculations run on a thread pool, never on the
+event loop. Results are kept in LRU caches (bars, indicator frames, encoded
+bodies) for ttl seconds; identical requests in flight share one computation.
+Responses carry an ETag, honour If-None-Match with 304, and are gzipped for
+clients that accept it.
+"""
+
+import argparse
+import asyncio
+import gzip
+import hashlib
+import json
+import math
+import mimetypes
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit, parse_qs, unquote
+
+from columnar_export import build_columnar_payload, column_key
+from downsampling import downsample_frame
+from resampling import resample_ohlcv, is_local_interval
+from stock_data_fetcher import StockDataFetcher
+
+FORMATS = ('json', 'records', 'columnar', 'binary')
+
+STATIC_TYPES = ('.html', '.js', '.css', '.json', '.png', '.svg', '.ico')
+
+# Bodies smaller than this aren't worth compressing
+GZIP_MIN_BYTES = 1024
+
+MAX_HEADER_BYTES = 16384
+
+STATUS_TEXT = {200: 'OK', 304: 'Not Modified', 400: 'Bad Request', 404: 'Not Found',
+               405: 'Method Not Allowed', 500: 'Internal Server Error', 502: 'Bad Gateway'}
+
+
+class LRUCache:
+    def __init__(self, max_entries=128, ttl=300):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        # Used from the event loop and from executor threads
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self.entries.get(key)
+            if entry is None or (self.ttl is not None and time.monotonic() - entry[0] > self.ttl):
+                if entry is not None:
+                    del self.entries[key]
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key, value):
+        with self._lock:
+            self.entries[key] = (time.monotonic(), value)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def stats(self):
+        return {'entries': len(self.entries), 'hits': self.hits, 'misses': self.misses}
+
+
+class CachedBody:
+    """An encoded response body with its ETag and a lazily built gzip variant"""
+
+    def __init__(self, body, content_type):
+        self.body = body
+        self.content_type = content_type
+        self.etag = '"' + hashlib.sha1(body).hexdigest() + '"'
+        self._gzipped = None
+
+    def gzipped(self):
+        if self._gzipped is None:
+            self._gzipped = gzip.compress(self.body, compresslevel=6)
+        return self._gzipped
+
+
+def _records(data):
+    """Rows as dicts with lower-case keys and null for NaN, the stock_fetcher.py JSON layout"""
+    frame = data.reset_index()
+    date_column = frame.columns[0]
+    frame[date_column] = frame[date_column].dt.strftime('%Y-%m-%d')
+    frame.columns = ['date'] + [column_key(c) for c in frame.columns[1:]]
+    records = frame.to_dict('records')
+    for record in records:
+        for key, value in record.items():
+            if isinstance(value, float) and math.isnan(value):
+                record[key] = None
+    return records
+
+
+class AnalyticsServer:
+    def __init__(self, root=None, default_period='6mo', cache_size=128, ttl=300, workers=8,
+                 store=None, offline=False):
+        self.root = os.path.abspath(root or os.path.dirname(os.path.abspath(__file__)))
+        self.default_period = default_period
+        self.fetcher = StockDataFetcher(store=store, offline=offline)
+        self.executor = ThreadPoolExecutor(max_workers=workers)
+        # Downloaded bars, indicator frames and encoded bodies are cached separately so
+        # another format or point budget for the same symbol skips the download and the maths
+        self.bars = LRUCache(cache_size, ttl)
+        self.frames = LRUCache(cache_size, ttl)
+        self.bodies = LRUCache(cache_size * 4, ttl)
+        self._inflight = {}
+
+    async def _shared(self, key, compute):
+        """Run compute() on the executor once per key, however many requests are waiting for it"""
+        future = self._inflight.get(key)
+        if future is None:
+            loop = asyncio.get_running_loop()
+            future = loop.run_in_executor(self.executor, compute)
+            self._inflight[key] = future
+            future.add_done_callback(lambda _: self._inflight.pop(key, None))
+        return await asyncio.shield(future)
+
+    def _load_bars(self, symbol, period, interval):
+        """Downloaded bars; weekly/monthly intervals are resampled from the cached daily bars"""
+        download_interval = '1d' if is_local_interval(interval) else interval
+        key = (symbol, period, download_interval)
+        bars = self.bars.get(key)
+        if bars is None:
+            bars = self.fetcher.fetch_stock_data(symbol, period=period, interval=download_interval)
+            if bars is None:
+                raise LookupError(f"No data found for symbol: {symbol}")
+            self.bars.put(key, bars)
+        return resample_ohlcv(bars, interval) if interval != download_interval else bars
+
+    def _compute_frame(self, symbol, period, interval):
+        return self.fetcher.add_technical_indicators(self._load_bars(symbol, period, interval))
+
+    def _encode(self, frame, symbol, fmt, max_points):
+        data = downsample_frame(frame, max_points)
+        if fmt == 'json':
+            payload = self.fetcher.prepare_data_for_js(data)
+        elif fmt == 'records':
+            payload = _records(data)
+        else:
+            manifest, buffers = build_columnar_payload(data, symbol)
+            if fmt == 'binary':
+                return CachedBody(b''.join(memoryview(values).cast('B') for values in buffers),
+                                  'application/octet-stream')
+            payload = manifest
+        return CachedBody(json.dumps(payload, separators=(',', ':')).encode(), 'application/json')
+
+    async def data_body(self, symbol, period, interval, fmt, max_points):
+        key = (symbol, period, interval, fmt, max_points)
+        body = self.bodies.get(key)
+        if body is not None:
+            return body
+
+        frame_key = (symbol, period, interval)
+        frame = self.frames.get(frame_key)
+        if frame is None:
+            frame = await self._shared(frame_key, lambda: self._compute_frame(symbol, period, interval))
+            self.frames.put(frame_key, frame)
+
+        body = await self._shared(key, lambda: self._encode(frame, symbol, fmt, max_points))
+        self.bodies.put(key, body)
+        return body
+
+    def stats(self):
+        return {'bars': self.bars.stats(), 'frames': self.frames.stats(), 'bodies': self.bodies.stats(),
+                'in_flight': len(self._inflight)}
+
+    async def route(self, path, query):
+        """Return (status, CachedBody or None, extra headers)"""
+        if path == '/health':
+            return 200, CachedBody(json.dumps(self.stats()).encode(), 'application/json'), {}
+
+        if path.startswith('/api/data/'):
+            symbol = path[len('/api/data/'):].strip('/').upper()
+            fmt = query.get('format', 'json')
+            if not symbol or fmt not in FORMATS:
+                return 400, CachedBody(b'{"error": "expected /api/data/<SYMBOL>?format=json|records|columnar|binary"}',
+                                       'application/json'), {}
+            try:
+                max_points = int(query['max_points']) if query.get('max_points') else None
+            except ValueError:
+                return 400, CachedBody(b'{"error": "max_points must be an integer"}', 'application/json'), {}
+            period = query.get('period', self.default_period)
+            interval = query.get('interval', '1d')
+            body = await self.data_body(symbol, period, interval, fmt, max_points)
+            if fmt == 'columnar':
+                # Point the manifest at the matching binary endpoint instead of a file
+                manifest = json.loads(body.body)
+                params = f"period={period}&interval={interval}&format=binary"
+                if max_points:
+                    params += f"&max_points={max_points}"
+                manifest['buffer'] = f"/api/data/{symbol}?{params}"
+                body = CachedBody(json.dumps(manifest, separators=(',', ':')).encode(), 'application/json')
+            return 200, body, {}
+
+        name = os.path.basename(path)
+        if name.endswith('_data.json') and not os.path.exists(os.path.join(self.root, name)):
+            symbol = name[:-len('_data.json')].upper()
+            return 200, await self.data_body(symbol, self.default_period, '1d', 'records', None), {}
+
+        return self._static(path)
+
+    def _static(self, path):
+        relative = os.path.normpath(unquote(path).lstrip('/')) if path != '/' else 'stock_visualizer.html'
+        full_path = os.path.join(self.root, relative)
+        if (relative.startswith('..') or os.path.splitext(full_path)[1] not in STATIC_TYPES
+                or not os.path.isfile(full_path)):
+            return 404, CachedBody(b'Not found', 'text/plain'), {}
+        with open(full_path, 'rb') as f:
+            content = f.read()
+        content_type = mimetypes.guess_type(full_path)[0] or 'application/octet-stream'
+        return 200, CachedBody(content, content_type), {'Cache-Control': 'no-cache'}
+
+    async def handle(self, reader, writer):
+        """Serve requests on one connection until the client closes it or asks to"""
+        try:
+            while True:
+                try:
+                    head = await reader.readuntil(b'\r\n\r\n')
+                except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+                    break
+                lines = head.decode('latin-1').split('\r\n')
+                try:
+                    method, target, version = lines[0].split(' ', 2)
+                except ValueError:
+                    break
+                headers = {}
+                for line in lines[1:]:
+                    if ':' in line:
+                        name, value = line.split(':', 1)
+                        headers[name.strip().lower()] = value.strip()
+
+                keep_alive = (version == 'HTTP/1.1' and headers.get('connection', '').lower() != 'close')
+                await self._respond(writer, method, target, headers, keep_alive)
+                if not keep_alive:
+                    break
+        finally:
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+
+    async def _respond(self, writer, method, target, headers, keep_alive):
+        extra = {}
+        if method not in ('GET', 'HEAD'):
+            status, body = 405, CachedBody(b'Method not allowed', 'text/plain')
+        else:
+            url = urlsplit(target)
+            query = {name: values[-1] for name, values in parse_qs(url.query).items()}
+            try:
+                status, body, extra = await self.route(url.path, query)
+            except LookupError as e:
+                status, body = 404, CachedBody(json.dumps({'error': str(e)}).encode(), 'application/json')
+            except Exception as e:
+                status, body = 500, CachedBody(json.dumps({'error': str(e)}).encode(), 'application/json')
+
+        response_headers = {
+            'Content-Type': body.content_type,
+            'ETag': body.etag,
+            'Vary': 'Accept-Encoding',
+            'Connection': 'keep-alive' if keep_alive else 'close',
+        }
+        if status == 200 and 'Cache-Control' not in extra:
+            response_headers['Cache-Control'] = f'max-age={self.bodies.ttl or 0}'
+        response_headers.update(extra)
+
+        payload = body.body
+        if status == 200 and body.etag in [tag.strip() for tag in headers.get('if-none-match', '').split(',')]:
+            status, payload = 304, b''
+        elif len(payload) >= GZIP_MIN_BYTES and 'gzip' in headers.get('accept-encoding', ''):
+            payload = body.gzipped()
+            response_headers['Content-Encoding'] = 'gzip'
+        response_headers['Content-Length'] = str(len(payload))
+
+        lines = [f"HTTP/1.1 {status} {STATUS_TEXT.get(status, '')}"]
+        lines += [f"{name}: {value}" for name, value in response_headers.items()]
+        writer.write(('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1'))
+        if method != 'HEAD' and status != 304:
+            writer.write(payload)
+        await writer.drain()
+
+    async def serve(self, host='127.0.0.1', port=8000):
+        server = await asyncio.start_server(self.handle, host, port, limit=MAX_HEADER_BYTES)
+        address = server.sockets[0].getsockname()
+        print(f"Serving on http://{address[0]}:{address[1]}/")
+        async with server:
+            await server.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Serve stock data and indicators to the HTML/JS front end')
+    parser.add_argument('--host', default='127.0.0.1', help='Address to bind (default: 127.0.0.1)')
+    parser.add_argument('--port', type=int, default=8000, help='Port to listen on (default: 8000)')
+    parser.add_argument('--period', default='6mo', help='Default period for requests without one (default: 6mo)')
+    parser.add_argument('--cache-size', type=int, default=128, help='Frames kept in memory (default: 128)')
+    parser.add_argument('--ttl', type=float, default=300, help='Seconds before cached data is refetched (default: 300)')
+    parser.add_argument('--workers', type=int, default=8, help='Threads for downloads and indicators (default: 8)')
+    parser.add_argument('--store', type=str, help='OHLCV store directory; only new bars are downloaded')
+    args = parser.parse_args()
+
+    store = None
+    if args.store:
+        from ohlcv_store import OHLCVStore
+        store = OHLCVStore(args.store)
+
+    server = AnalyticsServer(default_period=args.period, cache_size=args.cache_size, ttl=args.ttl,
+                             workers=args.workers, store=store)
+    try:
+        asyncio.run(server.serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
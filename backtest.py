@@ -0,0 +1,241 @@
+"""
+Backtest - Vectorized P&L of indicator signals, with parameter grids on a process pool
+
+Signals become target positions (1 long, 0 flat, -1 short) with array
+operations only. A position decided on bar t's close is held over bar t+1,
+so no signal ever trades on the bar that produced it. Everything works on
+one series or on a symbols x bars matrix (time on the last axis), which is
+how grids over many symbols are evaluated without per-bar Python loops.
+"""
+
+import itertools
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from batch_indicators import BatchIndicatorEngine, stack_closes
+
+TRADING_DAYS = 252
+
+
+def _forward_fill(values):
+    """Carry the last non-NaN value forward along the last axis"""
+    values = np.asarray(values, dtype=float)
+    index = np.where(np.isnan(values), 0, np.arange(values.shape[-1]))
+    np.maximum.accumulate(index, axis=-1, out=index)
+    return np.take_along_axis(values, index, axis=-1)
+
+
+def crossover_positions(fast, slow, allow_short=False):
+    """
+    Long while fast is above slow (e.g. MACD above its signal line), flat or short below
+    Changes of position are exactly the crossovers
+    """
+    with np.errstate(invalid='ignore'):
+        above = np.asarray(fast) > np.asarray(slow)
+        below = np.asarray(fast) < np.asarray(slow)
+    return above.astype(float) - (below.astype(float) if allow_short else 0.0)
+
+
+def threshold_positions(indicator, enter_below=30, exit_above=70, allow_short=False):
+    """
+    Long from when indicator drops below enter_below until it rises above exit_above (RSI style)
+    With allow_short the opposite extreme opens a short instead of only closing the long
+    """
+    indicator = np.asarray(indicator, dtype=float)
+    with np.errstate(invalid='ignore'):
+        events = np.where(indicator < enter_below, 1.0,
+                          np.where(indicator > exit_above, -1.0 if allow_short else 0.0, np.nan))
+    return np.nan_to_num(_forward_fill(events))
+
+
+def band_positions(close, lower, upper):
+    """Long from a close below the lower band until a close above the upper band (Bollinger reversion)"""
+    close = np.asarray(close, dtype=float)
+    with np.errstate(invalid='ignore'):
+        events = np.where(close < np.asarray(lower), 1.0, np.where(close > np.asarray(upper), 0.0, np.nan))
+    return np.nan_to_num(_forward_fill(events))
+
+
+def run_backtest(close, positions, cost=0.0, periods_per_year=TRADING_DAYS):
+    """
+    P&L of holding positions over close; cost is charged per unit of position change
+    close and positions are 1-D or symbols x bars; NaN closes (e.g. padding) earn nothing.
+    Returns a dict of arrays: returns, held, equity and per-row metrics.
+    """
+    close = np.asarray(close, dtype=float)
+    positions = np.nan_to_num(np.asarray(positions, dtype=float))
+    valid = ~np.isnan(close)
+
+    returns = np.zeros_like(close)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        returns[..., 1:] = close[..., 1:] / close[..., :-1] - 1
+    returns = np.nan_to_num(returns, nan=0.0, posinf=0.0, neginf=0.0)
+
+    # Trade on the next bar: the position at t earns the return from t to t+1
+    held = np.zeros_like(positions)
+    held[..., 1:] = positions[..., :-1]
+    held[~valid] = 0.0
+    turnover = np.abs(np.diff(held, axis=-1, prepend=0.0))
+
+    strategy = held * returns - cost * turnover
+    equity = np.cumprod(1 + strategy, axis=-1)
+    drawdown = equity / np.maximum.accumulate(equity, axis=-1) - 1
+
+    bars = valid.sum(axis=-1)
+    masked = np.where(valid, strategy, np.nan)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean = np.nanmean(masked, axis=-1)
+        std = np.nanstd(masked, axis=-1, ddof=1)
+        sharpe = np.where(std > 0, mean / std * np.sqrt(periods_per_year), np.nan)
+        exposure = np.abs(held).sum(axis=-1) / bars
+
+    entries = (np.diff(held, axis=-1, prepend=0.0) != 0) & (held != 0)
+    return {
+        'returns': strategy,
+        'held': held,
+        'equity': equity,
+        'total_return': equity[..., -1] - 1,
+        'sharpe': sharpe,
+        'max_drawdown': drawdown.min(axis=-1),
+        'trades': entries.sum(axis=-1),
+        'exposure': exposure,
+    }
+
+
+METRICS = ('total_return', 'sharpe', 'max_drawdown', 'trades', 'exposure')
+
+
+def backtest_frame(data, rule='macd', cost=0.0, allow_short=False, **params):
+    """
+    Backtest one symbol from the indicator columns add_technical_indicators already produced
+    rule: 'macd' (MACD/MACD_Signal crossovers), 'rsi' (params enter_below, exit_above)
+    or 'bollinger' (BB_Lower/BB_Upper reversion)
+    Returns (metrics dict, frame with Position, Strategy_Return and Equity columns)
+    """
+    close = data['Close'].to_numpy(dtype=float)
+    if rule == 'macd':
+        positions = crossover_positions(data['MACD'].to_numpy(), data['MACD_Signal'].to_numpy(), allow_short)
+    elif rule == 'rsi':
+        positions = threshold_positions(data['RSI'].to_numpy(), allow_short=allow_short, **params)
+    elif rule == 'bollinger':
+        positions = band_positions(close, data['BB_Lower'].to_numpy(), data['BB_Upper'].to_numpy())
+    else:
+        raise ValueError(f"Unknown rule: {rule}")
+
+    result = run_backtest(close, positions, cost)
+    frame = data.assign(Position=result['held'], Strategy_Return=result['returns'], Equity=result['equity'])
+    return {name: result[name].item() for name in METRICS}, frame
+
+
+def macd_indicators(engine, closes, fast=12, slow=26, signal=9):
+    macd, macd_signal, _ = engine.calculate_macd(closes, fast, slow, signal)
+    return {'macd': macd, 'macd_signal': macd_signal}
+
+
+def macd_signals(closes, indicators, allow_short=False):
+    """Positions of MACD/signal crossovers for every row of closes"""
+    return crossover_positions(indicators['macd'], indicators['macd_signal'], allow_short)
+
+
+def rsi_indicators(engine, closes, window=14):
+    return {'rsi': engine.calculate_rsi(closes, window)}
+
+
+def rsi_signals(closes, indicators, enter_below=30, exit_above=70, allow_short=False):
+    """Positions of RSI threshold entries/exits for every row of closes"""
+    return threshold_positions(indicators['rsi'], enter_below, exit_above, allow_short)
+
+
+def bollinger_indicators(engine, closes, window=20, num_std=2):
+    upper, _, lower = engine.calculate_bollinger_bands(closes, window, num_std)
+    return {'upper': upper, 'lower': lower}
+
+
+def bollinger_signals(closes, indicators):
+    """Positions of Bollinger band reversion for every row of closes"""
+    return band_positions(closes, indicators['lower'], indicators['upper'])
+
+
+# name -> (indicator function, signal function, parameter names the indicators depend on)
+# Grid points that share indicator parameters reuse one indicator computation
+STRATEGIES = {
+    'macd': (macd_indicators, macd_signals, ('fast', 'slow', 'signal')),
+    'rsi': (rsi_indicators, rsi_signals, ('window',)),
+    'bollinger': (bollinger_indicators, bollinger_signals, ('window', 'num_std')),
+}
+
+# Set once per worker process so the closes matrix is pickled per worker, not per task
+_worker_closes = None
+
+
+def _init_worker(closes):
+    global _worker_closes
+    _worker_closes = closes
+
+
+def _evaluate(strategy, indicator_params, signal_params, closes, cost, periods_per_year):
+    """
+    Metrics for every signal parameter set sharing one indicator computation,
+    each vectorized across all symbols (rows); returns a list of metric dicts
+    """
+    indicator_func, signal_func, _ = STRATEGIES[strategy]
+    indicators = indicator_func(BatchIndicatorEngine(), closes, **indicator_params)
+    results = []
+    for params in signal_params:
+        result = run_backtest(closes, signal_func(closes, indicators, **params), cost, periods_per_year)
+        results.append({name: result[name] for name in METRICS})
+    return results
+
+
+def _evaluate_job(job):
+    return _evaluate(*job[:3], _worker_closes, *job[3:])
+
+
+def grid_search(frames, strategy='macd', grid=None, cost=0.0, max_workers=None,
+                periods_per_year=TRADING_DAYS, column='Close'):
+    """
+    Backtest every combination of grid (e.g. {'window': [7, 14, 21], 'enter_below': [20, 30]})
+    for every symbol in frames ({symbol: DataFrame}). Each process-pool task computes the
+    indicators for one set of indicator parameters (e.g. window) once and evaluates every
+    threshold combination on them, vectorized across all symbols. max_workers=0 runs in this process.
+    Returns a DataFrame with one row per (parameter set, symbol)
+    """
+    if strategy not in STRATEGIES:
+        raise ValueError(f"Unknown strategy: {strategy}")
+    grid = grid or {}
+    names = list(grid)
+    indicator_names = [name for name in names if name in STRATEGIES[strategy][2]]
+    symbols, closes = stack_closes(frames, column)
+
+    # One task per distinct set of indicator parameters
+    groups = {}
+    for values in itertools.product(*(grid[name] for name in names)):
+        params = dict(zip(names, values))
+        key = tuple(params[name] for name in indicator_names)
+        groups.setdefault(key, []).append(params)
+    jobs = []
+    for key, combinations in groups.items():
+        indicator_params = dict(zip(indicator_names, key))
+        signal_params = [{n: v for n, v in params.items() if n not in indicator_params} for params in combinations]
+        jobs.append((strategy, indicator_params, signal_params, cost, periods_per_year))
+
+    if max_workers == 0 or len(jobs) == 1:
+        results = [_evaluate(strategy, indicator_params, signal_params, closes, cost, periods_per_year)
+                   for strategy, indicator_params, signal_params, cost, periods_per_year in jobs]
+    else:
+        workers = min(max_workers or os.cpu_count() or 1, len(jobs))
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(closes,)) as executor:
+            results = list(executor.map(_evaluate_job, jobs))
+
+    tables = []
+    for combinations, metrics_list in zip(groups.values(), results):
+        for params, metrics in zip(combinations, metrics_list):
+            table = pd.DataFrame(metrics)
+            table.insert(0, 'symbol', symbols)
+            for position, name in enumerate(names):
+                table.insert(position, name, params[name])
+            tables.append(table)
+    return pd.concat(tables, ignore_index=True)
@@ -0,0 +1,254 @@
+"""
+Bar Store - Append-only, memory-mapped intraday bars with zero-copy range queries
+
+Each (symbol, interval) pair is one flat file of fixed-width records
+(time, open, high, low, close, volume), sorted by time. Files are mapped
+with np.memmap rather than read, so a date-range query is a binary search
+on the time column plus a slice: the result is a view of the mapped pages,
+and only the pages actually touched are ever loaded. Field views such as
+bars['close'][None, :] go straight into BatchIndicatorEngine, and
+ChunkedIndicators walks histories larger than memory a chunk at a time,
+carrying the EMA state and rolling-window tail across chunk boundaries.
+"""
+
+import os
+import numpy as np
+import pandas as pd
+
+from batch_indicators import BatchIndicatorEngine
+
+# time is nanoseconds since the epoch in UTC
+BAR_DTYPE = np.dtype([('time', '<i8'), ('open', '<f8'), ('high', '<f8'), ('low', '<f8'),
+                      ('close', '<f8'), ('volume', '<f8')])
+
+PRICE_FIELDS = ('open', 'high', 'low', 'close', 'volume')
+
+
+def _to_ns(timestamp):
+    """Nanoseconds since the epoch (UTC) of a timestamp-like value; naive values are taken as UTC"""
+    timestamp = pd.Timestamp(timestamp)
+    if timestamp.tzinfo is not None:
+        timestamp = timestamp.tz_convert("UTC").tz_localize(None)
+    return timestamp.as_unit("ns").value
+
+
+def frame_to_records(data):
+    """
+    Convert an OHLCV DataFrame with a DatetimeIndex into a BAR_DTYPE array sorted by time
+    Works for 'Open'/'open' style column names alike; missing columns become NaN
+    """
+    if not isinstance(data.index, pd.DatetimeIndex):
+        raise ValueError("OHLCV data must be indexed by timestamp")
+    data = data.sort_index()
+    index = data.index.tz_convert("UTC") if data.index.tz is not None else data.index
+    columns = {str(column).lower(): column for column in data.columns}
+
+    records = np.empty(len(data), dtype=BAR_DTYPE)
+    records['time'] = index.as_unit("ns").asi8
+    for field in PRICE_FIELDS:
+        if field in columns:
+            records[field] = data[columns[field]].to_numpy(dtype=float)
+        else:
+            records[field] = np.nan
+    return records
+
+
+def records_to_frame(bars, tz="UTC"):
+    """
+    Copy bars (e.g. the result of BarStore.range) into a DataFrame with
+    Open/High/Low/Close/Volume columns, indexed by timestamp in tz
+    """
+    index = pd.DatetimeIndex(np.asarray(bars['time']).astype("datetime64[ns]"), name="Date")
+    index = index.tz_localize("UTC")
+    if tz != "UTC":
+        index = index.tz_convert(tz) if tz is not None else index.tz_localize(None)
+    return pd.DataFrame({field.capitalize(): np.array(bars[field]) for field in PRICE_FIELDS}, index=index)
+
+
+class BarStore:
+    def __init__(self, root="bar_store"):
+        self.root = root
+        # (symbol, interval) -> (file size when mapped, memmap)
+        self._maps = {}
+
+    def _path(self, symbol, interval):
+        return os.path.join(self.root, symbol.upper(), f"{interval}.bars")
+
+    def has(self, symbol, interval):
+        """
+        Check whether any bars are stored for symbol/interval
+        """
+        return len(self.bars(symbol, interval)) > 0
+
+    def bars(self, symbol, interval):
+        """
+        Return every stored bar as a read-only memmap of BAR_DTYPE records (empty on a miss)
+        """
+        path = self._path(symbol, interval)
+        if not os.path.exists(path):
+            return np.empty(0, dtype=BAR_DTYPE)
+
+        size = os.path.getsize(path)
+        cached = self._maps.get((symbol.upper(), interval))
+        if cached is not None and cached[0] == size:
+            return cached[1]
+
+        # A record cut short by a crash mid-append is ignored until the next append truncates it
+        count = size // BAR_DTYPE.itemsize
+        if count == 0:
+            return np.empty(0, dtype=BAR_DTYPE)
+        bars = np.memmap(path, dtype=BAR_DTYPE, mode='r', shape=(count,))
+        self._maps[(symbol.upper(), interval)] = (size, bars)
+        return bars
+
+    def range(self, symbol, interval, start=None, end=None):
+        """
+        Return the bars with start <= time <= end as a view of the mapped file, without copying
+        start and end are timestamps (naive ones are UTC); None leaves that side open.
+        The view's fields (e.g. bars['close']) can be passed straight to the indicator kernels.
+        """
+        bars = self.bars(symbol, interval)
+        times = bars['time']
+        lo = 0 if start is None else int(np.searchsorted(times, _to_ns(start), side='left'))
+        hi = len(bars) if end is None else int(np.searchsorted(times, _to_ns(end), side='right'))
+        return bars[lo:max(lo, hi)]
+
+    def first_timestamp(self, symbol, interval):
+        """
+        Return the timestamp (UTC) of the oldest stored bar, or None on a miss
+        """
+        bars = self.bars(symbol, interval)
+        return pd.Timestamp(int(bars['time'][0]), tz="UTC") if len(bars) else None
+
+    def last_timestamp(self, symbol, interval):
+        """
+        Return the timestamp (UTC) of the newest stored bar, or None on a miss
+        """
+        bars = self.bars(symbol, interval)
+        return pd.Timestamp(int(bars['time'][-1]), tz="UTC") if len(bars) else None
+
+    def append(self, symbol, interval, records):
+        """
+        Append BAR_DTYPE records (or an OHLCV DataFrame) to the end of the file.
+        Bars older than the newest stored bar are dropped; a bar at exactly its
+        timestamp replaces it, so a refreshed partial bar overwrites the old one.
+        Returns the number of bars written.
+        """
+        if isinstance(records, pd.DataFrame):
+            records = frame_to_records(records)
+        records = np.asarray(records, dtype=BAR_DTYPE)
+        if len(records) == 0:
+            return 0
+        if np.any(np.diff(records['time']) <= 0):
+            records = np.sort(records, order='time', kind='stable')
+            _, keep = np.unique(records['time'][::-1], return_index=True)
+            # Keep the last of several bars with the same timestamp
+            records = records[len(records) - 1 - keep]
+
+        path = self._path(symbol, interval)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._maps.pop((symbol.upper(), interval), None)
+
+        with open(path, 'r+b' if os.path.exists(path) else 'w+b') as f:
+            size = f.seek(0, os.SEEK_END)
+            count = size // BAR_DTYPE.itemsize
+            if size != count * BAR_DTYPE.itemsize:
+                f.truncate(count * BAR_DTYPE.itemsize)
+
+            if count:
+                f.seek((count - 1) * BAR_DTYPE.itemsize)
+                last = np.frombuffer(f.read(BAR_DTYPE.itemsize), dtype=BAR_DTYPE)[0]['time']
+                records = records[records['time'] >= last]
+                if len(records) and records['time'][0] == last:
+                    count -= 1
+            if len(records) == 0:
+                return 0
+
+            f.seek(count * BAR_DTYPE.itemsize)
+            f.write(records.tobytes())
+        return len(records)
+
+    def iter_chunks(self, symbol, interval, start=None, end=None, chunk_bars=1_000_000):
+        """
+        Yield the bars in start..end as consecutive views of at most chunk_bars records
+        """
+        bars = self.range(symbol, interval, start, end)
+        for lo in range(0, len(bars), chunk_bars):
+            yield bars[lo:lo + chunk_bars]
+
+    def iter_indicators(self, symbol, interval, start=None, end=None, chunk_bars=1_000_000, indicators=None):
+        """
+        Yield (bars, indicators) per chunk, where indicators maps the
+        add_technical_indicators column names to arrays aligned with bars.
+        Values match one pass over the whole range; peak memory is set by chunk_bars.
+        Indicators warm up from the first bar of the range, as they would on a DataFrame of it.
+        """
+        chunked = ChunkedIndicators(indicators)
+        for bars in self.iter_chunks(symbol, interval, start, end, chunk_bars):
+            yield bars, chunked.update(bars['close'])
+
+
+class ChunkedIndicators:
+    """
+    Indicator columns over a series fed in consecutive chunks
+    EMAs (EMA 20, MACD and its signal line) carry their last value into the next
+    chunk; rolling windows (SMA, Bollinger Bands, RSI) carry the last closes they need.
+    """
+
+    # SMA 50 needs the 49 closes before a bar; RSI 14 needs 14 changes, i.e. 14 closes before
+    TAIL = 49
+
+    def __init__(self, indicators=None):
+        self.engine = BatchIndicatorEngine()
+        self.indicators = indicators if indicators is not None else self.engine.available_indicators
+        self._tail = np.empty(0)
+        self._ema = {}
+
+    def _continue_ema(self, name, values, span):
+        """adjust=False EMA of values continuing from the last value of the previous chunk"""
+        previous = self._ema.get(name)
+        if previous is not None:
+            values = np.concatenate([[previous], values])
+        ema = pd.Series(values).ewm(span=span, adjust=False).mean().to_numpy()
+        if previous is not None:
+            ema = ema[1:]
+        if len(ema):
+            self._ema[name] = ema[-1]
+        return ema
+
+    def update(self, closes):
+        """Return the indicator columns for the next chunk of closes (any 1-D array or field view)"""
+        closes = np.asarray(closes, dtype=float)
+        carried = len(self._tail)
+        window = np.concatenate([self._tail, closes])[None, :]
+        results = {}
+
+        if 'SMA' in self.indicators or 'Bollinger_Bands' in self.indicators:
+            sma_20, std_20 = self.engine.window_stats(window, 20)
+            sma_20 = sma_20[0, carried:]
+            std_20 = std_20[0, carried:]
+
+        if 'SMA' in self.indicators:
+            results['SMA_20'] = sma_20
+            results['SMA_50'] = self.engine.calculate_sma(window, 50)[0, carried:]
+
+        if 'EMA' in self.indicators:
+            results['EMA_20'] = self._continue_ema('EMA_20', closes, 20)
+
+        if 'RSI' in self.indicators:
+            results['RSI'] = self.engine.calculate_rsi(window)[0, carried:]
+
+        if 'MACD' in self.indicators:
+            macd = self._continue_ema('EMA_12', closes, 12) - self._continue_ema('EMA_26', closes, 26)
+            signal = self._continue_ema('MACD_Signal', macd, 9)
+            results['MACD'] = macd
+            results['MACD_Signal'] = signal
+            results['MACD_Histogram'] = macd - signal
+
+        if 'Bollinger_Bands' in self.indicators:
+            results['BB_Upper'] = sma_20 + std_20 * 2
+            results['BB_Middle'] = sma_20
+            results['BB_Lower'] = sma_20 - std_20 * 2
+
+        self._tail = window[0, -self.TAIL:].copy()
+        return results
@@ -0,0 +1,217 @@
+"""
+Batch Indicators - Cross-sectional indicator kernels over a symbols x bars matrix
+
+Closes for many symbols are stacked into one 2-D float array (one row per
+symbol, NaN where a symbol has no bar) and every indicator is computed for
+all symbols in a handful of NumPy passes instead of one pandas call per
+symbol.
+"""
+
+import numpy as np
+
+
+def stack_closes(frames, column='Close'):
+    """
+    Stack the close column of several DataFrames into a left-aligned matrix
+    Returns (symbols, closes) where shorter histories are padded with NaN at the end
+    """
+    symbols = list(frames.keys())
+    length = max((len(frames[symbol]) for symbol in symbols), default=0)
+    closes = np.full((len(symbols), length), np.nan)
+    for row, symbol in enumerate(symbols):
+        values = frames[symbol][column].to_numpy(dtype=float)
+        closes[row, :len(values)] = values
+    return symbols, closes
+
+
+class BatchIndicatorEngine:
+    def __init__(self, block_size=4096):
+        # Cumulative sums are restarted every block_size bars to bound rounding error
+        self.block_size = block_size
+        self.available_indicators = ['SMA', 'EMA', 'RSI', 'MACD', 'Bollinger_Bands']
+
+    def calculate_sma(self, closes, window=20):
+        """Calculate Simple Moving Average for every row"""
+        mean, _ = self._window_stats(closes, window)
+        return mean
+
+    def window_stats(self, closes, window=20):
+        """Calculate the rolling mean and sample standard deviation for every row, returns (mean, std)"""
+        return self._window_stats(closes, window)
+
+    def calculate_ema(self, closes, window=20, adjust=False):
+        """Calculate Exponential Moving Average for every row"""
+        closes = np.asarray(closes, dtype=float)
+        return self._ema(closes, window, adjust, np.isnan(closes))
+
+    def calculate_rsi(self, closes, window=14):
+        """Calculate Relative Strength Index for every row"""
+        closes = np.asarray(closes, dtype=float)
+        missing = np.isnan(closes)
+
+        delta = np.full_like(closes, np.nan)
+        delta[:, 1:] = closes[:, 1:] - closes[:, :-1]
+        # Like delta.where(delta > 0, 0) the first diff of each history counts as zero,
+        # while padding stays NaN so windows reaching into it are discarded
+        gain = np.where(delta > 0, delta, 0.0)
+        loss = np.where(delta < 0, -delta, 0.0)
+        gain[missing] = np.nan
+        loss[missing] = np.nan
+
+        avg_gain, _ = self._window_stats(gain, window, with_std=False)
+        avg_loss, _ = self._window_stats(loss, window, with_std=False)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            rsi = 100 - (100 / (1 + avg_gain / avg_loss))
+        rsi[missing] = np.nan
+        return rsi
+
+    def calculate_macd(self, closes, fast=12, slow=26, signal=9, adjust=False):
+        """Calculate MACD for every row, returns (macd, signal, histogram)"""
+        closes = np.asarray(closes, dtype=float)
+        missing = np.isnan(closes)
+        macd = self._ema(closes, fast, adjust, missing) - self._ema(closes, slow, adjust, missing)
+        macd_signal = self._ema(macd, signal, adjust, missing)
+        return macd, macd_signal, macd - macd_signal
+
+    def calculate_bollinger_bands(self, closes, window=20, num_std=2):
+        """Calculate Bollinger Bands for every row, returns (upper, middle, lower)"""
+        middle, std = self._window_stats(closes, window)
+        return middle + std * num_std, middle, middle - std * num_std
+
+    def add_technical_indicators(self, closes, indicators=None):
+        """
+        Compute the same indicator columns as StockDataFetcher.add_technical_indicators
+        Returns a dict mapping column name to a symbols x bars array
+        """
+        if indicators is None:
+            indicators = self.available_indicators
+
+        closes = np.asarray(closes, dtype=float)
+        results = {}
+
+        if 'SMA' in indicators or 'Bollinger_Bands' in indicators:
+            sma_20, std_20 = self._window_stats(closes, 20)
+
+        if 'SMA' in indicators:
+            results['SMA_20'] = sma_20
+            results['SMA_50'] = self.calculate_sma(closes, 50)
+
+        if 'EMA' in indicators:
+            results['EMA_20'] = self.calculate_ema(closes, 20)
+
+        if 'RSI' in indicators:
+            results['RSI'] = self.calculate_rsi(closes)
+
+        if 'MACD' in indicators:
+            macd, signal, histogram = self.calculate_macd(closes)
+            results['MACD'] = macd
+            results['MACD_Signal'] = signal
+            results['MACD_Histogram'] = histogram
+
+        if 'Bollinger_Bands' in indicators:
+            results['BB_Upper'] = sma_20 + std_20 * 2
+            results['BB_Middle'] = sma_20
+            results['BB_Lower'] = sma_20 - std_20 * 2
+
+        return results
+
+    def to_frames(self, frames, results):
+        """
+        Join batch results back onto the per-symbol DataFrames they were stacked from
+        frames must be in the same order passed to stack_closes
+        """
+        output = {}
+        for row, (symbol, data) in enumerate(frames.items()):
+            columns = {name: values[row, :len(data)] for name, values in results.items()}
+            output[symbol] = data.assign(**columns)
+        return output
+
+    def _window_stats(self, values, window, with_std=True):
+        """
+        Rolling mean (and sample std) along each row using blocked cumulative sums
+        Windows that contain any NaN produce NaN, as pandas rolling does by default
+        """
+        values = np.asarray(values, dtype=float)
+        n_rows, n_cols = values.shape
+        mean = np.full((n_rows, n_cols), np.nan)
+        std = np.full((n_rows, n_cols), np.nan) if with_std else None
+        if n_cols < window:
+            return mean, std
+
+        missing = np.isnan(values)
+        has_missing = missing.any()
+        # Centering each row keeps the sum of squares well conditioned
+        if has_missing:
+            with np.errstate(invalid='ignore'):
+                center = np.nanmean(np.where(missing.all(axis=1, keepdims=True), 0.0, values),
+                                    axis=1, keepdims=True)
+            shifted = np.where(missing, 0.0, values - center)
+        else:
+            center = values.mean(axis=1, keepdims=True)
+            shifted = values - center
+
+        for start in range(window - 1, n_cols, self.block_size):
+            stop = min(start + self.block_size, n_cols)
+            lo = start - window + 1
+
+            block = shifted[:, lo:stop]
+            sums = self._window_sum(block, window)
+            gaps = self._window_sum(missing[:, lo:stop], window) > 0 if has_missing else None
+
+            block_mean = sums / window
+            block_mean += center
+            if has_missing:
+                block_mean[gaps] = np.nan
+            mean[:, start:stop] = block_mean
+
+            if with_std and window > 1:
+                squares = self._window_sum(block * block, window)
+                squares -= sums * sums / window
+                squares /= window - 1
+                np.maximum(squares, 0.0, out=squares)
+                block_std = np.sqrt(squares, out=squares)
+                if has_missing:
+                    block_std[gaps] = np.nan
+                std[:, start:stop] = block_std
+
+        return mean, std
+
+    @staticmethod
+    def _window_sum(values, window):
+        dtype = np.int64 if values.dtype == bool else values.dtype
+        cumulative = np.zeros((values.shape[0], values.shape[1] + 1), dtype=dtype)
+        np.cumsum(values, axis=1, out=cumulative[:, 1:])
+        return cumulative[:, window:] - cumulative[:, :-window]
+
+    @staticmethod
+    def _ema(values, window, adjust, missing):
+        """
+        EMA along each row, vectorized across rows
+        Each row starts at its first valid value; padded (NaN) bars stay NaN
+        """
+        alpha = 2.0 / (window + 1)
+        decay = 1.0 - alpha
+        # Walk time in a contiguous bars x symbols layout
+        series = np.ascontiguousarray(np.asarray(values, dtype=float).T)
+        out = np.full_like(series, np.nan)
+        state = np.full(series.shape[1], np.nan)
+        weight = np.zeros(series.shape[1])
+
+        for t in range(series.shape[0]):
+            x = series[t]
+            valid = ~np.isnan(x)
+            fresh = valid & np.isnan(state)
+            if adjust:
+                # pandas adjust=True: weighted average with weights decay**age
+                numerator = np.where(fresh, 0.0, state * weight)
+                weight = np.where(valid, np.where(fresh, 1.0, 1.0 + decay * weight), weight)
+                numerator = np.where(valid, x + decay * numerator, numerator)
+                state = np.where(valid, numerator / np.where(weight == 0, 1.0, weight), state)
+            else:
+                state = np.where(fresh, x, np.where(valid, alpha * x + decay * state, state))
+            out[t] = state
+
+        out = out.T
+        out[missing] = np.nan
+        return out
+
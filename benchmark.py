@@ -0,0 +1,337 @@
+#!/usr/bin/env python3
+"""
+Benchmark Suite - Times the fetch/parse, indicator, export and render stages on synthetic data
+
+No network is needed: OHLCV bars and Alpha Vantage payloads are generated
+locally. Results are written as JSON so two runs can be compared:
+
+    python benchmark.py --output before.json
+    python benchmark.py --output after.json --compare before.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+QUICK_SIZES = [250, 2500, 25000]
+FULL_SIZES = [250, 2500, 25000, 250000, 1000000]
+QUICK_SYMBOLS = [1, 10, 100]
+FULL_SYMBOLS = [1, 10, 100, 1000, 5000]
+
+# Charts are only rendered up to this many bars; beyond it only the downsampled render runs
+MAX_RAW_RENDER_BARS = 25000
+
+STAGES = ['startup', 'parse', 'indicators', 'batch', 'export', 'render']
+
+# Modules that must not load merely by importing the CLI and library modules
+HEAVY_MODULES = ('yfinance', 'matplotlib', 'seaborn')
+LIBRARY_MODULES = ('stock_data', 'stock_data_fetcher', 'stock_fetcher', 'stock_visualizer', 'watchlist')
+
+# Default budget for `python main.py --help`, in seconds
+STARTUP_BUDGET = 0.5
+
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def generate_ohlcv(n_bars, seed=0, start='2000-01-03', freq=None):
+    """
+    Generate a yfinance-shaped OHLCV frame from a geometric random walk
+    Daily business-day bars by default, minute bars for very long series
+    """
+    if freq is None:
+        freq = 'B' if n_bars <= 50000 else 'min'
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, n_bars)))
+    open_ = close * (1 + rng.normal(0, 0.002, n_bars))
+    spread = np.abs(rng.normal(0, 0.005, n_bars)) * close
+    index = pd.date_range(start, periods=n_bars, freq=freq, name='Date')
+    return pd.DataFrame({
+        'Open': open_,
+        'High': np.maximum(open_, close) + spread,
+        'Low': np.minimum(open_, close) - spread,
+        'Close': close,
+        'Volume': rng.integers(100_000, 10_000_000, n_bars),
+    }, index=index)
+
+
+def generate_alpha_vantage_series(n_bars, seed=0):
+    """
+    Generate an Alpha Vantage "Time Series (Daily)" dict, newest bar first like the API
+    """
+    data = generate_ohlcv(n_bars, seed)
+    series = {}
+    for date, row in zip(data.index[::-1], data.iloc[::-1].itertuples(index=False)):
+        series[date.strftime('%Y-%m-%d')] = {
+            "1. open": f"{row.Open:.4f}",
+            "2. high": f"{row.High:.4f}",
+            "3. low": f"{row.Low:.4f}",
+            "4. close": f"{row.Close:.4f}",
+            "5. volume": str(row.Volume),
+        }
+    return series
+
+
+def time_call(func, repeat):
+    """Run func repeat times and return the individual wall times in seconds"""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def _indicator_cases(data):
+    """(name, callable) pairs for every indicator in the fetcher classes"""
+    import stock_data
+    from stock_data_fetcher import StockDataFetcher
+    from stock_fetcher import StockFetcher
+
+    yf_fetcher = StockDataFetcher()
+    av_fetcher = StockFetcher()
+    av_frame = data.rename(columns=str.lower).reset_index().rename(columns={'Date': 'date'})
+    prices = av_frame['close']
+
+    legacy = stock_data.StockDataFetcher()
+
+    def legacy_case(method):
+        def run():
+            legacy.data = data.copy()
+            getattr(legacy, method)()
+        return run
+
+    return [
+        ('stock_data_fetcher.calculate_sma', lambda: yf_fetcher.calculate_sma(data)),
+        ('stock_data_fetcher.calculate_ema', lambda: yf_fetcher.calculate_ema(data)),
+        ('stock_data_fetcher.calculate_rsi', lambda: yf_fetcher.calculate_rsi(data)),
+        ('stock_data_fetcher.calculate_macd', lambda: yf_fetcher.calculate_macd(data)),
+        ('stock_data_fetcher.calculate_bollinger_bands', lambda: yf_fetcher.calculate_bollinger_bands(data)),
+        ('stock_data_fetcher.add_technical_indicators', lambda: yf_fetcher.add_technical_indicators(data)),
+        ('stock_fetcher._calculate_rsi', lambda: av_fetcher._calculate_rsi(prices)),
+        ('stock_fetcher._calculate_macd', lambda: av_fetcher._calculate_macd(prices)),
+        ('stock_fetcher._calculate_bollinger_bands', lambda: av_fetcher._calculate_bollinger_bands(prices)),
+        ('stock_fetcher._calculate_technical_indicators',
+         lambda: av_fetcher._calculate_technical_indicators(av_frame.copy())),
+        ('stock_data.calculate_sma', legacy_case('calculate_sma')),
+        ('stock_data.calculate_ema', legacy_case('calculate_ema')),
+        ('stock_data.calculate_rsi', legacy_case('calculate_rsi')),
+        ('stock_data.calculate_macd', legacy_case('calculate_macd')),
+    ]
+
+
+def time_command(args, repeat):
+    """Wall time of running a fresh interpreter with args, repeat times"""
+    return time_call(lambda: subprocess.run([sys.executable] + args, cwd=REPO_DIR, check=True,
+                                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL), repeat)
+
+
+def heavy_imports(modules=LIBRARY_MODULES):
+    """Heavy modules loaded as a side effect of importing modules (the library modules by default)"""
+    code = (f"import sys\nimport {', '.join(modules)}\n"
+            f"print(','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))")
+    output = subprocess.run([sys.executable, '-c', code], cwd=REPO_DIR, check=True,
+                            capture_output=True, text=True).stdout.strip()
+    return output.split(',') if output else []
+
+
+def bench_startup(sizes, symbols, repeat):
+    yield 'startup.python', 0, 1, time_command(['-c', 'pass'], repeat)
+    yield 'startup.main_help', 0, 1, time_command(['main.py', '--help'], repeat)
+    yield 'startup.import_library', 0, 1, time_command(['-c', f"import {', '.join(LIBRARY_MODULES)}"], repeat)
+
+
+def check_startup(budget, repeat):
+    """
+    Fail if `main.py --help` takes longer than budget seconds (median) or
+    if importing the library modules pulls in yfinance/matplotlib/seaborn
+    Returns a list of failure messages
+    """
+    failures = []
+    median = statistics.median(time_command(['main.py', '--help'], max(repeat, 3)))
+    print(f"main.py --help: {median * 1000:.1f} ms (budget {budget * 1000:.0f} ms)")
+    if median > budget:
+        failures.append(f"main.py --help took {median:.3f}s, over the {budget:.3f}s budget")
+    loaded = heavy_imports()
+    if loaded:
+        failures.append(f"Importing the library modules loads {', '.join(loaded)}")
+    return failures
+
+
+def bench_parse(sizes, symbols, repeat):
+    from stock_fetcher import StockFetcher
+    fetcher = StockFetcher()
+    for size in sizes:
+        series = generate_alpha_vantage_series(size)
+        yield 'parse.stock_fetcher._process_data', size, 1, time_call(
+            lambda: fetcher._process_data(series, 'SYN'), repeat)
+        payload = json.dumps({"Time Series (Daily)": series})
+        yield 'parse.json_loads', size, 1, time_call(lambda: json.loads(payload), repeat)
+
+
+def bench_indicators(sizes, symbols, repeat):
+    for size in sizes:
+        data = generate_ohlcv(size)
+        for name, func in _indicator_cases(data):
+            yield f'indicators.{name}', size, 1, time_call(func, repeat)
+
+
+def bench_batch(sizes, symbols, repeat, bars=252):
+    from stock_data_fetcher import StockDataFetcher
+    from batch_indicators import BatchIndicatorEngine, stack_closes
+
+    fetcher = StockDataFetcher()
+    engine = BatchIndicatorEngine()
+    for count in symbols:
+        frames = {f'SYN{i}': generate_ohlcv(bars, seed=i) for i in range(count)}
+        _, closes = stack_closes(frames)
+        yield 'batch.per_symbol_add_technical_indicators', bars, count, time_call(
+            lambda: [fetcher.add_technical_indicators(frame) for frame in frames.values()], repeat)
+        yield 'batch.BatchIndicatorEngine', bars, count, time_call(
+            lambda: engine.add_technical_indicators(closes), repeat)
+
+
+def bench_export(sizes, symbols, repeat):
+    from stock_data_fetcher import StockDataFetcher
+    from columnar_export import export_columnar
+
+    fetcher = StockDataFetcher()
+    with tempfile.TemporaryDirectory() as directory:
+        for size in sizes:
+            data = fetcher.add_technical_indicators(generate_ohlcv(size))
+            yield 'export.prepare_data_for_js+json', size, 1, time_call(
+                lambda: json.dumps(fetcher.prepare_data_for_js(data)), repeat)
+            yield 'export.columnar', size, 1, time_call(
+                lambda: export_columnar(data, os.path.join(directory, 'bench')), repeat)
+
+
+def bench_render(sizes, symbols, repeat):
+    from stock_data_fetcher import StockDataFetcher
+    from stock_visualizer import render_chart_file
+
+    fetcher = StockDataFetcher()
+    with tempfile.TemporaryDirectory() as directory:
+        filename = os.path.join(directory, 'bench.png')
+        for size in sizes:
+            data = fetcher.add_technical_indicators(generate_ohlcv(size))
+            if size <= MAX_RAW_RENDER_BARS:
+                yield 'render.price_chart', size, 1, time_call(
+                    lambda: render_chart_file('SYN', data, filename, dpi=100), repeat)
+            yield 'render.price_chart_2000_points', size, 1, time_call(
+                lambda: render_chart_file('SYN', data, filename, dpi=100, max_points=2000), repeat)
+
+
+BENCHMARKS = {
+    'startup': bench_startup,
+    'parse': bench_parse,
+    'indicators': bench_indicators,
+    'batch': bench_batch,
+    'export': bench_export,
+    'render': bench_render,
+}
+
+
+def run(stages, sizes, symbols, repeat):
+    results = []
+    for stage in stages:
+        for name, bars, count, timings in BENCHMARKS[stage](sizes, symbols, repeat):
+            result = {
+                'name': name,
+                'bars': bars,
+                'symbols': count,
+                'repeat': len(timings),
+                'min': min(timings),
+                'median': statistics.median(timings),
+            }
+            results.append(result)
+            print(f"{name:<55} bars={bars:<8} symbols={count:<5} median={result['median'] * 1000:10.3f} ms")
+    return results
+
+
+def environment():
+    return {
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'numpy': np.__version__,
+        'pandas': pd.__version__,
+    }
+
+
+def compare(results, baseline, threshold):
+    """
+    Print median ratios against a baseline run; returns the list of regressions beyond threshold
+    """
+    previous = {(r['name'], r['bars'], r['symbols']): r for r in baseline['results']}
+    regressions = []
+    print(f"\n{'benchmark':<55} {'bars':>8} {'symbols':>7} {'ratio':>7}")
+    for result in results:
+        key = (result['name'], result['bars'], result['symbols'])
+        if key not in previous:
+            continue
+        ratio = result['median'] / previous[key]['median'] if previous[key]['median'] else float('inf')
+        flag = '  SLOWER' if ratio > threshold else ''
+        print(f"{result['name']:<55} {result['bars']:>8} {result['symbols']:>7} {ratio:>7.2f}{flag}")
+        if ratio > threshold:
+            regressions.append((key, ratio))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the stock analysis pipeline on synthetic data')
+    parser.add_argument('--stages', nargs='+', choices=STAGES, default=STAGES,
+                        help='Stages to benchmark (default: all)')
+    parser.add_argument('--sizes', nargs='+', type=int,
+                        help='Bar counts per symbol (default: 250 2500 25000)')
+    parser.add_argument('--symbols', nargs='+', type=int,
+                        help='Symbol counts for the batch stage (default: 1 10 100)')
+    parser.add_argument('--full', action='store_true',
+                        help='Use the full grid: up to 1M bars and 5,000 symbols')
+    parser.add_argument('--repeat', type=int, default=3, help='Runs per benchmark (default: 3)')
+    parser.add_argument('--output', type=str, help='Write results as JSON to this file')
+    parser.add_argument('--compare', type=str, help='Baseline JSON file to compare against')
+    parser.add_argument('--threshold', type=float, default=1.2,
+                        help='Median ratio above which --compare reports a regression (default: 1.2)')
+    parser.add_argument('--startup-budget', type=float, nargs='?', const=STARTUP_BUDGET, metavar='SECONDS',
+                        help=f'Only check CLI startup against a budget (default: {STARTUP_BUDGET}s) '
+                             'and that no plotting/data-source modules load on import; exits 1 on failure')
+    args = parser.parse_args()
+
+    if args.startup_budget is not None:
+        failures = check_startup(args.startup_budget, args.repeat)
+        for failure in failures:
+            print(f"FAIL: {failure}")
+        sys.exit(1 if failures else 0)
+
+    # Render benchmarks must not open windows
+    os.environ.setdefault('MPLBACKEND', 'Agg')
+
+    sizes = args.sizes or (FULL_SIZES if args.full else QUICK_SIZES)
+    symbols = args.symbols or (FULL_SYMBOLS if args.full else QUICK_SYMBOLS)
+
+    results = run(args.stages, sizes, symbols, args.repeat)
+    report = {'environment': environment(), 'results': results}
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"\nResults saved to {args.output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        if compare(results, baseline, args.threshold):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
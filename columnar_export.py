@@ -0,0 +1,123 @@
+"""
+Columnar Export - Compact binary export of stock data for the JavaScript front end
+
+Each column is written as a raw little-endian typed buffer into one .bin
+file, described by a small JSON manifest (name, dtype, byte offset, length).
+The JS side maps the buffers straight onto Float32Array/Float64Array views
+without parsing per-element JSON.
+"""
+
+import os
+import json
+import numpy as np
+import pandas as pd
+
+FORMAT_VERSION = "columnar-v1"
+
+# Buffers start on 8-byte boundaries so every typed-array view is aligned
+ALIGNMENT = 8
+
+# Kept as float64 regardless of the requested dtype: timestamps need the
+# precision and float32 would round large volumes
+FLOAT64_COLUMNS = ('dates', 'volume')
+
+
+def column_key(name):
+    """Map a DataFrame column to the key used by prepare_data_for_js (e.g. MACD_Signal -> macd_signal)"""
+    return str(name).lower().replace(' ', '_')
+
+
+def _date_values(data):
+    """Dates as float64 milliseconds since the Unix epoch (what JS Date expects)"""
+    if 'date' in data.columns:
+        dates = pd.DatetimeIndex(data['date'])
+    elif 'Date' in data.columns:
+        dates = pd.DatetimeIndex(data['Date'])
+    else:
+        dates = pd.DatetimeIndex(data.index)
+    if dates.tz is not None:
+        dates = dates.tz_convert('UTC').tz_localize(None)
+    return dates.values.astype('datetime64[ms]').astype(np.int64).astype(np.float64)
+
+
+def build_columnar_payload(data, symbol=None, dtype='float32', columns=None):
+    """
+    Build (manifest, buffers) for data. buffers is a list of contiguous NumPy arrays
+    in file order; NaN is kept as NaN rather than filled with 0.
+    """
+    dtype = np.dtype(dtype)
+    if dtype.kind != 'f':
+        raise ValueError(f"Columnar export needs a float dtype, got {dtype}")
+
+    if columns is None:
+        columns = [c for c in data.columns
+                   if c not in ('date', 'Date', 'symbol') and data[c].dtype.kind in 'biuf']
+
+    arrays = [('dates', _date_values(data))]
+    for column in columns:
+        key = column_key(column)
+        target = np.float64 if key in FLOAT64_COLUMNS else dtype
+        arrays.append((key, data[column].to_numpy(dtype=target)))
+
+    manifest = {
+        "format": FORMAT_VERSION,
+        "symbol": symbol,
+        "rows": len(data),
+        "byte_order": "little",
+        "columns": [],
+    }
+    buffers = []
+    offset = 0
+    for key, values in arrays:
+        values = np.ascontiguousarray(values, dtype=values.dtype.newbyteorder('<'))
+        padding = -offset % ALIGNMENT
+        if padding:
+            buffers.append(np.zeros(padding, dtype=np.uint8))
+            offset += padding
+        manifest["columns"].append({
+            "name": key,
+            "dtype": values.dtype.name,
+            "offset": offset,
+            "length": len(values),
+        })
+        buffers.append(values)
+        offset += values.nbytes
+
+    manifest["byte_length"] = offset
+    return manifest, buffers
+
+
+def export_columnar(data, path, symbol=None, dtype='float32', columns=None):
+    """
+    Write data as <path>.bin plus a <path>.json manifest
+    Returns the manifest path
+    """
+    base, ext = os.path.splitext(path)
+    if ext in ('.json', '.bin'):
+        path = base
+
+    manifest, buffers = build_columnar_payload(data, symbol, dtype, columns)
+    manifest["buffer"] = os.path.basename(path) + ".bin"
+
+    with open(path + ".bin", "wb") as f:
+        for values in buffers:
+            f.write(memoryview(values).cast('B'))
+    with open(path + ".json", "w") as f:
+        json.dump(manifest, f, indent=2)
+    return path + ".json"
+
+
+def load_columnar(manifest_path):
+    """
+    Read a columnar export back into {name: ndarray}, memory-mapping the buffer file
+    """
+    with open(manifest_path) as f:
+        manifest = json.load(f)
+
+    buffer_path = os.path.join(os.path.dirname(manifest_path), manifest["buffer"])
+    raw = np.memmap(buffer_path, dtype=np.uint8, mode='r')
+    return {
+        column["name"]: np.frombuffer(raw, dtype=np.dtype(column["dtype"]).newbyteorder('<'),
+                                      count=column["length"], offset=column["offset"])
+        for column in manifest["columns"]
+    }
@@ -0,0 +1,309 @@
+"""
+Correlation - Blocked cross-symbol covariance and correlation, full and rolling
+
+Closes from the fetchers are aligned on a common calendar and turned into
+returns (dates x symbols). Every matrix is derived from four sufficient
+statistics that are plain matrix products over the rows (pair counts, pair
+sums, pair sums of squares and cross products), which gives pandas-style
+pairwise handling of missing bars. The products are computed in square
+tiles of the symbol axis on a thread pool; only tiles on or above the
+diagonal are computed for the symmetric ones. Rolling windows add the
+entering rows and subtract the leaving ones (a rank-k update) instead of
+recomputing the window, with a periodic full refresh to stop rounding drift.
+"""
+
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+BLOCK_SIZE = 512
+
+
+def align_closes(frames, column='Close', how='outer', min_coverage=0.0):
+    """
+    Align the close column of several DataFrames ({symbol: DataFrame}) on one calendar
+    how='outer' keeps every date any symbol traded (NaN where a symbol has no bar),
+    'inner' only dates all symbols traded. Symbols with fewer than min_coverage
+    (a fraction of the calendar) bars are dropped.
+    Returns a dates x symbols DataFrame
+    """
+    series = {}
+    for symbol, data in frames.items():
+        if data is None or data.empty:
+            continue
+        close = data[column]
+        if close.index.tz is not None:
+            close = close.tz_convert("UTC")
+        series[symbol] = close[~close.index.duplicated(keep='last')]
+    if not series:
+        return pd.DataFrame()
+
+    closes = pd.concat(series, axis=1, join=how, sort=True)
+    if min_coverage:
+        closes = closes.loc[:, closes.notna().mean() >= min_coverage]
+    return closes
+
+
+def returns_matrix(closes, log=False):
+    """Bar-to-bar returns of aligned closes; the first row and gaps stay NaN"""
+    closes = closes.astype(float)
+    if log:
+        returns = np.log(closes / closes.shift(1))
+    else:
+        returns = closes / closes.shift(1) - 1
+    return returns.iloc[1:]
+
+
+def _tiles(n, block):
+    return [(lo, min(lo + block, n)) for lo in range(0, n, block)]
+
+
+def _gram(a, b=None, weights=None, block=BLOCK_SIZE, executor=None, out=None):
+    """
+    a.T @ diag(weights) @ b computed tile by tile on the executor (b defaults to a, weights to ones)
+    The symmetric product (b is None) only computes tiles on or above the diagonal and mirrors them.
+    With out the product is added to it in place instead of returned in a new array.
+    """
+    symmetric = b is None
+    b = a if symmetric else b
+    if weights is not None:
+        b = b * weights[:, None]
+    accumulate = out is not None
+    if not accumulate:
+        out = np.empty((a.shape[1], b.shape[1]))
+    tiles = _tiles(a.shape[1], block)
+    jobs = [(rows, cols) for i, rows in enumerate(tiles) for j, cols in enumerate(_tiles(b.shape[1], block))
+            if not symmetric or j >= i]
+
+    def tile(rows, cols):
+        product = a[:, rows[0]:rows[1]].T @ b[:, cols[0]:cols[1]]
+        if accumulate:
+            out[rows[0]:rows[1], cols[0]:cols[1]] += product
+        else:
+            out[rows[0]:rows[1], cols[0]:cols[1]] = product
+        if symmetric and rows != cols:
+            out[cols[0]:cols[1], rows[0]:rows[1]] = out[rows[0]:rows[1], cols[0]:cols[1]].T
+
+    if executor is None or len(jobs) == 1:
+        for rows, cols in jobs:
+            tile(rows, cols)
+    else:
+        # BLAS releases the GIL, so tiles run in parallel on threads
+        for future in [executor.submit(tile, rows, cols) for rows, cols in jobs]:
+            future.result()
+    return out
+
+
+class _Moments:
+    """
+    Pairwise sufficient statistics of a set of rows, additive over rows
+    With no missing values only the cross products are matrices; the rest are vectors
+    """
+
+    def __init__(self, n_symbols, dense):
+        self.dense = dense
+        self.cross = np.zeros((n_symbols, n_symbols))
+        if dense:
+            self.count = 0
+            self.sums = np.zeros(n_symbols)
+            self.squares = np.zeros(n_symbols)
+        else:
+            self.count = np.zeros((n_symbols, n_symbols))
+            self.sums = np.zeros((n_symbols, n_symbols))
+            self.squares = np.zeros((n_symbols, n_symbols))
+
+    def add(self, rows, removed=None, block=BLOCK_SIZE, executor=None):
+        """
+        Add rows of centered values (NaN for missing) and subtract removed rows
+        Both go through one product, [rows; removed].T @ diag(+1, -1) @ [rows; removed];
+        the symmetric statistics (cross products, pair counts) only compute its upper triangle
+        """
+        signs = None
+        if removed is not None and len(removed):
+            signs = np.concatenate([np.ones(len(rows)), -np.ones(len(removed))])
+            rows = np.concatenate([rows, removed])
+        if len(rows) == 0:
+            return
+        kw = {'weights': signs, 'block': block, 'executor': executor}
+
+        if self.dense:
+            _gram(rows, out=self.cross, **kw)
+            weights = np.ones(len(rows)) if signs is None else signs
+            self.count += int(weights.sum())
+            self.sums += weights @ rows
+            self.squares += weights @ (rows * rows)
+            return
+
+        valid = ~np.isnan(rows)
+        values = np.where(valid, rows, 0.0)
+        valid = valid.astype(float)
+        _gram(values, out=self.cross, **kw)
+        _gram(valid, out=self.count, **kw)
+        # sums[i, j]: sum of symbol i over the rows where both i and j have a value
+        _gram(values, valid, out=self.sums, **kw)
+        _gram(values * values, valid, out=self.squares, **kw)
+
+    def covariance(self, ddof=1, min_periods=1, correlation=False):
+        """Covariance (or correlation) matrix; pairs with fewer than min_periods rows are NaN"""
+        with np.errstate(divide='ignore', invalid='ignore'):
+            if self.dense:
+                return self._dense_covariance(ddof, min_periods, correlation)
+            n = self.count
+            cross = self.cross - self.sums * self.sums.T / n
+            if correlation:
+                var_i = np.maximum(self.squares - self.sums * self.sums / n, 0.0)
+                # A constant series has zero variance and correlates NaN with everything
+                result = np.clip(cross / np.sqrt(var_i * var_i.T), -1.0, 1.0)
+                np.fill_diagonal(result, np.where(np.isnan(np.diagonal(result)), np.nan, 1.0))
+            else:
+                result = cross / (n - ddof)
+            result[n < max(min_periods, 1)] = np.nan
+            return result
+
+    def _dense_covariance(self, ddof, min_periods, correlation):
+        # Every pair shares the same rows, so the variances are a vector and the
+        # whole matrix is one centered cross product scaled in place
+        n = self.count
+        if n < max(min_periods, 1):
+            return np.full(self.cross.shape, np.nan)
+        result = np.subtract(self.cross, np.outer(self.sums, self.sums / n))
+        if not correlation:
+            result /= n - ddof
+            return result
+        scale = 1.0 / np.sqrt(np.maximum(self.squares - self.sums * self.sums / n, 0.0))
+        result *= scale[:, None]
+        result *= scale[None, :]
+        np.clip(result, -1.0, 1.0, out=result)
+        np.fill_diagonal(result, np.where(np.isfinite(scale), 1.0, np.nan))
+        return result
+
+
+def _prepare(returns):
+    """Values as a float array plus per-symbol centers; columns and index for labelling"""
+    if isinstance(returns, pd.DataFrame):
+        symbols, index = returns.columns, returns.index
+        values = returns.to_numpy(dtype=float)
+    else:
+        values = np.asarray(returns, dtype=float)
+        symbols, index = pd.RangeIndex(values.shape[1]), pd.RangeIndex(values.shape[0])
+    # Covariance is shift invariant; centering keeps the raw sums well conditioned
+    valid = ~np.isnan(values)
+    center = np.where(valid, values, 0.0).sum(axis=0) / np.maximum(valid.sum(axis=0), 1)
+    return values - center, symbols, index
+
+
+def _executor(max_workers, n_symbols, block):
+    workers = (os.cpu_count() or 1) if max_workers is None else max_workers
+    if workers <= 1 or n_symbols <= block:
+        return None
+    return ThreadPoolExecutor(max_workers=workers)
+
+
+def covariance_matrix(returns, ddof=1, min_periods=1, correlation=False, block=BLOCK_SIZE, max_workers=None):
+    """
+    Full covariance matrix of returns (dates x symbols DataFrame or array)
+    Missing values are handled pairwise like DataFrame.cov; max_workers=1 runs on this thread.
+    Returns a symbols x symbols DataFrame for DataFrame input, otherwise an array
+    """
+    values, symbols, _ = _prepare(returns)
+    moments = _Moments(values.shape[1], dense=not np.isnan(values).any())
+    executor = _executor(max_workers, values.shape[1], block)
+    try:
+        moments.add(values, block=block, executor=executor)
+    finally:
+        if executor is not None:
+            executor.shutdown()
+    result = moments.covariance(ddof, min_periods, correlation)
+    if isinstance(returns, pd.DataFrame):
+        return pd.DataFrame(result, index=symbols, columns=symbols)
+    return result
+
+
+def correlation_matrix(returns, min_periods=1, block=BLOCK_SIZE, max_workers=None):
+    """Full Pearson correlation matrix of returns, pairwise like DataFrame.corr"""
+    return covariance_matrix(returns, min_periods=min_periods, correlation=True, block=block,
+                             max_workers=max_workers)
+
+
+class RollingCovariance:
+    """
+    Covariance/correlation of the last window rows, updated as rows arrive
+    Each update adds the new rows' statistics and subtracts those of the rows
+    leaving the window: O(k * symbols^2) for k rows instead of O(window * symbols^2).
+    """
+
+    def __init__(self, n_symbols, window, dense=True, refresh=None, block=BLOCK_SIZE, max_workers=None):
+        self.n_symbols = n_symbols
+        self.window = window
+        self.dense = dense
+        # Rebuild the statistics from the window after this many added rows
+        self.refresh = refresh if refresh is not None else 20 * window
+        self.block = block
+        self.max_workers = max_workers
+        self._rows = np.empty((0, n_symbols))
+        self._moments = _Moments(n_symbols, dense)
+        self._since_refresh = 0
+        self._executor = _executor(max_workers, n_symbols, block)
+
+    def update(self, rows):
+        """Append rows (k x symbols, centered or not, NaN for missing when dense=False)"""
+        rows = np.atleast_2d(np.asarray(rows, dtype=float))
+        if self.dense and np.isnan(rows).any():
+            raise ValueError("Missing values need RollingCovariance(dense=False)")
+        rows = rows[-self.window:]
+        leaving = max(len(self._rows) + len(rows) - self.window, 0)
+        removed = self._rows[:leaving]
+        self._since_refresh += len(rows)
+        self._rows = np.concatenate([self._rows[leaving:], rows])
+
+        if self._since_refresh >= self.refresh or leaving + len(rows) >= self.window:
+            # As much work as an update, and it clears any accumulated drift
+            self._moments = _Moments(self.n_symbols, self.dense)
+            self._moments.add(self._rows, block=self.block, executor=self._executor)
+            self._since_refresh = 0
+            return
+        self._moments.add(rows, removed, block=self.block, executor=self._executor)
+
+    def covariance(self, ddof=1, min_periods=None):
+        """Covariance matrix of the rows in the window (NaN until min_periods rows, default window)"""
+        return self._moments.covariance(ddof, self.window if min_periods is None else min_periods)
+
+    def correlation(self, min_periods=None):
+        """Correlation matrix of the rows in the window (NaN until min_periods rows, default window)"""
+        return self._moments.covariance(1, self.window if min_periods is None else min_periods, correlation=True)
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+
+def rolling_covariance(returns, window, step=1, min_periods=None, correlation=False, refresh=None,
+                       block=BLOCK_SIZE, max_workers=None):
+    """
+    Yield (date, matrix) for every step-th row of returns,
+    where matrix is the covariance (or correlation) of the window ending at date.
+    Pairs with fewer than min_periods (default window) rows in the window are NaN,
+    as with returns.rolling(window).cov()/.corr(). Matrices are arrays in column order.
+    """
+    values, _, index = _prepare(returns)
+    rolling = RollingCovariance(values.shape[1], window, dense=not np.isnan(values).any(), refresh=refresh,
+                                block=block, max_workers=max_workers)
+    try:
+        for stop in range(step - 1, len(values), step):
+            rolling.update(values[max(stop + 1 - step, 0):stop + 1])
+            if correlation:
+                yield index[stop], rolling.correlation(min_periods)
+            else:
+                yield index[stop], rolling.covariance(min_periods=min_periods)
+    finally:
+        rolling.close()
+
+
+def rolling_correlation(returns, window, step=1, min_periods=None, refresh=None, block=BLOCK_SIZE,
+                        max_workers=None):
+    """Yield (date, correlation matrix) of each rolling window; see rolling_covariance"""
+    return rolling_covariance(returns, window, step, min_periods, correlation=True, refresh=refresh,
+                              block=block, max_workers=max_workers)
@@ -24,6 +24,51 @@ class DataExporter {
         
         return pythonData;
     }
+
+    /**
+     * Map a columnar export (manifest + ArrayBuffer) onto typed arrays without copying
+     * Works in Node and in the browser
+     */
+    static fromColumnarBuffer(manifest, arrayBuffer) {
+        const arrayTypes = {
+            float32: Float32Array,
+            float64: Float64Array
+        };
+        const columns = {};
+
+        for (const column of manifest.columns) {
+            const ArrayType = arrayTypes[column.dtype];
+            if (!ArrayType) {
+                throw new Error(`Unsupported column dtype: ${column.dtype}`);
+            }
+            columns[column.name] = new ArrayType(arrayBuffer, column.offset, column.length);
+        }
+
+        return {
+            symbol: manifest.symbol,
+            rows: manifest.rows,
+            columns: columns
+        };
+    }
+
+    /**
+     * Load a columnar export written by columnar_export.py from its JSON manifest
+     */
+    static loadColumnar(manifestPath) {
+        try {
+            const manifest = JSON.parse(fs.readFileSync(manifestPath, 'utf8'));
+            const buffer = fs.readFileSync(path.join(path.dirname(manifestPath), manifest.buffer));
+            // Small Node buffers share a pooled ArrayBuffer at an arbitrary offset,
+            // so slice out an aligned copy only when the views would be misaligned
+            const arrayBuffer = buffer.byteOffset % 8 === 0 && buffer.byteLength === buffer.buffer.byteLength
+                ? buffer.buffer
+                : buffer.buffer.slice(buffer.byteOffset, buffer.byteOffset + buffer.byteLength);
+            return DataExporter.fromColumnarBuffer(manifest, arrayBuffer);
+        } catch (error) {
+            console.error('Error loading columnar data:', error.message);
+            return null;
+        }
+    }
 }
 
 module.exports = DataExporter;
\ No newline at end of file
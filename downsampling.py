@@ -0,0 +1,114 @@
+"""
+Downsampling - Reduce long series to a point budget while keeping their visual shape
+
+LTTB (Largest-Triangle-Three-Buckets) picks the points of a line that best
+preserve its silhouette; min/max bucketing keeps the extremes of OHLC bars
+and histograms so spikes never disappear from a chart.
+"""
+
+import numpy as np
+import pandas as pd
+
+
+def lttb_indices(x, y, n_out):
+    """
+    Indices of the n_out points LTTB keeps from (x, y); first and last are always kept
+    """
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    n = len(y)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+
+    # Interior points are split into n_out - 2 buckets
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    selected = np.empty(n_out, dtype=np.int64)
+    selected[0] = 0
+    selected[-1] = n - 1
+
+    previous = 0
+    for k in range(n_out - 2):
+        start, stop = edges[k], edges[k + 1]
+        next_start, next_stop = edges[k + 1], (edges[k + 2] if k + 2 < len(edges) else n)
+
+        # Third triangle vertex is the average of the next bucket
+        with np.errstate(invalid='ignore'):
+            next_x = x[next_start:next_stop].mean()
+            next_y = np.nanmean(y[next_start:next_stop]) if np.isfinite(y[next_start:next_stop]).any() else np.nan
+
+        area = np.abs((x[previous] - next_x) * (y[start:stop] - y[previous]) -
+                      (x[previous] - x[start:stop]) * (next_y - y[previous]))
+        # Buckets inside an indicator's warm-up are all NaN; keep their first point
+        area = np.where(np.isnan(area), -1.0, area)
+        previous = start + int(area.argmax())
+        selected[k + 1] = previous
+
+    return selected
+
+
+def minmax_indices(y, n_buckets):
+    """
+    Indices of the minimum and maximum of y in each of n_buckets equal buckets, in order
+    """
+    y = np.asarray(y, dtype=float)
+    n = len(y)
+    if 2 * n_buckets >= n:
+        return np.arange(n)
+
+    edges = np.linspace(0, n, n_buckets + 1).astype(np.int64)
+    filled_low = np.where(np.isnan(y), np.inf, y)
+    filled_high = np.where(np.isnan(y), -np.inf, y)
+    picks = []
+    for start, stop in zip(edges[:-1], edges[1:]):
+        picks.append(start + int(filled_low[start:stop].argmin()))
+        picks.append(start + int(filled_high[start:stop].argmax()))
+    return np.unique(picks)
+
+
+def downsample_series(x, y, max_points, method='lttb'):
+    """
+    Downsample one series for plotting, returns (x, y)
+    method is 'lttb' for lines or 'minmax' for histograms/bars
+    """
+    if max_points is None or len(y) <= max_points:
+        return x, y
+    if method == 'minmax':
+        indices = minmax_indices(y, max_points // 2)
+    else:
+        x_numeric = x.asi8 if isinstance(x, pd.DatetimeIndex) else np.asarray(x, dtype=float)
+        indices = lttb_indices(x_numeric, y, max_points)
+    return x[indices], np.asarray(y)[indices]
+
+
+def downsample_frame(data, max_points, column='Close'):
+    """
+    Downsample a whole OHLCV/indicator frame to at most max_points rows
+
+    Rows are chosen by LTTB on column. Each kept row then represents the bucket
+    of rows since the previous kept row: Open is the bucket's first open, High/Low
+    its extremes, Volume its total, and MACD_Histogram the bar with the largest
+    magnitude. Other columns take the kept row's value.
+    """
+    if max_points is None or len(data) <= max_points:
+        return data
+
+    x = data.index.asi8 if isinstance(data.index, pd.DatetimeIndex) else np.arange(len(data))
+    selected = lttb_indices(x, data[column].to_numpy(dtype=float), max_points)
+    starts = np.r_[0, selected[:-1] + 1]
+
+    result = data.iloc[selected].copy()
+    for name, reducer in (('High', np.fmax), ('Low', np.fmin), ('Volume', np.add),
+                          ('high', np.fmax), ('low', np.fmin), ('volume', np.add)):
+        if name in data.columns:
+            result[name] = reducer.reduceat(data[name].to_numpy(), starts)
+    for name in ('Open', 'open'):
+        if name in data.columns:
+            result[name] = data[name].to_numpy()[starts]
+
+    if 'MACD_Histogram' in data.columns:
+        histogram = data['MACD_Histogram'].to_numpy(dtype=float)
+        highs = np.fmax.reduceat(histogram, starts)
+        lows = np.fmin.reduceat(histogram, starts)
+        result['MACD_Histogram'] = np.where(np.abs(lows) > np.abs(highs), lows, highs)
+
+    return result
@@ -0,0 +1,226 @@
+"""
+Indicator Pipeline - Plans a set of indicators so shared intermediates are computed once
+
+Indicators are decomposed into intermediate nodes (price diffs, gains and
+losses, rolling sums, rolling sums of squares, EMAs). Requests for the same
+node from different indicators resolve to a single computation, and the
+pipeline reports what it computed and what it reused.
+"""
+
+import pandas as pd
+
+MULTI_OUTPUT_SUFFIXES = {
+    'MACD': ('', '_Signal', '_Histogram'),
+    'Bollinger_Bands': ('_Upper', '_Middle', '_Lower'),
+}
+
+DEFAULT_PARAMS = {
+    'SMA': {'window': 20},
+    'EMA': {'window': 20, 'adjust': False},
+    'RSI': {'window': 14},
+    'MACD': {'fast': 12, 'slow': 26, 'signal': 9, 'adjust': False},
+    'Bollinger_Bands': {'window': 20, 'num_std': 2},
+}
+
+
+class IndicatorPipeline:
+    def __init__(self):
+        self.requests = []
+        self.stats = {}
+
+    def add(self, indicator, name=None, **params):
+        """
+        Request an indicator. name is the output column (or a tuple of columns for
+        MACD and Bollinger_Bands, where None drops that output); by default it is
+        derived from the parameters, e.g. SMA_50 or BB_20_Upper.
+        """
+        if indicator not in DEFAULT_PARAMS:
+            raise ValueError(f"Unknown indicator: {indicator}")
+        unknown = set(params) - set(DEFAULT_PARAMS[indicator])
+        if unknown:
+            raise ValueError(f"Unknown parameters for {indicator}: {sorted(unknown)}")
+
+        params = {**DEFAULT_PARAMS[indicator], **params}
+        self.requests.append((indicator, self._output_names(indicator, name, params), params))
+        return self
+
+    def plan(self):
+        """
+        Return the ordered list of distinct intermediate nodes needed for the requests
+        """
+        order = []
+        for indicator, _, params in self.requests:
+            for node in self._dependencies(indicator, params):
+                self._visit(node, order)
+        return order
+
+    def run(self, data, column='Close'):
+        """
+        Compute every requested indicator on data[column]
+        Returns a dict mapping output column name to Series and fills self.stats
+        """
+        close = data[column]
+        cache = {}
+        requested = 0
+        for node in self.plan():
+            cache[node] = self._compute(node, close, cache)
+
+        results = {}
+        for indicator, names, params in self.requests:
+            requested += len(self._dependencies(indicator, params, recursive=True))
+            values = self._finish(indicator, params, cache)
+            for output_name, value in zip(names, values):
+                if output_name is not None:
+                    results[output_name] = value
+
+        self.stats = {
+            'indicators': len(self.requests),
+            'nodes_requested': requested,
+            'nodes_computed': len(cache),
+            'nodes_reused': requested - len(cache),
+            'computed': [self._describe(node) for node in cache],
+        }
+        return results
+
+    def summary(self):
+        """Return a one-line description of the last run's savings"""
+        if not self.stats:
+            return "Pipeline has not been run"
+        return (f"{self.stats['indicators']} indicators: computed {self.stats['nodes_computed']} "
+                f"intermediates, reused {self.stats['nodes_reused']}")
+
+    @staticmethod
+    def _output_names(indicator, name, params):
+        if isinstance(name, (tuple, list)):
+            if len(name) != len(MULTI_OUTPUT_SUFFIXES.get(indicator, ('',))):
+                raise ValueError(f"Wrong number of output names for {indicator}")
+            return tuple(name)
+
+        if name is None:
+            if indicator == 'MACD':
+                name = f"MACD_{params['fast']}_{params['slow']}_{params['signal']}"
+            elif indicator == 'Bollinger_Bands':
+                name = f"BB_{params['window']}"
+            else:
+                name = f"{indicator}_{params['window']}"
+
+        suffixes = MULTI_OUTPUT_SUFFIXES.get(indicator, ('',))
+        return tuple(name + suffix for suffix in suffixes)
+
+    @staticmethod
+    def _dependencies(indicator, params, recursive=False):
+        """Top-level nodes an indicator reads (plus everything below them when recursive)"""
+        if indicator == 'SMA':
+            nodes = [('rolling_sum', ('centered',), params['window'])]
+        elif indicator == 'EMA':
+            nodes = [('ewm', ('close',), params['window'], params['adjust'])]
+        elif indicator == 'RSI':
+            nodes = [('rolling_sum', ('gain',), params['window']),
+                     ('rolling_sum', ('loss',), params['window'])]
+        elif indicator == 'MACD':
+            macd = ('macd', params['fast'], params['slow'], params['adjust'])
+            nodes = [macd, ('ewm', macd, params['signal'], params['adjust'])]
+        else:
+            nodes = [('rolling_sum', ('centered',), params['window']),
+                     ('rolling_sumsq', ('centered',), params['window'])]
+
+        if not recursive:
+            return nodes
+        expanded = []
+        for node in nodes:
+            IndicatorPipeline._visit(node, expanded)
+        return expanded
+
+    @staticmethod
+    def _inputs(node):
+        kind = node[0]
+        if kind in ('close',):
+            return []
+        if kind in ('center', 'diff'):
+            return [('close',)]
+        if kind == 'centered':
+            return [('close',), ('center',)]
+        if kind in ('gain', 'loss'):
+            return [('diff',)]
+        if kind == 'macd':
+            return [('ewm', ('close',), node[1], node[3]), ('ewm', ('close',), node[2], node[3])]
+        return [node[1]]
+
+    @staticmethod
+    def _visit(node, order):
+        if node in order:
+            return
+        for dependency in IndicatorPipeline._inputs(node):
+            IndicatorPipeline._visit(dependency, order)
+        order.append(node)
+
+    @staticmethod
+    def _compute(node, close, cache):
+        kind = node[0]
+        if kind == 'close':
+            return close
+        if kind == 'center':
+            # Rolling sums of squares are far better conditioned around the mean price
+            center = close.mean()
+            return 0.0 if pd.isna(center) else center
+        if kind == 'centered':
+            return close - cache[('center',)]
+        if kind == 'diff':
+            return cache[('close',)].diff()
+        if kind == 'gain':
+            delta = cache[('diff',)]
+            return delta.where(delta > 0, 0)
+        if kind == 'loss':
+            delta = cache[('diff',)]
+            return -delta.where(delta < 0, 0)
+        if kind == 'macd':
+            fast, slow = IndicatorPipeline._inputs(node)
+            return cache[fast] - cache[slow]
+        if kind == 'rolling_sum':
+            return cache[node[1]].rolling(window=node[2]).sum()
+        if kind == 'rolling_sumsq':
+            return (cache[node[1]] ** 2).rolling(window=node[2]).sum()
+        if kind == 'ewm':
+            return cache[node[1]].ewm(span=node[2], adjust=node[3]).mean()
+        raise ValueError(f"Unknown node: {node}")
+
+    @staticmethod
+    def _finish(indicator, params, cache):
+        """Combine cached intermediates into the indicator's output series"""
+        if indicator == 'SMA':
+            return (IndicatorPipeline._mean(cache, params['window']),)
+        if indicator == 'EMA':
+            return (cache[('ewm', ('close',), params['window'], params['adjust'])],)
+        if indicator == 'RSI':
+            # The 1/window factors of the two rolling means cancel
+            rs = (cache[('rolling_sum', ('gain',), params['window'])] /
+                  cache[('rolling_sum', ('loss',), params['window'])])
+            return (100 - (100 / (1 + rs)),)
+        if indicator == 'MACD':
+            macd_node = ('macd', params['fast'], params['slow'], params['adjust'])
+            macd = cache[macd_node]
+            signal = cache[('ewm', macd_node, params['signal'], params['adjust'])]
+            return macd, signal, macd - signal
+
+        window = params['window']
+        middle = IndicatorPipeline._mean(cache, window)
+        total = cache[('rolling_sum', ('centered',), window)]
+        squares = cache[('rolling_sumsq', ('centered',), window)]
+        variance = ((squares - total * total / window) / (window - 1)).clip(lower=0)
+        std = variance ** 0.5
+        return middle + std * params['num_std'], middle, middle - std * params['num_std']
+
+    @staticmethod
+    def _mean(cache, window):
+        return cache[('center',)] + cache[('rolling_sum', ('centered',), window)] / window
+
+    @staticmethod
+    def _describe(node):
+        kind = node[0]
+        if kind in ('close', 'center', 'centered', 'diff', 'gain', 'loss'):
+            return kind
+        if kind == 'macd':
+            return f"macd({node[1]},{node[2]})"
+        if kind == 'ewm':
+            return f"ewm({IndicatorPipeline._describe(node[1])},{node[2]})"
+        return f"{kind}({IndicatorPipeline._describe(node[1])},{node[2]})"
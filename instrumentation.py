@@ -0,0 +1,194 @@
+"""
+Instrumentation - Per-stage timing and memory records for the fetch/indicator/chart pipeline
+
+Library code reports into the active profiler with
+
+    with stage('fetch_data', symbol=symbol) as record:
+        ...
+        record['rows'] = len(data)
+
+The default profiler is disabled and costs almost nothing; main.py --profile
+switches on a real one and prints or saves what it collected.
+"""
+
+import json
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+class Profiler:
+    def __init__(self, enabled=True, track_memory=True):
+        self.enabled = enabled
+        # tracemalloc gives per-stage peaks but slows allocation-heavy code noticeably
+        self.track_memory = track_memory and enabled
+        self.records = []
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        # Stages currently open on any thread, to detect overlapping memory measurements
+        self._open = []
+        if self.track_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    @contextmanager
+    def stage(self, name, symbol=None, rows=None, nbytes=None):
+        """
+        Time a stage. The yielded dict can be updated with 'rows' and 'bytes' before it closes.
+        CPU time is that of the calling thread, so concurrent stages don't count each other.
+        tracemalloc's peak is process-wide, so a stage that overlaps a stage on another
+        thread gets peak_memory None: its allocations can't be told apart.
+        """
+        record = {'stage': name, 'symbol': symbol, 'rows': rows, 'bytes': nbytes}
+        if not self.enabled:
+            yield record
+            return
+
+        stack = self._stack()
+        if self.track_memory:
+            record['_thread'] = threading.get_ident()
+            record['_overlapped'] = False
+            with self._lock:
+                others = [r for r in self._open if r['_thread'] != record['_thread']]
+                if others:
+                    record['_overlapped'] = True
+                    for other in others:
+                        other['_overlapped'] = True
+                self._open.append(record)
+            # The parent's peak so far is folded in before the counter is reset for this stage
+            if stack:
+                stack[-1]['_child_peak'] = max(stack[-1]['_child_peak'], tracemalloc.get_traced_memory()[1])
+            tracemalloc.reset_peak()
+            start_memory = tracemalloc.get_traced_memory()[0]
+        record['_child_peak'] = 0
+        stack.append(record)
+
+        wall_start = time.perf_counter()
+        cpu_start = time.thread_time()
+        try:
+            yield record
+        finally:
+            record['wall_time'] = time.perf_counter() - wall_start
+            record['cpu_time'] = time.thread_time() - cpu_start
+            stack.pop()
+            child_peak = record.pop('_child_peak')
+            if self.track_memory:
+                peak = max(tracemalloc.get_traced_memory()[1], child_peak)
+                if stack:
+                    stack[-1]['_child_peak'] = max(stack[-1]['_child_peak'], peak)
+                with self._lock:
+                    self._open.remove(record)
+                    overlapped = record.pop('_overlapped')
+                    # A child sharing the process with another thread taints its parent too
+                    if overlapped and stack:
+                        stack[-1]['_overlapped'] = True
+                del record['_thread']
+                record['peak_memory'] = None if overlapped else max(peak - start_memory, 0)
+            record['depth'] = len(stack)
+            with self._lock:
+                self.records.append(record)
+
+    def add_records(self, records):
+        """Add records collected by another profiler, e.g. one in a worker process"""
+        with self._lock:
+            self.records.extend(records)
+
+    def _stack(self):
+        if not hasattr(self._local, 'stack'):
+            self._local.stack = []
+        return self._local.stack
+
+    def totals(self):
+        """
+        Aggregate records by stage: calls, wall/CPU seconds, max peak memory, rows, bytes
+        peak_memory only covers calls that didn't overlap another thread's stage
+        (None if none did); 'unmeasured' counts the calls left out.
+        """
+        totals = {}
+        for record in self.records:
+            total = totals.setdefault(record['stage'], {
+                'calls': 0, 'wall_time': 0.0, 'cpu_time': 0.0, 'peak_memory': None, 'unmeasured': 0,
+                'rows': 0, 'bytes': 0,
+            })
+            total['calls'] += 1
+            total['wall_time'] += record['wall_time']
+            total['cpu_time'] += record['cpu_time']
+            if record.get('peak_memory') is not None:
+                total['peak_memory'] = max(total['peak_memory'] or 0, record['peak_memory'])
+            elif self.track_memory:
+                total['unmeasured'] += 1
+            total['rows'] += record['rows'] or 0
+            total['bytes'] += record['bytes'] or 0
+        return totals
+
+    def summary(self):
+        """
+        Return a printable table of per-stage totals, slowest first
+        """
+        lines = [f"{'stage':<32}{'calls':>6}{'wall s':>10}{'cpu s':>10}{'peak MB':>10}{'rows':>10}{'KB in':>10}"]
+        totals = sorted(self.totals().items(), key=lambda item: item[1]['wall_time'], reverse=True)
+        for name, total in totals:
+            peak = '-' if total['peak_memory'] is None else f"{total['peak_memory'] / 1e6:.1f}"
+            if total['unmeasured']:
+                peak += '*'
+            lines.append(f"{name:<32}{total['calls']:>6}{total['wall_time']:>10.3f}{total['cpu_time']:>10.3f}"
+                         f"{peak:>10}{total['rows']:>10}{total['bytes'] / 1e3:>10.1f}")
+        if any(total['unmeasured'] for _, total in totals):
+            lines.append("* some calls overlapped stages on other threads; their memory is not included")
+        rss = max_rss_bytes()
+        if rss is not None:
+            lines.append(f"Process max RSS: {rss / 1e6:.1f} MB")
+        return "\n".join(lines)
+
+    def to_dict(self):
+        return {'records': self.records, 'totals': self.totals(), 'max_rss': max_rss_bytes()}
+
+    def save(self, filename):
+        """
+        Write all records and totals as JSON
+        """
+        with open(filename, 'w') as f:
+            json.dump(self.to_dict(), f, indent=2)
+
+
+def max_rss_bytes():
+    """Peak resident set size of this process, or None where it isn't available"""
+    if resource is None:
+        return None
+    # ru_maxrss is kilobytes on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+_profiler = Profiler(enabled=False)
+
+
+def get_profiler():
+    return _profiler
+
+
+def set_profiler(profiler):
+    """
+    Install profiler as the one library code reports into; returns the previous one
+    """
+    global _profiler
+    previous, _profiler = _profiler, profiler
+    return previous
+
+
+def enable_profiling(track_memory=True):
+    """
+    Install and return a fresh enabled profiler
+    """
+    profiler = Profiler(enabled=True, track_memory=track_memory)
+    set_profiler(profiler)
+    return profiler
+
+
+def stage(name, symbol=None, rows=None, nbytes=None):
+    """Report a stage into the active profiler"""
+    return _profiler.stage(name, symbol=symbol, rows=rows, nbytes=nbytes)
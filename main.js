@@ -3,6 +3,18 @@ const StockDataFetcher = require('./stock_data_fetcher');
 const DataExporter = require('./data_exporter');
 
 async function main() {
+    // node main.js --columnar stock_data_columnar.json loads a binary export instead of fetching
+    const columnarIndex = process.argv.indexOf('--columnar');
+    if (columnarIndex !== -1) {
+        const fetcher = new StockDataFetcher();
+        const columnar = fetcher.loadColumnarData(process.argv[columnarIndex + 1]);
+        if (columnar) {
+            console.log(`Loaded ${columnar.rows} rows for ${columnar.symbol}`);
+            console.log(`Columns: ${Object.keys(columnar.columns).join(', ')}`);
+        }
+        return;
+    }
+
     // Replace with your Alpha Vantage API key
     const API_KEY = 'YOUR_ALPHA_VANTAGE_API_KEY';
     
@@ -1,18 +1,36 @@
-from stock_data import StockDataFetcher
-from stock_visualizer import StockVisualizer
 import argparse
 
-def main():
-    parser = argparse.ArgumentParser(description='Stock Data Analysis Tool')
-    parser.add_argument('symbol', type=str, help='Stock symbol (e.g., AAPL, TSLA, GOOGL)')
-    parser.add_argument('--period', type=str, default='1y', 
-                       help='Time period: 1d, 5d, 1mo, 3mo, 6mo, 1y, 2y, 5y, 10y, ytd, max')
-    parser.add_argument('--simple', action='store_true', 
-                       help='Show simple chart only (no indicators)')
-    parser.add_argument('--save', type=str, 
-                       help='Save chart to filename (e.g., --save my_chart.png)')
+# The data and plotting stacks are imported by the code paths that need them,
+# so --help and argument errors return without loading pandas or matplotlib
+
+def run_watchlist(args):
+    """
+    Analyze every symbol in the watchlist file and write one summary table
+    """
+    from watchlist import WatchlistPipeline, read_watchlist
     
-    args = parser.parse_args()
+    symbols = read_watchlist(args.watchlist)
+    print(f"Analyzing {len(symbols)} symbols from {args.watchlist}...")
+    
+    def progress(done, total, row):
+        if row.get('error'):
+            print(f"  {row['error']}")
+        if done % 100 == 0 or done == total:
+            print(f"  {done}/{total} done")
+    
+    pipeline = WatchlistPipeline(period=args.period, io_workers=args.io_workers, cpu_workers=args.cpu_workers,
+                                 chart_dir=args.charts, max_points=args.max_points or None)
+    rows = pipeline.run(symbols, summary_path=args.summary, progress=progress)
+    
+    failed = sum(1 for row in rows if row.get('error'))
+    print(f"Summary for {len(rows) - failed} symbols saved to {args.summary} ({failed} failed)")
+
+def analyze_symbol(args):
+    """
+    Fetch, analyze and chart a single symbol
+    """
+    from stock_data import StockDataFetcher
+    from stock_visualizer import StockVisualizer
     
     # Fetch and process data
     print(f"Fetching data for {args.symbol}...")
@@ -36,12 +54,19 @@ def main():
         print(f"Date range: {data.index[0].strftime('%Y-%m-%d')} to {data.index[-1].strftime('%Y-%m-%d')}")
         
         # Visualize data
-        visualizer = StockVisualizer()
+        visualizer = StockVisualizer(cache_dir=args.chart_cache)
+        max_points = args.max_points or None
+        
+        if args.save and args.chart_cache and not args.simple:
+            # An identical chart rendered earlier is copied from the cache instead of redrawn
+            visualizer.render_chart(data, args.symbol, args.save, max_points=max_points)
+            print(f"Chart saved as {args.save}")
+            return
         
         if args.simple:
-            fig = visualizer.create_simple_chart(data, args.symbol)
+            fig = visualizer.create_simple_chart(data, args.symbol, max_points=max_points)
         else:
-            fig, axs = visualizer.create_price_chart(data, args.symbol)
+            fig, axs = visualizer.create_price_chart(data, args.symbol, max_points=max_points)
         
         # Save or show chart
         if args.save:
@@ -52,5 +77,54 @@ def main():
     else:
         print("Failed to fetch data. Please check the stock symbol and try again.")
 
+def main():
+    parser = argparse.ArgumentParser(description='Stock Data Analysis Tool')
+    parser.add_argument('symbol', type=str, nargs='?', help='Stock symbol (e.g., AAPL, TSLA, GOOGL)')
+    parser.add_argument('--period', type=str, default='1y', 
+                       help='Time period: 1d, 5d, 1mo, 3mo, 6mo, 1y, 2y, 5y, 10y, ytd, max')
+    parser.add_argument('--simple', action='store_true', 
+                       help='Show simple chart only (no indicators)')
+    parser.add_argument('--save', type=str, 
+                       help='Save chart to filename (e.g., --save my_chart.png)')
+    parser.add_argument('--chart-cache', type=str, metavar='DIR',
+                       help='With --save, reuse charts already rendered for identical data from DIR')
+    parser.add_argument('--max-points', type=int, default=0,
+                       help='Downsample longer histories to at most this many points per series (default: draw all)')
+    parser.add_argument('--profile', nargs='?', const='-', metavar='FILE',
+                       help='Report per-stage time and memory; prints a table, or writes JSON to FILE')
+    parser.add_argument('--watchlist', type=str, metavar='FILE',
+                       help='Analyze every symbol listed in FILE instead of a single symbol')
+    parser.add_argument('--summary', type=str, default='watchlist_summary.csv',
+                       help='Summary table written in watchlist mode (default: watchlist_summary.csv)')
+    parser.add_argument('--charts', type=str, metavar='DIR',
+                       help='In watchlist mode, also save a chart per symbol into DIR')
+    parser.add_argument('--io-workers', type=int, default=16,
+                       help='Concurrent downloads in watchlist mode (default: 16)')
+    parser.add_argument('--cpu-workers', type=int,
+                       help='Indicator/chart processes in watchlist mode (default: one per core, 0 = none)')
+    
+    args = parser.parse_args()
+    if not args.symbol and not args.watchlist:
+        parser.error('a symbol or --watchlist FILE is required')
+    if args.chart_cache and (not args.save or args.simple or args.watchlist):
+        parser.error('--chart-cache only applies to a full chart saved with --save')
+    if args.profile:
+        from instrumentation import enable_profiling
+        profiler = enable_profiling()
+    else:
+        profiler = None
+    
+    if args.watchlist:
+        run_watchlist(args)
+    else:
+        analyze_symbol(args)
+    
+    if profiler is not None:
+        if args.profile == '-':
+            print("\n" + profiler.summary())
+        else:
+            profiler.save(args.profile)
+            print(f"Profile saved to {args.profile}")
+
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,47 @@
+"""
+Memory Utilities - Compact dtypes for OHLCV/indicator frames
+
+Prices and indicators rarely need more than float32's ~7 significant digits,
+and volumes are whole numbers. Holding thousands of symbols of minute bars
+at half the width is what lets them fit in memory at once.
+"""
+
+import numpy as np
+import pandas as pd
+
+VOLUME_COLUMNS = ('Volume', 'volume')
+
+
+def compact_dtypes(data, float_dtype='float32', inplace=False):
+    """
+    Downcast float columns to float_dtype and volume to the smallest integer type that holds it
+    Volume stays float if it has missing values. Returns the (possibly new) frame.
+    """
+    if not inplace:
+        # Shallow: columns are replaced below, never written into, so the caller's frame is untouched
+        data = data.copy(deep=False)
+
+    for column in data.columns:
+        values = data[column]
+        if column in VOLUME_COLUMNS and values.dtype.kind in 'iuf':
+            data[column] = compact_volume(values)
+        elif values.dtype.kind == 'f' and values.dtype != float_dtype:
+            data[column] = values.astype(float_dtype)
+    return data
+
+
+def compact_volume(values):
+    """Volume as the narrowest unsigned/signed integer dtype, or unchanged if it has NaN or fractions"""
+    array = values.to_numpy() if isinstance(values, pd.Series) else np.asarray(values)
+    if array.dtype.kind == 'f':
+        if np.isnan(array).any() or not np.array_equal(array, np.floor(array)):
+            return values
+    if len(array) == 0:
+        return values
+    target = np.uint32 if array.min() >= 0 and array.max() <= np.iinfo(np.uint32).max else np.int64
+    return values.astype(target)
+
+
+def frame_nbytes(data):
+    """Bytes held by the frame's columns and index"""
+    return int(data.memory_usage(index=True, deep=False).sum())
@@ -0,0 +1,281 @@
+"""
+OHLCV Store - Persistent local columnar store for historical bars
+
+Each (symbol, interval) pair lives in its own directory with one ``.npy``
+file per column and a small JSON manifest, so the fetchers can serve
+history from disk and only ask the network for bars newer than the last
+one stored. Every write goes into a fresh generation directory and is
+committed by atomically replacing the manifest that points at it, so a
+reader never sees columns from one write with the manifest of another.
+"""
+
+import os
+import json
+import shutil
+import tempfile
+import threading
+import numpy as np
+import pandas as pd
+
+PERIOD_OFFSETS = {
+    "1d": pd.DateOffset(days=1),
+    "5d": pd.DateOffset(days=5),
+    "1mo": pd.DateOffset(months=1),
+    "3mo": pd.DateOffset(months=3),
+    "6mo": pd.DateOffset(months=6),
+    "1y": pd.DateOffset(years=1),
+    "2y": pd.DateOffset(years=2),
+    "5y": pd.DateOffset(years=5),
+    "10y": pd.DateOffset(years=10),
+}
+
+
+def period_start(period, now=None):
+    """
+    Convert a yfinance-style period string into the first timestamp it covers.
+    Returns None for "max" (the full history).
+    """
+    now = pd.Timestamp.now(tz="UTC") if now is None else pd.Timestamp(now)
+    if period == "max":
+        return None
+    if period == "ytd":
+        return now.normalize().replace(month=1, day=1)
+    if period not in PERIOD_OFFSETS:
+        raise ValueError(f"Unsupported period: {period}")
+    return (now - PERIOD_OFFSETS[period]).normalize()
+
+
+class OHLCVStore:
+    # (root, symbol, interval) -> lock, shared by every store on the same root in this process
+    _locks = {}
+    _locks_guard = threading.Lock()
+
+    def __init__(self, root="ohlcv_store"):
+        self.root = root
+
+    def _lock(self, symbol, interval):
+        key = (os.path.abspath(self.root), symbol.upper(), interval)
+        with self._locks_guard:
+            return self._locks.setdefault(key, threading.RLock())
+
+    def _path(self, symbol, interval):
+        return os.path.join(self.root, symbol.upper(), interval)
+
+    def _read_manifest(self, symbol, interval):
+        path = os.path.join(self._path(symbol, interval), "manifest.json")
+        if not os.path.exists(path):
+            return None
+        with open(path) as f:
+            return json.load(f)
+
+    def has(self, symbol, interval):
+        """
+        Check whether any bars are stored for symbol/interval
+        """
+        return self._read_manifest(symbol, interval) is not None
+
+    def load(self, symbol, interval):
+        """
+        Load stored bars as a DataFrame indexed by timestamp, or None on a miss
+        """
+        with self._lock(symbol, interval):
+            for attempt in range(3):
+                manifest = self._read_manifest(symbol, interval)
+                if manifest is None:
+                    return None
+                try:
+                    return self._load_generation(symbol, interval, manifest)
+                except FileNotFoundError:
+                    # Another process committed a newer generation and removed this one
+                    if attempt == 2:
+                        raise
+
+    def _load_generation(self, symbol, interval, manifest):
+        path = self._generation_path(symbol, interval, manifest)
+        index = pd.DatetimeIndex(np.load(os.path.join(path, "index.npy")).astype("datetime64[ns]"),
+                                 name=manifest["index_name"])
+        index = index.tz_localize("UTC")
+        if manifest["tz"] is None:
+            index = index.tz_localize(None)
+        else:
+            index = index.tz_convert(manifest["tz"])
+
+        columns = {name: np.load(os.path.join(path, f"{i}.npy"))
+                   for i, name in enumerate(manifest["columns"])}
+        return pd.DataFrame(columns, index=index)
+
+    def last_timestamp(self, symbol, interval):
+        """
+        Return the timestamp of the newest stored bar in the stored timezone
+        (naive when the bars were stored naive), or None on a miss
+        """
+        manifest = self._read_manifest(symbol, interval)
+        if manifest is None:
+            return None
+        last = pd.Timestamp(manifest["last"])
+        if manifest["tz"] is None:
+            return last.tz_localize(None)
+        return last.tz_convert(manifest["tz"])
+
+    def covers(self, symbol, interval, start):
+        """
+        Check whether the stored history reaches back to start (None means the full history)
+        """
+        manifest = self._read_manifest(symbol, interval)
+        if manifest is None:
+            return False
+        covered_from = manifest["covered_from"]
+        if covered_from is None:
+            return True
+        if start is None:
+            return False
+        return pd.Timestamp(covered_from) <= _to_utc(pd.Timestamp(start))
+
+    def write(self, symbol, interval, data, covered_from=None):
+        """
+        Replace the stored bars for symbol/interval with data.
+        covered_from records how far back the history was requested (None for all of it).
+        """
+        if not isinstance(data.index, pd.DatetimeIndex):
+            raise ValueError("OHLCV data must be indexed by timestamp")
+        if data.empty:
+            raise ValueError("Refusing to store an empty frame")
+
+        with self._lock(symbol, interval):
+            self._write(symbol, interval, data, covered_from)
+
+    def _write(self, symbol, interval, data, covered_from):
+        path = self._path(symbol, interval)
+        os.makedirs(path, exist_ok=True)
+        data = data.sort_index()
+        generation = tempfile.mkdtemp(prefix="gen-", dir=path)
+
+        tz = str(data.index.tz) if data.index.tz is not None else None
+        utc_index = data.index.tz_convert("UTC") if tz else data.index
+        stamps = utc_index.as_unit("ns").asi8 if hasattr(utc_index, "as_unit") else utc_index.asi8
+
+        try:
+            np.save(os.path.join(generation, "index.npy"), stamps)
+            for i, name in enumerate(data.columns):
+                values = data[name].to_numpy()
+                if values.dtype.kind not in "biuf":
+                    raise ValueError(f"Column {name!r} is not numeric and cannot be stored")
+                np.save(os.path.join(generation, f"{i}.npy"), values)
+        except BaseException:
+            shutil.rmtree(generation, ignore_errors=True)
+            raise
+
+        # Replacing the manifest is the only commit point: until then readers keep
+        # using the previous generation, and a crash leaves it untouched
+        previous = self._read_manifest(symbol, interval)
+        manifest = {
+            "generation": os.path.basename(generation),
+            "symbol": symbol.upper(),
+            "interval": interval,
+            "columns": [str(c) for c in data.columns],
+            "index_name": data.index.name,
+            "tz": tz,
+            "rows": len(data),
+            "first": str(_to_utc(data.index[0])),
+            "last": str(_to_utc(data.index[-1])),
+            "covered_from": None if covered_from is None else str(_to_utc(pd.Timestamp(covered_from))),
+        }
+        fd, tmp = tempfile.mkstemp(prefix="manifest-", suffix=".tmp", dir=path)
+        with os.fdopen(fd, "w") as f:
+            json.dump(manifest, f, indent=2)
+        os.replace(tmp, os.path.join(path, "manifest.json"))
+
+        if previous is not None:
+            if previous.get("generation"):
+                shutil.rmtree(os.path.join(path, previous["generation"]), ignore_errors=True)
+            else:
+                for filename in ["index.npy"] + [f"{i}.npy" for i in range(len(previous["columns"]))]:
+                    if os.path.exists(os.path.join(path, filename)):
+                        os.remove(os.path.join(path, filename))
+
+    def _generation_path(self, symbol, interval, manifest):
+        # Stores written before generations existed keep their columns next to the manifest
+        return os.path.join(self._path(symbol, interval), manifest.get("generation") or "")
+
+    def append(self, symbol, interval, data):
+        """
+        Append newer bars to the store. Stored bars at or after the first new
+        timestamp are replaced, so a refreshed partial bar overwrites the old one.
+        Returns the merged frame.
+        """
+        with self._lock(symbol, interval):
+            return self._append(symbol, interval, data)
+
+    def _append(self, symbol, interval, data):
+        stored = self.load(symbol, interval)
+        if stored is None:
+            raise KeyError(f"No stored data for {symbol} ({interval})")
+        if data is None or data.empty:
+            return stored
+
+        data = data.sort_index()
+        if data.index.tz is None and stored.index.tz is not None:
+            data = data.tz_localize(stored.index.tz)
+        elif data.index.tz is not None and stored.index.tz is not None:
+            data = data.tz_convert(stored.index.tz)
+
+        merged = pd.concat([stored[stored.index < data.index[0]],
+                            data.reindex(columns=stored.columns)])
+        manifest = self._read_manifest(symbol, interval)
+        self.write(symbol, interval, merged, covered_from=manifest["covered_from"])
+        return merged
+
+    def sync(self, symbol, interval, fetch_full, fetch_since, start=None, offline=False):
+        """
+        Return bars for symbol/interval from start onwards, going to the network only when needed.
+
+        On a hit only the tail after the last stored bar is requested via
+        fetch_since(last_timestamp); on a miss (or when the stored history does not
+        reach back to start) fetch_full() downloads everything. With offline=True,
+        or when the tail request fails, the stored bars are served as they are.
+        Concurrent syncs of the same symbol/interval run one after the other, so the
+        second one only asks for what the first did not already store.
+        """
+        with self._lock(symbol, interval):
+            return self._sync(symbol, interval, fetch_full, fetch_since, start, offline)
+
+    def _sync(self, symbol, interval, fetch_full, fetch_since, start, offline):
+        if self.covers(symbol, interval, start):
+            data = self.load(symbol, interval)
+            if not offline:
+                try:
+                    tail = fetch_since(self.last_timestamp(symbol, interval))
+                    if tail is not None and not tail.empty:
+                        data = self.append(symbol, interval, tail)
+                except Exception as e:
+                    print(f"Serving stored data for {symbol}, refresh failed: {e}")
+            return _slice_from(data, start)
+
+        if offline:
+            data = self.load(symbol, interval)
+            if data is None:
+                raise KeyError(f"No stored data for {symbol} ({interval}) and running offline")
+            return _slice_from(data, start)
+
+        data = fetch_full()
+        if data is None or data.empty:
+            return data
+        self.write(symbol, interval, data, covered_from=start)
+        return _slice_from(data, start)
+
+
+def _to_utc(timestamp):
+    if timestamp.tzinfo is None:
+        return timestamp.tz_localize("UTC")
+    return timestamp.tz_convert("UTC")
+
+
+def _slice_from(data, start):
+    if start is None or data is None:
+        return data
+    start = pd.Timestamp(start)
+    if data.index.tz is None:
+        start = start.tz_localize(None) if start.tzinfo is not None else start
+    else:
+        start = _to_utc(start).tz_convert(data.index.tz)
+    return data[data.index >= start]
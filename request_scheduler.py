@@ -0,0 +1,209 @@
+"""
+Request Scheduler - Quota-aware dispatch of API calls
+
+Calls are queued by priority and released only when every token bucket
+(e.g. per minute and per day) has a token. Identical calls that are already
+queued or running share one Future instead of spending quota twice. When the
+provider still answers with a throttle message, dispatch pauses with
+exponential backoff and the call is retried.
+"""
+
+import heapq
+import itertools
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+
+# Lower values are dispatched first
+INTERACTIVE = 0
+BATCH = 1
+
+
+class ThrottledError(Exception):
+    """Raised by a scheduled call when the provider reports its quota as exhausted"""
+
+    def __init__(self, message, retry=True):
+        super().__init__(message)
+        # False for limits that backing off won't lift, e.g. a daily quota
+        self.retry = retry
+
+
+class TokenBucket:
+    def __init__(self, rate, per, capacity=None, clock=time.monotonic):
+        """rate tokens are added every per seconds, up to capacity (default rate)"""
+        self.rate = rate / per
+        self.capacity = capacity if capacity is not None else rate
+        self.tokens = float(self.capacity)
+        self.clock = clock
+        self.updated = clock()
+
+    def _refill(self):
+        now = self.clock()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self):
+        """Seconds until a token is available (0 if one is available now)"""
+        self._refill()
+        return 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+
+    def take(self):
+        self._refill()
+        self.tokens -= 1
+
+    def drain(self):
+        """Empty the bucket, e.g. after the provider reports it was already over quota"""
+        self._refill()
+        self.tokens = min(self.tokens, 0.0)
+
+
+class RequestScheduler:
+    def __init__(self, per_minute=None, per_day=None, max_workers=4, max_retries=3, backoff=15.0,
+                 max_backoff=120.0, clock=time.monotonic):
+        self.buckets = []
+        if per_minute:
+            self.buckets.append(TokenBucket(per_minute, 60.0, clock=clock))
+        if per_day:
+            self.buckets.append(TokenBucket(per_day, 86400.0, clock=clock))
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.clock = clock
+        self.max_workers = max_workers
+
+        self.stats = {'submitted': 0, 'coalesced': 0, 'dispatched': 0, 'throttled': 0}
+        self._queue = []
+        self._sequence = itertools.count()
+        self._inflight = {}
+        self._paused_until = 0.0
+        self._condition = threading.Condition()
+        self._executor = None
+        self._dispatcher = None
+        self._closed = False
+
+    def submit(self, key, func, priority=INTERACTIVE):
+        """
+        Schedule func() and return a Future for its result
+        A call with the same key that is still queued or running is shared instead of repeated;
+        a higher-priority duplicate moves the queued call forward.
+        """
+        with self._condition:
+            if self._closed:
+                raise RuntimeError("Scheduler is closed")
+            self.stats['submitted'] += 1
+            job = self._inflight.get(key)
+            if job is not None:
+                self.stats['coalesced'] += 1
+                if priority < job['priority'] and not job['running']:
+                    job['priority'] = priority
+                    heapq.heappush(self._queue, (priority, next(self._sequence), job))
+                    self._condition.notify()
+                return job['future']
+
+            job = {'key': key, 'func': func, 'priority': priority, 'future': Future(),
+                   'attempts': 0, 'running': False}
+            self._inflight[key] = job
+            heapq.heappush(self._queue, (priority, next(self._sequence), job))
+            self._start()
+            self._condition.notify()
+            return job['future']
+
+    def call(self, key, func, priority=INTERACTIVE):
+        """Schedule func() and wait for its result"""
+        return self.submit(key, func, priority).result()
+
+    def pending(self):
+        with self._condition:
+            return len(self._inflight)
+
+    def close(self):
+        """Stop dispatching; queued calls fail, running ones finish"""
+        with self._condition:
+            self._closed = True
+            queued = [job for _, _, job in self._queue if not job['running']]
+            self._queue.clear()
+            self._condition.notify_all()
+        for job in queued:
+            if self._inflight.pop(job['key'], None) is job:
+                job['future'].set_exception(RuntimeError("Scheduler closed before the request was sent"))
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+
+    def _start(self):
+        if self._dispatcher is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers)
+            self._dispatcher = threading.Thread(target=self._dispatch_loop, name="request-scheduler", daemon=True)
+            self._dispatcher.start()
+
+    def _next_job(self):
+        """Block until the best queued job may be sent, then take its tokens; None once closed"""
+        with self._condition:
+            while True:
+                if self._closed:
+                    return None
+                # Entries left behind by a priority bump or a finished job are skipped
+                while self._queue and (self._queue[0][2]['running'] or
+                                       self._queue[0][0] != self._queue[0][2]['priority']):
+                    heapq.heappop(self._queue)
+                if not self._queue:
+                    self._condition.wait()
+                    continue
+                delay = max([self._paused_until - self.clock()] + [b.wait_time() for b in self.buckets])
+                if delay > 0:
+                    # Woken early by new submissions; the head of the queue is re-checked
+                    self._condition.wait(delay)
+                    continue
+                _, _, job = heapq.heappop(self._queue)
+                for bucket in self.buckets:
+                    bucket.take()
+                job['running'] = True
+                job['attempts'] += 1
+                self.stats['dispatched'] += 1
+                return job
+
+    def _dispatch_loop(self):
+        while True:
+            job = self._next_job()
+            if job is None:
+                return
+            try:
+                self._executor.submit(self._run, job)
+            except RuntimeError as e:
+                # close() shut the executor down between taking the job and handing it over
+                self._finish(job, exception=e)
+                return
+
+    def _run(self, job):
+        try:
+            result = job['func']()
+        except ThrottledError as e:
+            self._throttled(job, e)
+            return
+        except BaseException as e:
+            self._finish(job, exception=e)
+            return
+        self._finish(job, result=result)
+
+    def _throttled(self, job, error):
+        with self._condition:
+            self.stats['throttled'] += 1
+            # The provider counts differently from us; stop sending until the backoff passes
+            delay = min(self.backoff * 2 ** (job['attempts'] - 1), self.max_backoff)
+            self._paused_until = max(self._paused_until, self.clock() + delay)
+            for bucket in self.buckets:
+                bucket.drain()
+            if error.retry and job['attempts'] <= self.max_retries and not self._closed:
+                job['running'] = False
+                heapq.heappush(self._queue, (job['priority'], next(self._sequence), job))
+                self._condition.notify()
+                return
+        self._finish(job, exception=error)
+
+    def _finish(self, job, result=None, exception=None):
+        with self._condition:
+            if self._inflight.get(job['key']) is job:
+                del self._inflight[job['key']]
+        if exception is not None:
+            job['future'].set_exception(exception)
+        else:
+            job['future'].set_result(result)
@@ -0,0 +1,91 @@
+"""
+Resampling - Derive weekly, monthly and custom-interval OHLCV bars locally
+
+One daily (or intraday) download is enough for every coarser interval:
+bars are aggregated with open=first, high=max, low=min, close=last,
+volume=sum and labelled with the last timestamp that actually traded in
+the bucket, the way Alpha Vantage and yfinance label their weekly bars.
+"""
+
+import pandas as pd
+from pandas.tseries.frequencies import to_offset
+
+
+def _offset_alias(new, old):
+    """pandas 2.2 renamed month/quarter-end aliases (M -> ME); use whichever this version knows"""
+    try:
+        to_offset(new)
+        return new
+    except ValueError:
+        return old
+
+
+# Friendly names and yfinance interval strings that can be built from daily bars
+RULE_ALIASES = {
+    'weekly': 'W-FRI',
+    '1wk': 'W-FRI',
+    'monthly': _offset_alias('ME', 'M'),
+    '1mo': _offset_alias('ME', 'M'),
+    'quarterly': _offset_alias('QE', 'Q'),
+    '3mo': _offset_alias('QE', 'Q'),
+}
+
+# How each OHLCV column combines within a bucket; columns not listed here
+# (e.g. indicators) are dropped, apart from a symbol column which keeps its last value.
+# yfinance reports no split as 0, so splits combine as the product of the non-zero ratios.
+AGGREGATIONS = {
+    'open': 'first',
+    'high': 'max',
+    'low': 'min',
+    'close': 'last',
+    'volume': 'sum',
+    'dividends': 'sum',
+    'capital gains': 'sum',
+    'stock splits': 'split_product',
+}
+
+
+def resample_rule(rule):
+    """Map 'weekly'/'1wk'/'monthly'/'1mo'/'quarterly'/'3mo' to a pandas rule; other rules pass through"""
+    return RULE_ALIASES.get(rule, rule)
+
+
+def is_local_interval(interval):
+    """True for intervals resample_ohlcv builds from daily bars instead of downloading"""
+    return interval in RULE_ALIASES
+
+
+def resample_ohlcv(data, rule):
+    """
+    Aggregate an OHLCV frame with a DatetimeIndex into bars of rule (e.g. 'weekly', '1mo', '2W-FRI', '4h')
+    Works for 'Open'/'open' style column names alike. Buckets without any bar are dropped.
+    Indicator columns are not carried over; recompute them on the result.
+    """
+    if not isinstance(data.index, pd.DatetimeIndex):
+        raise ValueError("Resampling needs a DatetimeIndex")
+    if data.empty:
+        return data.copy()
+
+    aggregations = {}
+    splits = []
+    for column in data.columns:
+        how = AGGREGATIONS.get(str(column).lower())
+        if how == 'split_product':
+            splits.append(column)
+            aggregations[column] = 'prod'
+        elif how is not None:
+            aggregations[column] = how
+        elif column in ('symbol', 'Symbol'):
+            aggregations[column] = 'last'
+
+    if splits:
+        data = data.assign(**{column: data[column].replace(0, 1) for column in splits})
+    resampler = data.resample(resample_rule(rule))
+    bars = resampler.agg(aggregations)
+    for column in splits:
+        bars[column] = bars[column].where(bars[column] != 1, 0.0)
+
+    # Label each bar by its last real timestamp rather than the calendar edge of the bucket
+    last_seen = data.index.to_series().resample(resample_rule(rule)).max()
+    bars.index = pd.DatetimeIndex(last_seen.array, name=data.index.name)
+    return bars[bars.index.notna()]
@@ -0,0 +1,204 @@
+"""
+Screener - Latest indicator values for many symbols, filtered and ranked in one pass
+
+State is held column-wise: one array entry per symbol for every indicator,
+plus a small right-aligned window of recent closes for the rolling ones.
+A screen such as
+
+    screener.screen("rsi < 30 and macd_cross_up", sort_by="rsi")
+
+is a vectorized DataFrame.query over that table. New bars update only the
+symbols they belong to, in O(symbols) array operations, without recomputing
+any history.
+"""
+
+import numpy as np
+import pandas as pd
+
+from batch_indicators import BatchIndicatorEngine, stack_closes
+
+# The longest rolling window (SMA 50) plus one close for the previous bar's change
+WINDOW = 51
+
+EMA_SPANS = {'ema_20': 20, 'ema_12': 12, 'ema_26': 26}
+SIGNAL_SPAN = 9
+
+COLUMNS = ['date', 'close', 'change_pct', 'volume', 'sma_20', 'sma_50', 'ema_20', 'rsi',
+           'macd', 'macd_signal', 'macd_histogram', 'macd_cross_up', 'macd_cross_down',
+           'bb_upper', 'bb_lower', 'bars']
+
+
+def _last_valid(values, lengths, offset=0):
+    """values[row, lengths[row] - 1 - offset] for each row, NaN where that bar doesn't exist"""
+    positions = lengths - 1 - offset
+    result = np.full(len(lengths), np.nan)
+    ok = positions >= 0
+    result[ok] = values[np.flatnonzero(ok), positions[ok]]
+    return result
+
+
+class Screener:
+    def __init__(self, symbols=()):
+        self.symbols = []
+        self._rows = {}
+        self._state = {}
+        self._window = np.empty((0, WINDOW))
+        self._table = None
+        self._grow(symbols)
+
+    @classmethod
+    def from_frames(cls, frames, column='Close'):
+        """
+        Build the screener from full OHLCV histories ({symbol: DataFrame})
+        EMA-based state is seeded from the whole history so later updates match a full recompute
+        """
+        screener = cls(frames.keys())
+        if not frames:
+            return screener
+        symbols, closes = stack_closes(frames, column)
+        lengths = np.array([len(frames[symbol]) for symbol in symbols])
+        rows = np.arange(len(symbols))
+
+        engine = BatchIndicatorEngine()
+        state = screener._state
+        state['ema_20'] = _last_valid(engine.calculate_ema(closes, 20), lengths)
+        state['ema_12'] = _last_valid(engine.calculate_ema(closes, 12), lengths)
+        state['ema_26'] = _last_valid(engine.calculate_ema(closes, 26), lengths)
+        macd, signal, histogram = engine.calculate_macd(closes)
+        state['macd_signal'] = _last_valid(signal, lengths)
+        state['previous_histogram'] = _last_valid(histogram, lengths, offset=1)
+        state['bars'] = lengths.astype(np.int64)
+
+        # Right-align the last WINDOW closes of every symbol
+        for row, symbol in enumerate(symbols):
+            tail = closes[row, max(0, lengths[row] - WINDOW):lengths[row]]
+            screener._window[row, WINDOW - len(tail):] = tail
+
+        for row, symbol in enumerate(symbols):
+            data = frames[symbol]
+            if len(data):
+                state['date'][row] = np.datetime64(pd.Timestamp(data.index[-1]).tz_localize(None), 'ns')
+                if 'Volume' in data.columns:
+                    state['volume'][row] = data['Volume'].iloc[-1]
+
+        screener._refresh(rows)
+        return screener
+
+    def _grow(self, symbols):
+        """Append rows for symbols not seen before; returns nothing"""
+        new = [symbol for symbol in dict.fromkeys(symbols) if symbol not in self._rows]
+        if not new:
+            return
+        for symbol in new:
+            self._rows[symbol] = len(self.symbols)
+            self.symbols.append(symbol)
+        count = len(new)
+        defaults = {'date': np.full(count, np.datetime64('NaT'), dtype='datetime64[ns]'),
+                    'bars': np.zeros(count, dtype=np.int64)}
+        for name in ('close', 'change_pct', 'volume', 'sma_20', 'sma_50', 'ema_20', 'ema_12', 'ema_26',
+                     'rsi', 'macd', 'macd_signal', 'macd_histogram', 'previous_histogram',
+                     'bb_upper', 'bb_lower'):
+            defaults[name] = np.full(count, np.nan)
+        defaults['macd_cross_up'] = np.zeros(count, dtype=bool)
+        defaults['macd_cross_down'] = np.zeros(count, dtype=bool)
+        for name, values in defaults.items():
+            self._state[name] = np.concatenate([self._state[name], values]) if name in self._state else values
+        self._window = np.vstack([self._window, np.full((count, WINDOW), np.nan)])
+        self._table = None
+
+    def update_bars(self, bars):
+        """
+        Apply one new bar per symbol
+        bars is a DataFrame indexed by symbol with a 'Close' column (optionally 'Volume' and 'Date'),
+        or a dict mapping symbol to close. Unknown symbols are added.
+        """
+        if isinstance(bars, dict):
+            bars = pd.DataFrame({'Close': pd.Series(bars, dtype=float)})
+        if bars.empty:
+            return
+        self._grow(bars.index)
+        rows = np.array([self._rows[symbol] for symbol in bars.index])
+        closes = bars['Close'].to_numpy(dtype=float)
+        state = self._state
+
+        # Slide the window of the updated rows left by one bar
+        self._window[rows, :-1] = self._window[rows, 1:]
+        self._window[rows, -1] = closes
+
+        for name, span in EMA_SPANS.items():
+            alpha = 2.0 / (span + 1)
+            previous = state[name][rows]
+            state[name][rows] = np.where(np.isnan(previous), closes, alpha * closes + (1 - alpha) * previous)
+
+        # The MACD line is seeded with its first value like any other adjust=False EMA
+        macd = state['ema_12'][rows] - state['ema_26'][rows]
+        alpha = 2.0 / (SIGNAL_SPAN + 1)
+        previous = state['macd_signal'][rows]
+        state['macd_signal'][rows] = np.where(np.isnan(previous), macd, alpha * macd + (1 - alpha) * previous)
+        state['previous_histogram'][rows] = state['macd_histogram'][rows]
+
+        if 'Volume' in bars.columns:
+            state['volume'][rows] = bars['Volume'].to_numpy(dtype=float)
+        if 'Date' in bars.columns:
+            state['date'][rows] = pd.DatetimeIndex(bars['Date']).tz_localize(None).to_numpy()
+        state['bars'][rows] += 1
+
+        self._refresh(rows)
+
+    def _refresh(self, rows):
+        """Recompute the derived columns of rows from the window and EMA state"""
+        state = self._state
+        window = self._window[rows]
+        state['close'][rows] = window[:, -1]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            state['change_pct'][rows] = (window[:, -1] / window[:, -2] - 1) * 100
+
+            # Windows reaching before a symbol's first bar contain NaN and stay NaN, as in pandas
+            last_20 = window[:, -20:]
+            sma_20 = last_20.mean(axis=1)
+            std_20 = last_20.std(axis=1, ddof=1)
+            state['sma_20'][rows] = sma_20
+            state['sma_50'][rows] = window[:, -50:].mean(axis=1)
+            state['bb_upper'][rows] = sma_20 + 2 * std_20
+            state['bb_lower'][rows] = sma_20 - 2 * std_20
+
+            # RSI over 14 changes; a history's first change counts as zero like delta.where(delta > 0, 0)
+            recent = window[:, -15:]
+            delta = np.diff(recent, axis=1)
+            delta = np.where(np.isnan(recent[:, :-1]) & ~np.isnan(recent[:, 1:]), 0.0, delta)
+            gain = np.where(delta > 0, delta, np.where(np.isnan(delta), np.nan, 0.0)).mean(axis=1)
+            loss = np.where(delta < 0, -delta, np.where(np.isnan(delta), np.nan, 0.0)).mean(axis=1)
+            state['rsi'][rows] = 100 - 100 / (1 + gain / loss)
+
+        macd = state['ema_12'][rows] - state['ema_26'][rows]
+        histogram = macd - state['macd_signal'][rows]
+        previous = state['previous_histogram'][rows]
+        state['macd'][rows] = macd
+        state['macd_histogram'][rows] = histogram
+        state['macd_cross_up'][rows] = (previous <= 0) & (histogram > 0)
+        state['macd_cross_down'][rows] = (previous >= 0) & (histogram < 0)
+        self._table = None
+
+    def table(self):
+        """The latest values of every symbol as a DataFrame indexed by symbol"""
+        if self._table is None:
+            self._table = pd.DataFrame({name: self._state[name] for name in COLUMNS},
+                                       index=pd.Index(self.symbols, name='symbol'))
+        return self._table
+
+    def screen(self, expression=None, sort_by=None, ascending=True, limit=None, columns=None):
+        """
+        Filter the table with a DataFrame.query expression and rank the matches
+        e.g. screen("rsi < 30 and macd_cross_up", sort_by="rsi", limit=20)
+        sort_by may be a column or list of columns; rows with NaN in them sort last
+        """
+        result = self.table()
+        if expression:
+            result = result.query(expression)
+        if sort_by is not None:
+            result = result.sort_values(sort_by, ascending=ascending, na_position='last')
+        if limit is not None:
+            result = result.head(limit)
+        if columns is not None:
+            result = result[columns]
+        return result
@@ -1,31 +1,71 @@
-import yfinance as yf
 import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
+from ohlcv_store import period_start
+from instrumentation import stage
+from memory_utils import compact_dtypes
+from resampling import resample_ohlcv, is_local_interval
 
 class StockDataFetcher:
-    def __init__(self):
+    def __init__(self, store=None, offline=False, compact=False):
         self.data = None
+        # Bars as downloaded; self.data may be a coarser resampling of them
+        self.base_data = None
+        self.symbol = None
+        # Optional OHLCVStore; when set, only bars after the last stored one are downloaded
+        self.store = store
+        self.offline = offline
+        # Hold prices/indicators as float32 and volume as integers
+        self.compact = compact
     
-    def fetch_data(self, symbol, period="1y"):
+    def fetch_data(self, symbol, period="1y", interval="1d"):
         """
         Fetch stock data from Yahoo Finance
+        Weekly/monthly/quarterly intervals (1wk, 1mo, 3mo) are built locally from daily bars
         """
+        self.symbol = symbol
+        download_interval = "1d" if is_local_interval(interval) else interval
         try:
-            stock = yf.Ticker(symbol)
-            self.data = stock.history(period=period)
-            return True
+            with stage('fetch_data', symbol=symbol) as record:
+                if self.store is not None:
+                    self.base_data = self._fetch_with_store(symbol, period, download_interval)
+                else:
+                    import yfinance as yf
+                    stock = yf.Ticker(symbol)
+                    self.base_data = stock.history(period=period, interval=download_interval)
+                record['rows'] = 0 if self.base_data is None else len(self.base_data)
+            if self.base_data is not None and self.compact:
+                self.base_data = compact_dtypes(self.base_data, inplace=True)
+            self.data = self.base_data
+            if self.data is not None and interval != download_interval:
+                self.resample(interval)
+            return self.data is not None
         except Exception as e:
             print(f"Error fetching data: {e}")
             return False
     
+    def _fetch_with_store(self, symbol, period, interval="1d"):
+        """
+        Serve history from the local store, downloading only the missing tail
+        """
+        import yfinance as yf
+        stock = yf.Ticker(symbol)
+        return self.store.sync(
+            symbol, interval,
+            fetch_full=lambda: stock.history(period=period, interval=interval),
+            fetch_since=lambda last: stock.history(start=last.strftime('%Y-%m-%d'), interval=interval),
+            start=period_start(period),
+            offline=self.offline,
+        )
+    
     def calculate_sma(self, window=20):
         """
         Calculate Simple Moving Average
         """
         if self.data is not None:
-            self.data[f'SMA_{window}'] = self.data['Close'].rolling(window=window).mean()
-            return self.data[f'SMA_{window}']
+            with stage('calculate_sma', symbol=self.symbol, rows=len(self.data)):
+                self._set_column(f'SMA_{window}', self.data['Close'].rolling(window=window).mean())
+                return self.data[f'SMA_{window}']
         return None
     
     def calculate_ema(self, window=20):
@@ -33,8 +73,9 @@ class StockDataFetcher:
         Calculate Exponential Moving Average
         """
         if self.data is not None:
-            self.data[f'EMA_{window}'] = self.data['Close'].ewm(span=window, adjust=False).mean()
-            return self.data[f'EMA_{window}']
+            with stage('calculate_ema', symbol=self.symbol, rows=len(self.data)):
+                self._set_column(f'EMA_{window}', self.data['Close'].ewm(span=window, adjust=False).mean())
+                return self.data[f'EMA_{window}']
         return None
     
     def calculate_rsi(self, window=14):
@@ -42,12 +83,13 @@ class StockDataFetcher:
         Calculate Relative Strength Index
         """
         if self.data is not None:
-            delta = self.data['Close'].diff()
-            gain = (delta.where(delta > 0, 0)).rolling(window=window).mean()
-            loss = (-delta.where(delta < 0, 0)).rolling(window=window).mean()
-            rs = gain / loss
-            self.data['RSI'] = 100 - (100 / (1 + rs))
-            return self.data['RSI']
+            with stage('calculate_rsi', symbol=self.symbol, rows=len(self.data)):
+                delta = self.data['Close'].diff()
+                gain = (delta.where(delta > 0, 0)).rolling(window=window).mean()
+                loss = (-delta.where(delta < 0, 0)).rolling(window=window).mean()
+                rs = gain / loss
+                self._set_column('RSI', 100 - (100 / (1 + rs)))
+                return self.data['RSI']
         return None
     
     def calculate_macd(self):
@@ -55,14 +97,40 @@ class StockDataFetcher:
         Calculate MACD (Moving Average Convergence Divergence)
         """
         if self.data is not None:
-            ema_12 = self.data['Close'].ewm(span=12, adjust=False).mean()
-            ema_26 = self.data['Close'].ewm(span=26, adjust=False).mean()
-            self.data['MACD'] = ema_12 - ema_26
-            self.data['MACD_Signal'] = self.data['MACD'].ewm(span=9, adjust=False).mean()
-            self.data['MACD_Histogram'] = self.data['MACD'] - self.data['MACD_Signal']
-            return self.data['MACD'], self.data['MACD_Signal'], self.data['MACD_Histogram']
+            with stage('calculate_macd', symbol=self.symbol, rows=len(self.data)):
+                ema_12 = self.data['Close'].ewm(span=12, adjust=False).mean()
+                ema_26 = self.data['Close'].ewm(span=26, adjust=False).mean()
+                macd = ema_12 - ema_26
+                signal = macd.ewm(span=9, adjust=False).mean()
+                self._set_column('MACD', macd)
+                self._set_column('MACD_Signal', signal)
+                self._set_column('MACD_Histogram', macd - signal)
+                return self.data['MACD'], self.data['MACD_Signal'], self.data['MACD_Histogram']
+        return None
+    
+    def resample(self, rule):
+        """
+        Rebuild self.data from the downloaded bars at another interval ('1wk', 'monthly', '4h', ...)
+        No new download; indicators must be recalculated afterwards
+        """
+        if self.base_data is not None:
+            with stage('resample', symbol=self.symbol, rows=len(self.base_data)):
+                self.data = resample_ohlcv(self.base_data, rule)
+            return self.data
         return None
     
+    def _set_column(self, name, values):
+        """Store an indicator column, narrowed to float32 in compact mode"""
+        self.data[name] = values.astype('float32') if self.compact else values
+    
+    def clear(self):
+        """
+        Release the held frame so its memory can be reclaimed
+        """
+        self.data = None
+        self.base_data = None
+        self.symbol = None
+    
     def get_data(self):
         """
         Return the processed data
@@ -5,6 +5,7 @@
 
 const axios = require('axios');
 const fs = require('fs');
+const DataExporter = require('./data_exporter');
 
 class StockDataFetcher {
     constructor(apiKey = 'demo') {
@@ -173,6 +174,13 @@ class StockDataFetcher {
         return emaValues;
     }
 
+    /**
+     * Load a binary columnar export (see columnar_export.py) into typed arrays
+     */
+    loadColumnarData(manifestPath) {
+        return DataExporter.loadColumnar(manifestPath);
+    }
+
     async saveToJSON(data, filename) {
         try {
             fs.writeFileSync(filename, JSON.stringify(data, null, 2));
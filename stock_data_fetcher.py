@@ -1,24 +1,66 @@
-import yfinance as yf
 import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
 import json
+import argparse
+from ohlcv_store import period_start
+from indicator_pipeline import IndicatorPipeline
+from columnar_export import export_columnar
+from downsampling import downsample_frame
+from instrumentation import stage
+from memory_utils import compact_dtypes
+from resampling import resample_ohlcv, is_local_interval
+
+def _json_list(series):
+    """Column values as a list with NaN written as 0; only columns that have NaN are copied"""
+    values = series.to_numpy()
+    if values.dtype.kind == 'f':
+        if np.isnan(values).any():
+            values = np.nan_to_num(values, nan=0.0)
+        # float32 would otherwise serialize as e.g. 101.12000274658203
+        if values.dtype.itemsize < 8:
+            return [float(f"{v:.7g}") for v in values.tolist()]
+    return values.tolist()
 
 class StockDataFetcher:
-    def __init__(self):
+    def __init__(self, store=None, offline=False):
         self.available_indicators = ['SMA', 'EMA', 'RSI', 'MACD', 'Bollinger_Bands']
+        # Optional OHLCVStore; when set, only bars after the last stored one are downloaded
+        self.store = store
+        self.offline = offline
+        # What the last add_technical_indicators call computed and reused
+        self.pipeline_stats = {}
     
-    def fetch_stock_data(self, symbol, period='6mo'):
+    def fetch_stock_data(self, symbol, period='6mo', interval='1d'):
         """
         Fetch stock data using yfinance
+        Weekly/monthly/quarterly intervals (1wk, 1mo, 3mo) are resampled locally from daily bars,
+        so every interval of a symbol shares one download (and one store entry)
         """
+        requested_interval = interval
+        if is_local_interval(interval):
+            interval = '1d'
         try:
-            stock = yf.Ticker(symbol)
-            data = stock.history(period=period)
+            with stage('fetch_stock_data', symbol=symbol) as record:
+                import yfinance as yf
+                stock = yf.Ticker(symbol)
+                if self.store is not None:
+                    data = self.store.sync(
+                        symbol, interval,
+                        fetch_full=lambda: stock.history(period=period, interval=interval),
+                        fetch_since=lambda last: stock.history(start=last.strftime('%Y-%m-%d'), interval=interval),
+                        start=period_start(period),
+                        offline=self.offline,
+                    )
+                else:
+                    data = stock.history(period=period, interval=interval)
+                record['rows'] = 0 if data is None else len(data)
             
-            if data.empty:
+            if data is None or data.empty:
                 raise ValueError(f"No data found for symbol: {symbol}")
             
+            if requested_interval != interval:
+                data = resample_ohlcv(data, requested_interval)
             return data
         except Exception as e:
             print(f"Error fetching data: {e}")
@@ -58,76 +100,101 @@ class StockDataFetcher:
         lower_band = sma - (std * 2)
         return upper_band, sma, lower_band
     
-    def add_technical_indicators(self, data, indicators=None):
+    def add_technical_indicators(self, data, indicators=None, inplace=False, compact=False):
         """
         Add selected technical indicators to the data
+        inplace=True adds the columns to data itself; otherwise the result shares data's
+        OHLCV columns instead of copying them. compact=True stores prices and indicators
+        as float32 and volume as integers.
         """
         if indicators is None:
             indicators = self.available_indicators
         
-        data_with_indicators = data.copy()
+        # Only new columns are inserted, so a shallow copy leaves the caller's frame untouched
+        data_with_indicators = data if inplace else data.copy(deep=False)
+        
+        # Plan all requested indicators together so shared rolling sums, diffs and EMAs run once
+        pipeline = IndicatorPipeline()
         
         if 'SMA' in indicators:
-            data_with_indicators['SMA_20'] = self.calculate_sma(data, 20)
-            data_with_indicators['SMA_50'] = self.calculate_sma(data, 50)
+            pipeline.add('SMA', name='SMA_20', window=20)
+            pipeline.add('SMA', name='SMA_50', window=50)
         
         if 'EMA' in indicators:
-            data_with_indicators['EMA_20'] = self.calculate_ema(data, 20)
+            pipeline.add('EMA', name='EMA_20', window=20)
         
         if 'RSI' in indicators:
-            data_with_indicators['RSI'] = self.calculate_rsi(data)
+            pipeline.add('RSI', name='RSI')
         
         if 'MACD' in indicators:
-            macd, signal, histogram = self.calculate_macd(data)
-            data_with_indicators['MACD'] = macd
-            data_with_indicators['MACD_Signal'] = signal
-            data_with_indicators['MACD_Histogram'] = histogram
+            pipeline.add('MACD', name='MACD')
         
         if 'Bollinger_Bands' in indicators:
-            upper, middle, lower = self.calculate_bollinger_bands(data)
-            data_with_indicators['BB_Upper'] = upper
-            data_with_indicators['BB_Middle'] = middle
-            data_with_indicators['BB_Lower'] = lower
+            pipeline.add('Bollinger_Bands', name='BB')
+        
+        with stage('add_technical_indicators', rows=len(data)):
+            # Indicators are computed at full precision and only then narrowed
+            for column, values in pipeline.run(data).items():
+                data_with_indicators[column] = values.astype('float32') if compact else values
+            if compact:
+                compact_dtypes(data_with_indicators, inplace=True)
+        self.pipeline_stats = pipeline.stats
         
         return data_with_indicators
     
-    def prepare_data_for_js(self, data):
+    def prepare_data_for_js(self, data, max_points=None):
         """
         Convert pandas DataFrame to JSON format for JavaScript
+        max_points downsamples long histories (LTTB rows, OHLC/histogram bucket extremes)
         """
-        # Reset index to include Date as a column
-        data_reset = data.reset_index()
-        data_reset['Date'] = data_reset['Date'].dt.strftime('%Y-%m-%d')
-        
-        # Convert to dictionary
-        data_dict = {
-            'dates': data_reset['Date'].tolist(),
-            'prices': {
-                'open': data_reset['Open'].fillna(0).tolist(),
-                'high': data_reset['High'].fillna(0).tolist(),
-                'low': data_reset['Low'].fillna(0).tolist(),
-                'close': data_reset['Close'].fillna(0).tolist(),
-                'volume': data_reset['Volume'].fillna(0).tolist()
-            }
-        }
-        
-        # Add technical indicators if they exist
-        if 'SMA_20' in data_reset.columns:
-            data_dict['indicators'] = {
-                'sma_20': data_reset['SMA_20'].fillna(0).tolist(),
-                'sma_50': data_reset['SMA_50'].fillna(0).tolist(),
-                'ema_20': data_reset['EMA_20'].fillna(0).tolist() if 'EMA_20' in data_reset.columns else [],
-                'rsi': data_reset['RSI'].fillna(0).tolist() if 'RSI' in data_reset.columns else [],
-                'macd': data_reset['MACD'].fillna(0).tolist() if 'MACD' in data_reset.columns else [],
-                'macd_signal': data_reset['MACD_Signal'].fillna(0).tolist() if 'MACD_Signal' in data_reset.columns else [],
-                'bb_upper': data_reset['BB_Upper'].fillna(0).tolist() if 'BB_Upper' in data_reset.columns else [],
-                'bb_middle': data_reset['BB_Middle'].fillna(0).tolist() if 'BB_Middle' in data_reset.columns else [],
-                'bb_lower': data_reset['BB_Lower'].fillna(0).tolist() if 'BB_Lower' in data_reset.columns else []
+        with stage('prepare_data_for_js', rows=len(data)):
+            data = downsample_frame(data, max_points)
+            
+            # Columns are read straight from the frame; no reset_index or per-column fillna copies
+            def values(column):
+                return _json_list(data[column]) if column in data.columns else []
+            
+            data_dict = {
+                'dates': data.index.strftime('%Y-%m-%d').tolist(),
+                'prices': {
+                    'open': values('Open'),
+                    'high': values('High'),
+                    'low': values('Low'),
+                    'close': values('Close'),
+                    'volume': values('Volume')
+                }
             }
+            
+            # Add technical indicators if they exist
+            if 'SMA_20' in data.columns:
+                data_dict['indicators'] = {
+                    'sma_20': values('SMA_20'),
+                    'sma_50': values('SMA_50'),
+                    'ema_20': values('EMA_20'),
+                    'rsi': values('RSI'),
+                    'macd': values('MACD'),
+                    'macd_signal': values('MACD_Signal'),
+                    'bb_upper': values('BB_Upper'),
+                    'bb_middle': values('BB_Middle'),
+                    'bb_lower': values('BB_Lower')
+                }
         
         return data_dict
+    
+    def export_columnar(self, data, path, symbol=None, dtype='float32', max_points=None):
+        """
+        Write data as typed binary columns plus a JSON manifest for the JavaScript front end
+        """
+        return export_columnar(downsample_frame(data, max_points), path, symbol=symbol, dtype=dtype)
 
 def main():
+    parser = argparse.ArgumentParser(description='Fetch AAPL data with indicators for the JavaScript front end')
+    parser.add_argument('--format', choices=['json', 'binary'], default='json',
+                       help='Output JSON (stock_data.json) or typed binary columns (stock_data_columnar.bin + .json manifest)')
+    parser.add_argument('--max-points', type=int,
+                       help='Downsample long histories to at most this many points')
+    args = parser.parse_args()
+    
     fetcher = StockDataFetcher()
     
     # Example usage
@@ -141,14 +208,19 @@ def main():
         # Add all technical indicators
         data_with_indicators = fetcher.add_technical_indicators(data)
         
-        # Prepare data for JavaScript
-        js_data = fetcher.prepare_data_for_js(data_with_indicators)
-        
-        # Save to JSON file
-        with open('stock_data.json', 'w') as f:
-            json.dump(js_data, f, indent=2)
-        
-        print(f"Data saved to stock_data.json")
+        if args.format == 'binary':
+            manifest_path = fetcher.export_columnar(data_with_indicators, 'stock_data_columnar', symbol=symbol,
+                                                     max_points=args.max_points)
+            print(f"Data saved to {manifest_path}")
+        else:
+            # Prepare data for JavaScript
+            js_data = fetcher.prepare_data_for_js(data_with_indicators, max_points=args.max_points)
+            
+            # Save to JSON file
+            with open('stock_data.json', 'w') as f:
+                json.dump(js_data, f, indent=2)
+            
+            print(f"Data saved to stock_data.json")
         print(f"Total records: {len(data)}")
         print(f"Date range: {data.index[0].strftime('%Y-%m-%d')} to {data.index[-1].strftime('%Y-%m-%d')}")
         
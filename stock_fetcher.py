@@ -4,79 +4,219 @@ Stock Data Fetcher - Fetches historical stock data from Alpha Vantage API
 """
 
 import requests
+from requests.adapters import HTTPAdapter
+from concurrent.futures import ThreadPoolExecutor
+from itertools import chain
+from operator import itemgetter
+import numpy as np
 import pandas as pd
 import json
 import sys
 from datetime import datetime, timedelta
+from indicator_pipeline import IndicatorPipeline
+from columnar_export import export_columnar
+from instrumentation import stage
+from resampling import resample_ohlcv
+from request_scheduler import RequestScheduler, ThrottledError, INTERACTIVE, BATCH
+
+SERIES_FIELDS = ("1. open", "2. high", "3. low", "4. close", "5. volume")
+
+OUTPUT_FORMATS = ("records", "dataframe", "columns")
+
+
+class AlphaVantageError(Exception):
+    """Raised when Alpha Vantage answers with an error or an empty payload"""
+
+
+class RateLimitError(AlphaVantageError, ThrottledError):
+    """Raised when Alpha Vantage answers with a quota "Note"/"Information" message instead of data"""
+
 
 class StockFetcher:
-    def __init__(self, api_key=None):
+    # Alpha Vantage "compact" output is the latest 100 bars
+    COMPACT_BARS = 100
+
+    def __init__(self, api_key=None, store=None, offline=False, base_url=None, max_workers=8, timeout=30,
+                 requests_per_minute=5, requests_per_day=None, max_retries=3, backoff=15.0):
         # Use demo key or provide your own Alpha Vantage API key
         self.api_key = api_key or "demo"
-        self.base_url = "https://www.alphavantage.co/query"
+        self.base_url = base_url or "https://www.alphavantage.co/query"
+        self.max_workers = max_workers
+        self.timeout = timeout
+        # Every request goes through the scheduler: quota buckets, shared in-flight calls, backoff.
+        # Set requests_per_minute/requests_per_day to your plan's quota (None = unlimited)
+        self.scheduler = RequestScheduler(per_minute=requests_per_minute, per_day=requests_per_day,
+                                          max_workers=max_workers, max_retries=max_retries, backoff=backoff)
+        # One pooled session so keep-alive connections are reused across symbols and threads
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max_workers)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        # Optional OHLCVStore; when set, only bars after the last stored one are downloaded
+        self.store = store
+        self.offline = offline
     
-    def fetch_stock_data(self, symbol, period="3month"):
+    def fetch_stock_data(self, symbol, period="3month", output="records", priority=INTERACTIVE, interval=None):
         """
         Fetch historical stock data for a given symbol
         Periods: 1month, 3month, 1year, 2year
+        Output: "records" (list of dicts), "dataframe", or "columns" (dict of NumPy arrays)
+        Interactive requests are sent before queued batch (BATCH priority) requests
+        Interval: "daily", "weekly", "monthly" or any pandas rule; defaults to weekly bars
+        for 1year/2year. Coarser bars are built locally from the daily download.
         """
+        if output not in OUTPUT_FORMATS:
+            raise ValueError(f"Unknown output format: {output}")
+        
         try:
-            # Map periods to Alpha Vantage function
+            # Map periods to the bar interval; only daily bars are ever downloaded
             period_map = {
-                "1month": "TIME_SERIES_DAILY",
-                "3month": "TIME_SERIES_DAILY", 
-                "1year": "TIME_SERIES_WEEKLY",
-                "2year": "TIME_SERIES_WEEKLY"
+                "1month": "daily",
+                "3month": "daily", 
+                "1year": "weekly",
+                "2year": "weekly"
             }
             
-            function = period_map.get(period, "TIME_SERIES_DAILY")
+            interval = interval or period_map.get(period, "daily")
+            function = "TIME_SERIES_DAILY"
+            outputsize = "compact" if period == "1month" and interval == "daily" else "full"
             
-            params = {
-                "function": function,
-                "symbol": symbol,
-                "apikey": self.api_key,
-                "outputsize": "compact" if period == "1month" else "full"
-            }
+            if self.store is not None:
+                start = None
+                if outputsize == "compact":
+                    start = pd.Timestamp.today().normalize() - pd.offsets.BDay(self.COMPACT_BARS)
+                ohlcv = self.store.sync(
+                    symbol, "daily",
+                    fetch_full=lambda: self._request_series(symbol, function, outputsize, priority),
+                    fetch_since=lambda last: self._request_tail(symbol, function, last, priority),
+                    start=start,
+                    offline=self.offline,
+                )
+            else:
+                ohlcv = self._request_series(symbol, function, outputsize, priority)
             
-            response = requests.get(self.base_url, params=params)
-            data = response.json()
+            if interval != "daily":
+                ohlcv = resample_ohlcv(ohlcv, interval)
             
-            if "Error Message" in data:
-                return {"error": f"Invalid symbol: {symbol}"}
-            
-            # Extract time series data
-            time_series_key = "Time Series (Daily)" if "Daily" in function else "Weekly Time Series"
-            
-            if time_series_key not in data:
-                return {"error": f"No data found for symbol: {symbol}"}
-            
-            time_series = data[time_series_key]
-            
-            # Convert to DataFrame and calculate technical indicators
-            df = self._process_data(time_series, symbol)
+            # Calculate technical indicators
+            df = self._finish_frame(ohlcv, symbol)
+            if output == "dataframe":
+                return df
+            if output == "columns":
+                return {column: (symbol if column == "symbol" else df[column].to_numpy())
+                        for column in df.columns}
             return df.to_dict('records')
             
+        except AlphaVantageError as e:
+            return {"error": str(e)}
         except Exception as e:
             return {"error": f"Error fetching data: {str(e)}"}
     
+    def fetch_many(self, symbols, period="3month", max_workers=None, output="records", priority=BATCH):
+        """
+        Fetch several symbols concurrently over the shared connection pool
+        Requests are paced by the scheduler's quota and queue behind interactive ones by default
+        Returns a dict mapping each symbol to its records or an {"error": ...} dict
+        """
+        symbols = list(dict.fromkeys(symbols))
+        workers = min(max_workers or self.max_workers, self.max_workers, len(symbols)) or 1
+        
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            results = executor.map(lambda symbol: self.fetch_stock_data(symbol, period, output, priority), symbols)
+            return dict(zip(symbols, results))
+    
+    def close(self):
+        """Stop the request scheduler and release pooled connections"""
+        self.scheduler.close()
+        self.session.close()
+    
+    def _request_series(self, symbol, function, outputsize, priority=INTERACTIVE):
+        """
+        Request one time series as a date-indexed OHLCV frame through the scheduler
+        Concurrent identical requests share one API call and therefore one frame; treat it as read-only
+        """
+        key = (function, symbol.upper(), outputsize)
+        return self.scheduler.call(key, lambda: self._send_request(symbol, function, outputsize), priority)
+    
+    def _send_request(self, symbol, function, outputsize):
+        """Send one time series request to Alpha Vantage and parse it"""
+        params = {
+            "function": function,
+            "symbol": symbol,
+            "apikey": self.api_key,
+            "outputsize": outputsize
+        }
+        
+        with stage('request', symbol=symbol) as record:
+            response = self.session.get(self.base_url, params=params, timeout=self.timeout)
+            record['bytes'] = len(response.content)
+        with stage('decode_json', symbol=symbol, nbytes=len(response.content)):
+            data = response.json()
+        
+        if "Error Message" in data:
+            raise AlphaVantageError(f"Invalid symbol: {symbol}")
+        
+        # Over-quota answers come back as HTTP 200 with a "Note" or "Information" message
+        message = data.get("Note") or data.get("Information")
+        if message:
+            lowered = message.lower()
+            if "Note" in data or "rate limit" in lowered or "call frequency" in lowered:
+                raise RateLimitError(f"Alpha Vantage rate limit reached: {message}",
+                                     retry="per day" not in lowered)
+            raise AlphaVantageError(message)
+        
+        # Extract time series data
+        time_series_key = "Time Series (Daily)" if "Daily" in function.title() else "Weekly Time Series"
+        
+        if time_series_key not in data:
+            raise AlphaVantageError(f"No data found for symbol: {symbol}")
+        
+        return self._series_to_frame(data[time_series_key])
+    
+    def _request_tail(self, symbol, function, last, priority=INTERACTIVE):
+        """Request the bars from last onwards, falling back to a full download if compact output has a gap"""
+        frame = self._request_series(symbol, function, "compact", priority)
+        if frame.index[0] > last:
+            frame = self._request_series(symbol, function, "full", priority)
+        return frame[frame.index >= last]
+    
     def _process_data(self, time_series, symbol):
         """Process raw time series data and calculate technical indicators"""
-        records = []
-        
-        for date, values in time_series.items():
-            records.append({
-                "date": date,
-                "symbol": symbol,
-                "open": float(values["1. open"]),
-                "high": float(values["2. high"]),
-                "low": float(values["3. low"]),
-                "close": float(values["4. close"]),
-                "volume": int(values["5. volume"])
-            })
-        
-        df = pd.DataFrame(records)
-        df['date'] = pd.to_datetime(df['date'])
-        df = df.sort_values('date')
+        return self._finish_frame(self._series_to_frame(time_series), symbol)
+    
+    def _series_to_frame(self, time_series):
+        """Convert an Alpha Vantage time series dict into a date-indexed OHLCV frame"""
+        with stage('parse_time_series', rows=len(time_series)):
+            columns = self._parse_time_series(time_series)
+        dates = columns.pop("date")
+        return pd.DataFrame(columns, index=pd.DatetimeIndex(dates, name="date"))
+    
+    def _parse_time_series(self, time_series):
+        """
+        Parse a time series dict straight into typed NumPy columns, oldest first
+        Fields are flattened and converted by NumPy in one pass instead of float()/int() per row
+        """
+        rows = len(time_series)
+        fields = np.fromiter(chain.from_iterable(map(itemgetter(*SERIES_FIELDS), time_series.values())),
+                             dtype=np.float64, count=rows * len(SERIES_FIELDS)).reshape(rows, len(SERIES_FIELDS))
+        dates = np.fromiter(time_series.keys(), dtype="datetime64[s]", count=rows).astype("datetime64[ns]")
+        
+        # Alpha Vantage lists the newest bar first
+        order = np.argsort(dates, kind="stable")
+        fields = fields[order]
+        return {
+            "date": dates[order],
+            "open": fields[:, 0],
+            "high": fields[:, 1],
+            "low": fields[:, 2],
+            "close": fields[:, 3],
+            "volume": fields[:, 4].astype(np.int64),
+        }
+    
+    def _finish_frame(self, ohlcv, symbol):
+        """Turn a date-indexed OHLCV frame into the row layout used by the JSON output"""
+        df = ohlcv.reset_index()
+        df.insert(1, 'symbol', symbol)
         
         # Calculate technical indicators
         df = self._calculate_technical_indicators(df)
@@ -84,18 +224,25 @@ class StockFetcher:
     
     def _calculate_technical_indicators(self, df):
         """Calculate basic technical indicators"""
+        # Shared rolling sums and EMAs are computed once across all indicators
+        pipeline = IndicatorPipeline()
+        
         # Simple Moving Averages
-        df['sma_20'] = df['close'].rolling(window=20).mean()
-        df['sma_50'] = df['close'].rolling(window=50).mean()
+        pipeline.add('SMA', name='sma_20', window=20)
+        pipeline.add('SMA', name='sma_50', window=50)
         
         # RSI (Relative Strength Index)
-        df['rsi'] = self._calculate_rsi(df['close'])
+        pipeline.add('RSI', name='rsi', window=14)
         
         # MACD
-        df['macd'], df['macd_signal'] = self._calculate_macd(df['close'])
+        pipeline.add('MACD', name=('macd', 'macd_signal', None), adjust=True)
         
         # Bollinger Bands
-        df['bb_upper'], df['bb_lower'] = self._calculate_bollinger_bands(df['close'])
+        pipeline.add('Bollinger_Bands', name=('bb_upper', None, 'bb_lower'))
+        
+        with stage('calculate_technical_indicators', rows=len(df)):
+            for column, values in pipeline.run(df, column='close').items():
+                df[column] = values
         
         return df
     
@@ -125,21 +272,31 @@ class StockFetcher:
         return upper_band, lower_band
 
 def main():
-    if len(sys.argv) < 2:
-        print("Usage: python stock_fetcher.py <symbol> [period]")
+    binary = "--binary" in sys.argv
+    args = [arg for arg in sys.argv[1:] if arg != "--binary"]
+    
+    if len(args) < 1:
+        print("Usage: python stock_fetcher.py <symbol> [period] [--binary]")
         print("Example: python stock_fetcher.py AAPL 3month")
         sys.exit(1)
     
-    symbol = sys.argv[1]
-    period = sys.argv[2] if len(sys.argv) > 2 else "3month"
+    symbol = args[0]
+    period = args[1] if len(args) > 1 else "3month"
     
     fetcher = StockFetcher()
-    data = fetcher.fetch_stock_data(symbol, period)
+    data = fetcher.fetch_stock_data(symbol, period, output="dataframe" if binary else "records")
     
-    if "error" in data:
+    if isinstance(data, dict) and "error" in data:
         print(f"Error: {data['error']}")
         sys.exit(1)
     
+    if binary:
+        # Typed binary columns plus a JSON manifest, loaded by DataExporter.loadColumnar
+        output_file = export_columnar(data, f"{symbol.lower()}_columnar", symbol=symbol)
+        print(f"Data saved to {output_file}")
+        print(f"Fetched {len(data)} records for {symbol}")
+        return
+    
     # Save data to JSON file for JavaScript to use
     output_file = f"{symbol.lower()}_data.json"
     with open(output_file, 'w') as f:
@@ -1,80 +1,398 @@
-import matplotlib.pyplot as plt
-import matplotlib.dates as mdates
-from matplotlib import style
-import seaborn as sns
+import os
+import hashlib
+import shutil
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from downsampling import downsample_series
+from instrumentation import stage
+
+CHART_STYLE = 'seaborn-v0_8'
+
+MAX_MONTH_TICKS = 24
+
+# Columns draw_price_chart plots, by line label; the histogram is drawn as bars
+CHART_LINES = {
+    'Close Price': 'Close',
+    'SMA 20': 'SMA_20',
+    'EMA 20': 'EMA_20',
+    'RSI': 'RSI',
+    'MACD': 'MACD',
+    'Signal Line': 'MACD_Signal',
+}
+CHART_COLUMNS = tuple(CHART_LINES.values()) + ('MACD_Histogram',)
+
+
+def draw_price_chart(fig, data, symbol, max_points=None):
+    """
+    Draw the three-panel price/RSI/MACD chart onto an existing figure
+    With max_points, lines are reduced by LTTB and the histogram by min/max buckets
+    """
+    def line(column):
+        return downsample_series(data.index, data[column].to_numpy(), max_points)
+
+    axs = fig.subplots(3, 1)
+    fig.suptitle(f'Stock Analysis: {symbol}', fontsize=16, fontweight='bold')
+
+    # Price chart with moving averages
+    axs[0].plot(*line('Close'), label='Close Price', linewidth=2, color='black')
+    axs[0].plot(*line('SMA_20'), label='SMA 20', linewidth=1, color='blue', alpha=0.7)
+    axs[0].plot(*line('EMA_20'), label='EMA 20', linewidth=1, color='red', alpha=0.7)
+    axs[0].set_title('Price with Moving Averages')
+    axs[0].set_ylabel('Price ($)')
+    axs[0].legend()
+    axs[0].grid(True, alpha=0.3)
+
+    # RSI
+    axs[1].plot(*line('RSI'), label='RSI', linewidth=2, color='purple')
+    axs[1].axhline(y=70, color='r', linestyle='--', alpha=0.7, label='Overbought (70)')
+    axs[1].axhline(y=30, color='g', linestyle='--', alpha=0.7, label='Oversold (30)')
+    axs[1].set_title('Relative Strength Index (RSI)')
+    axs[1].set_ylabel('RSI')
+    axs[1].set_ylim(0, 100)
+    axs[1].legend()
+    axs[1].grid(True, alpha=0.3)
+
+    # MACD
+    axs[2].plot(*line('MACD'), label='MACD', linewidth=2, color='blue')
+    axs[2].plot(*line('MACD_Signal'), label='Signal Line', linewidth=1, color='red')
+    histogram = downsample_series(data.index, data['MACD_Histogram'].to_numpy(), max_points, 'minmax')
+    axs[2].bar(*histogram, label='Histogram', alpha=0.3, color='gray')
+    axs[2].set_title('MACD')
+    axs[2].set_ylabel('MACD')
+    axs[2].set_xlabel('Date')
+    axs[2].legend()
+    axs[2].grid(True, alpha=0.3)
+
+    _format_date_axes(axs, data.index)
+    fig.tight_layout()
+    return axs
+
+
+def _format_date_axes(axs, index):
+    """Month ticks on every panel; long histories get one tick every few months instead of thousands"""
+    import matplotlib.dates as mdates
+
+    months = (index[-1].year - index[0].year) * 12 + index[-1].month - index[0].month
+    month_interval = max(1, -(-months // MAX_MONTH_TICKS))
+    for ax in axs:
+        ax.xaxis.set_major_formatter(mdates.DateFormatter('%Y-%m'))
+        ax.xaxis.set_major_locator(mdates.MonthLocator(interval=month_interval))
+
+
+def update_price_chart(axs, data, max_points=None):
+    """
+    Point the artists of a chart drawn by draw_price_chart at new data without rebuilding the figure
+    Lines get new x/y data, existing histogram bars are moved and resized and only missing
+    bars are added. Limits are set from the data directly instead of re-scanning every artist.
+    """
+    import matplotlib.dates as mdates
+    from matplotlib import rcParams
+
+    for ax in axs:
+        for line in ax.get_lines():
+            column = CHART_LINES.get(line.get_label())
+            if column is not None:
+                line.set_data(*downsample_series(data.index, data[column].to_numpy(), max_points))
+
+    x, heights = downsample_series(data.index, data['MACD_Histogram'].to_numpy(), max_points, 'minmax')
+    positions = mdates.date2num(x)
+    bars = list(axs[2].patches)
+    width = bars[0].get_width() if bars else 0.8
+    for bar, position, height in zip(bars, positions, heights):
+        bar.set_x(position - width / 2)
+        bar.set_height(height)
+    for bar in bars[len(positions):]:
+        bar.remove()
+    if len(positions) > len(bars):
+        axs[2].bar(x[len(bars):], heights[len(bars):], width=width, alpha=0.3, color='gray')
+
+    # Limits as autoscale would set them, but from the plotted arrays instead of every artist
+    bar_extent = None
+    if len(positions):
+        bar_heights = np.asarray(heights, dtype=float)
+        bar_extent = (positions - width / 2, positions + width / 2, np.minimum(bar_heights, 0.0),
+                      np.maximum(bar_heights, 0.0))
+    for ax in axs:
+        extents = [_line_extent(line) for line in ax.get_lines() if line.get_label() in CHART_LINES]
+        if ax is axs[2] and bar_extent is not None:
+            extents.append(bar_extent)
+        x_low, x_high, y_low, y_high = _combine_extents(extents)
+        if x_low is None:
+            continue
+        ax.set_xlim(*_with_margin(x_low, x_high, rcParams['axes.xmargin']))
+        # RSI keeps its fixed 0-100 range; bars stick to zero like ax.bar's sticky edge
+        if ax is not axs[1]:
+            sticky = (0.0,) if ax is axs[2] and bar_extent is not None else ()
+            ax.set_ylim(*_with_margin(y_low, y_high, rcParams['axes.ymargin'], sticky))
+    _format_date_axes(axs, data.index)
+    # tight_layout's result depends on where it starts, so start where a fresh figure does
+    fig = axs[0].figure
+    fig.subplots_adjust(**{name: rcParams[f'figure.subplot.{name}']
+                           for name in ('left', 'right', 'bottom', 'top', 'wspace', 'hspace')})
+    fig.tight_layout()
+
+
+def _line_extent(line):
+    """x and y arrays of a line's finite points (NaN gaps don't count towards limits)"""
+    import matplotlib.dates as mdates
+
+    x = np.asarray(mdates.date2num(line.get_xdata()), dtype=float)
+    y = np.asarray(line.get_ydata(), dtype=float)
+    finite = np.isfinite(x) & np.isfinite(y)
+    return x[finite], x[finite], y[finite], y[finite]
+
+
+def _combine_extents(extents):
+    """(x_low, x_high, y_low, y_high) over (x lows, x highs, y lows, y highs) arrays, Nones if empty"""
+    parts = [np.concatenate([extent[i] for extent in extents]) if extents else np.empty(0) for i in range(4)]
+    if any(len(part) == 0 for part in parts):
+        return None, None, None, None
+    return parts[0].min(), parts[1].max(), parts[2].min(), parts[3].max()
+
+
+def _with_margin(low, high, margin, sticky=()):
+    """Pad [low, high] by margin of its span, without crossing a sticky value inside it"""
+    span = high - low
+    padded_low, padded_high = low - span * margin, high + span * margin
+    if span == 0:
+        padded_low, padded_high = low - 0.05 * (abs(low) or 1.0), high + 0.05 * (abs(high) or 1.0)
+    for value in sticky:
+        if padded_low < value <= low:
+            padded_low = value
+        if high <= value < padded_high:
+            padded_high = value
+    return padded_low, padded_high
+
+
+def chart_key(data, symbol, **options):
+    """
+    Content hash of everything a chart depends on: symbol, dates, plotted columns and render options
+    """
+    digest = hashlib.sha1()
+    digest.update(repr((symbol, sorted(options.items()))).encode())
+    digest.update(np.ascontiguousarray(data.index.asi8).tobytes())
+    for column in CHART_COLUMNS:
+        digest.update(column.encode())
+        digest.update(np.ascontiguousarray(data[column].to_numpy(dtype=np.float64)).tobytes())
+    return digest.hexdigest()
+
+
+class ChartCache:
+    def __init__(self, directory='chart_cache', max_files=1000):
+        """Rendered chart files stored under their chart_key; least recently used files are evicted"""
+        self.directory = directory
+        self.max_files = max_files
+        os.makedirs(directory, exist_ok=True)
+
+    def path(self, key, fmt):
+        return os.path.join(self.directory, f"{key}.{fmt}")
+
+    def get(self, key, fmt):
+        """Path of the cached file, or None"""
+        path = self.path(key, fmt)
+        if not os.path.exists(path):
+            return None
+        # mtime doubles as the last-used time for eviction
+        os.utime(path)
+        return path
+
+    def put(self, key, fmt, filename):
+        """Store a copy of a rendered file and return the cached path"""
+        path = self.path(key, fmt)
+        shutil.copyfile(filename, path)
+        self._evict()
+        return path
+
+    def _evict(self):
+        entries = [entry for entry in os.scandir(self.directory) if entry.is_file()]
+        if len(entries) <= self.max_files:
+            return
+        entries.sort(key=lambda entry: entry.stat().st_mtime)
+        for entry in entries[:len(entries) - self.max_files]:
+            os.remove(entry.path)
+
+
+def render_chart_file(symbol, data, filename, dpi=100, fmt='png', max_points=None):
+    """
+    Render one chart to a file on the Agg canvas without touching pyplot state
+    """
+    from matplotlib import style
+    from matplotlib.figure import Figure
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    
+    with style.context(CHART_STYLE):
+        fig = Figure(figsize=(15, 12))
+        FigureCanvasAgg(fig)
+        try:
+            draw_price_chart(fig, data, symbol, max_points)
+            fig.savefig(filename, dpi=dpi, format=fmt, bbox_inches='tight')
+        finally:
+            # Drop the artists now rather than waiting for the figure to be collected
+            fig.clear()
+    return filename
+
+
+def _render_job(job):
+    symbol, data, filename, dpi, fmt, max_points = job
+    try:
+        return {"filename": render_chart_file(symbol, data, filename, dpi, fmt, max_points)}
+    except Exception as e:
+        return {"error": f"Error rendering {symbol}: {e}"}
+
+
+def _pyplot():
+    """Import pyplot on first use and apply the chart style once"""
+    global _plt
+    if _plt is None:
+        import matplotlib.pyplot as plt
+        plt.style.use(CHART_STYLE)
+        _plt = plt
+    return _plt
+
+
+_plt = None
+
 
 class StockVisualizer:
-    def __init__(self):
-        style.use('seaborn-v0_8')
+    def __init__(self, cache_dir=None, max_live_figures=16):
+        # matplotlib is loaded by the first chart, not here, so numbers-only runs never pay for it
         self.fig = None
         self.axs = None
-    
-    def create_price_chart(self, data, symbol, show_indicators=True):
+        # render_chart: finished files by content hash, plus the last figure per symbol for appends
+        self.cache = ChartCache(cache_dir) if cache_dir else None
+        self.max_live_figures = max_live_figures
+        self._live = OrderedDict()
+        self.render_stats = {'cached': 0, 'updated': 0, 'drawn': 0}
+
+    def create_price_chart(self, data, symbol, show_indicators=True, max_points=None):
         """
         Create a comprehensive stock price chart with indicators
+        max_points caps the points drawn per series (e.g. 2000 for long histories)
         """
-        fig, axs = plt.subplots(3, 1, figsize=(15, 12))
-        fig.suptitle(f'Stock Analysis: {symbol}', fontsize=16, fontweight='bold')
-        
-        # Price chart with moving averages
-        axs[0].plot(data.index, data['Close'], label='Close Price', linewidth=2, color='black')
-        axs[0].plot(data.index, data['SMA_20'], label='SMA 20', linewidth=1, color='blue', alpha=0.7)
-        axs[0].plot(data.index, data['EMA_20'], label='EMA 20', linewidth=1, color='red', alpha=0.7)
-        axs[0].set_title('Price with Moving Averages')
-        axs[0].set_ylabel('Price ($)')
-        axs[0].legend()
-        axs[0].grid(True, alpha=0.3)
-        
-        # RSI
-        axs[1].plot(data.index, data['RSI'], label='RSI', linewidth=2, color='purple')
-        axs[1].axhline(y=70, color='r', linestyle='--', alpha=0.7, label='Overbought (70)')
-        axs[1].axhline(y=30, color='g', linestyle='--', alpha=0.7, label='Oversold (30)')
-        axs[1].set_title('Relative Strength Index (RSI)')
-        axs[1].set_ylabel('RSI')
-        axs[1].set_ylim(0, 100)
-        axs[1].legend()
-        axs[1].grid(True, alpha=0.3)
-        
-        # MACD
-        axs[2].plot(data.index, data['MACD'], label='MACD', linewidth=2, color='blue')
-        axs[2].plot(data.index, data['MACD_Signal'], label='Signal Line', linewidth=1, color='red')
-        axs[2].bar(data.index, data['MACD_Histogram'], label='Histogram', alpha=0.3, color='gray')
-        axs[2].set_title('MACD')
-        axs[2].set_ylabel('MACD')
-        axs[2].set_xlabel('Date')
-        axs[2].legend()
-        axs[2].grid(True, alpha=0.3)
-        
-        # Format x-axis
-        for ax in axs:
-            ax.xaxis.set_major_formatter(mdates.DateFormatter('%Y-%m'))
-            ax.xaxis.set_major_locator(mdates.MonthLocator())
-        
-        plt.tight_layout()
+        plt = _pyplot()
+        with stage('create_price_chart', symbol=symbol, rows=len(data)):
+            fig = plt.figure(figsize=(15, 12))
+            axs = draw_price_chart(fig, data, symbol, max_points)
+        self.fig, self.axs = fig, axs
         return fig, axs
-    
-    def create_simple_chart(self, data, symbol):
+
+    def create_simple_chart(self, data, symbol, max_points=None):
         """
         Create a simple price chart only
         """
+        plt = _pyplot()
         plt.figure(figsize=(12, 6))
-        plt.plot(data.index, data['Close'], linewidth=2, color='blue')
+        plt.plot(*downsample_series(data.index, data['Close'].to_numpy(), max_points), linewidth=2, color='blue')
         plt.title(f'{symbol} Stock Price')
         plt.ylabel('Price ($)')
         plt.xlabel('Date')
         plt.grid(True, alpha=0.3)
         plt.tight_layout()
-        return plt.gcf()
-    
+        self.fig, self.axs = plt.gcf(), None
+        return self.fig
+
     def show_chart(self):
         """
         Display the chart
         """
+        plt = _pyplot()
         plt.show()
-    
-    def save_chart(self, filename='stock_analysis.png'):
+
+    def save_chart(self, filename='stock_analysis.png', dpi=300, close=True):
         """
         Save the chart to file
+        The figure is closed afterwards unless close=False, so repeated charts don't pile up
+        """
+        plt = _pyplot()
+        fig = self.fig if self.fig is not None else plt.gcf()
+        with stage('save_chart'):
+            fig.savefig(filename, dpi=dpi, bbox_inches='tight')
+        print(f"Chart saved as {filename}")
+        if close:
+            plt.close(fig)
+            self.fig, self.axs = None, None
+
+    def render_chart(self, data, symbol, filename=None, dpi=300, fmt='png', max_points=None):
+        """
+        Render the price chart to a file, doing as little work as possible
+        An identical request (same data, indicators and options) is served from the chart cache;
+        when data only gained bars since this symbol's last render, that figure's artists are
+        updated instead of drawing a new figure. Returns the path of the image.
+        """
+        key = chart_key(data, symbol, dpi=dpi, fmt=fmt, max_points=max_points)
+        cached = self.cache.get(key, fmt) if self.cache is not None else None
+        if cached is not None:
+            self.render_stats['cached'] += 1
+            if filename is None:
+                return cached
+            shutil.copyfile(cached, filename)
+            return filename
+
+        if filename is None:
+            filename = self.cache.path(key, fmt) if self.cache is not None else f"{symbol}_analysis.{fmt}"
+
+        from matplotlib import style
+        with stage('render_chart', symbol=symbol, rows=len(data)), style.context(CHART_STYLE):
+            live = self._live_figure(data, symbol, max_points)
+            live['fig'].savefig(filename, dpi=dpi, format=fmt, bbox_inches='tight')
+
+        if self.cache is not None and filename != self.cache.path(key, fmt):
+            self.cache.put(key, fmt, filename)
+        return filename
+
+    def _live_figure(self, data, symbol, max_points):
+        """The figure for symbol showing data: reused as is, updated for appended bars, or drawn anew"""
+        data_key = chart_key(data, symbol)
+        live = self._live.get(symbol)
+        if live is not None and live['max_points'] == max_points and live['key'] == data_key:
+            self._live.move_to_end(symbol)
+            return live
+
+        rows = live['rows'] if live is not None else 0
+        if (live is not None and live['max_points'] == max_points and 0 < rows < len(data)
+                and chart_key(data.iloc[:rows], symbol) == live['key']):
+            update_price_chart(live['axs'], data, max_points)
+            self.render_stats['updated'] += 1
+        else:
+            from matplotlib.figure import Figure
+            from matplotlib.backends.backend_agg import FigureCanvasAgg
+            if live is not None:
+                live['fig'].clear()
+            fig = Figure(figsize=(15, 12))
+            FigureCanvasAgg(fig)
+            live = {'fig': fig, 'axs': draw_price_chart(fig, data, symbol, max_points), 'max_points': max_points}
+            self.render_stats['drawn'] += 1
+
+        live['key'] = data_key
+        live['rows'] = len(data)
+        self._live[symbol] = live
+        self._live.move_to_end(symbol)
+        while len(self._live) > self.max_live_figures:
+            _, evicted = self._live.popitem(last=False)
+            evicted['fig'].clear()
+        return live
+
+    def render_batch(self, jobs, output_dir='.', dpi=100, fmt='png', max_workers=None, max_points=None):
+        """
+        Render many charts in parallel worker processes on the Agg backend
+        jobs are (symbol, data) pairs or (symbol, data, options) where options may
+        override 'dpi', 'format', 'filename' and 'max_points' for that chart.
+        Returns a dict mapping symbol to {"filename": ...} or {"error": ...}
         """
-        plt.savefig(filename, dpi=300, bbox_inches='tight')
-        print(f"Chart saved as {filename}")
\ No newline at end of file
+        tasks = []
+        for job in jobs:
+            symbol, data = job[0], job[1]
+            options = job[2] if len(job) > 2 else {}
+            job_fmt = options.get('format', fmt)
+            filename = options.get('filename') or os.path.join(output_dir, f"{symbol}_analysis.{job_fmt}")
+            tasks.append((symbol, data, filename, options.get('dpi', dpi), job_fmt,
+                          options.get('max_points', max_points)))
+
+        if not tasks:
+            return {}
+
+        os.makedirs(output_dir, exist_ok=True)
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            results = executor.map(_render_job, tasks)
+            return {task[0]: result for task, result in zip(tasks, results)}
@@ -0,0 +1,255 @@
+"""
+Streaming Indicators - Stateful technical indicators updated one bar at a time
+
+Each indicator is seeded from a historical DataFrame (or Close series) and
+then advanced with update(close) in constant time. Values match the pandas
+batch calculations in StockDataFetcher to floating-point tolerance.
+"""
+
+import math
+from collections import deque
+import numpy as np
+import pandas as pd
+
+# Running sums are rebuilt from the window this often to stop rounding drift
+RESYNC_INTERVAL = 1000
+
+
+def _close_series(data):
+    """Pull the close prices out of a DataFrame (either column convention) or Series"""
+    if isinstance(data, pd.Series):
+        return data
+    for column in ('Close', 'close'):
+        if column in data.columns:
+            return data[column]
+    raise KeyError("Data has no 'Close' column")
+
+
+class _RollingWindow:
+    """Fixed-size window with O(1) running sum and sum of squares"""
+
+    def __init__(self, window):
+        self.window = window
+        self.values = deque()
+        self.nan_count = 0
+        self.offset = None
+        self.total = 0.0
+        self.total_sq = 0.0
+        self.updates = 0
+
+    def push(self, value):
+        if self.offset is None and not math.isnan(value):
+            # Summing around the first value keeps the sum of squares well conditioned
+            self.offset = value
+        self.values.append(value)
+        self._add(value, 1)
+        if len(self.values) > self.window:
+            self._add(self.values.popleft(), -1)
+
+        self.updates += 1
+        if self.updates % RESYNC_INTERVAL == 0:
+            self._resync()
+
+    def _add(self, value, sign):
+        if math.isnan(value):
+            self.nan_count += sign
+            return
+        shifted = value - self.offset
+        self.total += sign * shifted
+        self.total_sq += sign * shifted * shifted
+
+    def _resync(self):
+        valid = [v - self.offset for v in self.values if not math.isnan(v)]
+        self.total = math.fsum(valid)
+        self.total_sq = math.fsum(v * v for v in valid)
+
+    @property
+    def full(self):
+        return len(self.values) == self.window and self.nan_count == 0
+
+    def mean(self):
+        if not self.full:
+            return np.nan
+        return self.offset + self.total / self.window
+
+    def std(self):
+        if not self.full or self.window < 2:
+            return np.nan
+        variance = (self.total_sq - self.total * self.total / self.window) / (self.window - 1)
+        return math.sqrt(max(variance, 0.0))
+
+
+class StreamingSMA:
+    def __init__(self, window=20):
+        self.window = window
+        self._values = _RollingWindow(window)
+        self.value = np.nan
+
+    @classmethod
+    def from_history(cls, data, window=20):
+        """Seed from historical bars; only the last window closes are needed"""
+        indicator = cls(window)
+        indicator.update_many(_close_series(data).to_numpy()[-window:])
+        return indicator
+
+    def update(self, close):
+        """Add one bar and return the current SMA"""
+        self._values.push(float(close))
+        self.value = self._values.mean()
+        return self.value
+
+    def update_many(self, closes):
+        """Add a batch of bars and return the SMA after each one"""
+        return np.array([self.update(close) for close in closes])
+
+
+class StreamingEMA:
+    def __init__(self, window=20, adjust=False):
+        self.window = window
+        self.adjust = adjust
+        self.alpha = 2.0 / (window + 1)
+        # adjust=True keeps the weighted numerator/denominator pandas uses
+        self._numerator = 0.0
+        self._denominator = 0.0
+        self.value = np.nan
+
+    @classmethod
+    def from_history(cls, data, window=20, adjust=False):
+        """Seed from historical bars using the pandas batch result"""
+        indicator = cls(window, adjust)
+        indicator._seed(_close_series(data))
+        return indicator
+
+    def _seed(self, closes):
+        closes = closes.dropna()
+        if closes.empty:
+            return
+        self.value = float(closes.ewm(span=self.window, adjust=self.adjust).mean().iloc[-1])
+        decay = 1.0 - self.alpha
+        self._denominator = (1.0 - decay ** len(closes)) / self.alpha
+        self._numerator = self.value * self._denominator
+
+    def update(self, close):
+        """Add one bar and return the current EMA (NaN bars leave the state unchanged)"""
+        close = float(close)
+        if math.isnan(close):
+            return self.value
+        if math.isnan(self.value):
+            self.value = close
+            self._numerator = close
+            self._denominator = 1.0
+        elif self.adjust:
+            decay = 1.0 - self.alpha
+            self._numerator = close + decay * self._numerator
+            self._denominator = 1.0 + decay * self._denominator
+            self.value = self._numerator / self._denominator
+        else:
+            self.value = self.alpha * close + (1.0 - self.alpha) * self.value
+        return self.value
+
+    def update_many(self, closes):
+        """Add a batch of bars and return the EMA after each one"""
+        return np.array([self.update(close) for close in closes])
+
+
+class StreamingRSI:
+    def __init__(self, window=14):
+        self.window = window
+        self._gains = _RollingWindow(window)
+        self._losses = _RollingWindow(window)
+        self._previous = None
+        self.value = np.nan
+
+    @classmethod
+    def from_history(cls, data, window=14):
+        """Seed from historical bars; only the last window + 1 closes are needed"""
+        indicator = cls(window)
+        closes = _close_series(data).to_numpy()
+        # The first diff in a pandas series is NaN and counts as a zero gain/loss,
+        # so seeding from the very start of a short history keeps that zero.
+        if len(closes) > window:
+            indicator._previous = float(closes[-window - 1])
+            closes = closes[-window:]
+        indicator.update_many(closes)
+        return indicator
+
+    def update(self, close):
+        """Add one bar and return the current RSI"""
+        close = float(close)
+        delta = np.nan if self._previous is None else close - self._previous
+        self._previous = close
+
+        # Mirrors delta.where(delta > 0, 0): NaN deltas count as no change
+        self._gains.push(delta if delta > 0 else 0.0)
+        self._losses.push(-delta if delta < 0 else 0.0)
+
+        gain = self._gains.mean()
+        loss = self._losses.mean()
+        with np.errstate(divide='ignore', invalid='ignore'):
+            rs = np.float64(gain) / np.float64(loss)
+            self.value = float(100 - (100 / (1 + rs)))
+        return self.value
+
+    def update_many(self, closes):
+        """Add a batch of bars and return the RSI after each one"""
+        return np.array([self.update(close) for close in closes])
+
+
+class StreamingMACD:
+    def __init__(self, fast=12, slow=26, signal=9, adjust=False):
+        self._fast = StreamingEMA(fast, adjust)
+        self._slow = StreamingEMA(slow, adjust)
+        self._signal = StreamingEMA(signal, adjust)
+        self.value = (np.nan, np.nan, np.nan)
+
+    @classmethod
+    def from_history(cls, data, fast=12, slow=26, signal=9, adjust=False):
+        """Seed from historical bars using the pandas batch result"""
+        indicator = cls(fast, slow, signal, adjust)
+        closes = _close_series(data)
+        indicator._fast._seed(closes)
+        indicator._slow._seed(closes)
+        macd = closes.ewm(span=fast, adjust=adjust).mean() - closes.ewm(span=slow, adjust=adjust).mean()
+        indicator._signal._seed(macd)
+        if not math.isnan(indicator._signal.value):
+            macd_value = indicator._fast.value - indicator._slow.value
+            indicator.value = (macd_value, indicator._signal.value, macd_value - indicator._signal.value)
+        return indicator
+
+    def update(self, close):
+        """Add one bar and return (macd, signal, histogram)"""
+        macd = self._fast.update(close) - self._slow.update(close)
+        signal = self._signal.update(macd)
+        self.value = (macd, signal, macd - signal)
+        return self.value
+
+    def update_many(self, closes):
+        """Add a batch of bars and return an (n, 3) array of macd, signal, histogram"""
+        return np.array([self.update(close) for close in closes]).reshape(-1, 3)
+
+
+class StreamingBollingerBands:
+    def __init__(self, window=20, num_std=2):
+        self.window = window
+        self.num_std = num_std
+        self._values = _RollingWindow(window)
+        self.value = (np.nan, np.nan, np.nan)
+
+    @classmethod
+    def from_history(cls, data, window=20, num_std=2):
+        """Seed from historical bars; only the last window closes are needed"""
+        indicator = cls(window, num_std)
+        indicator.update_many(_close_series(data).to_numpy()[-window:])
+        return indicator
+
+    def update(self, close):
+        """Add one bar and return (upper, middle, lower)"""
+        self._values.push(float(close))
+        middle = self._values.mean()
+        std = self._values.std()
+        self.value = (middle + std * self.num_std, middle, middle - std * self.num_std)
+        return self.value
+
+    def update_many(self, closes):
+        """Add a batch of bars and return an (n, 3) array of upper, middle, lower"""
+        return np.array([self.update(close) for close in closes]).reshape(-1, 3)
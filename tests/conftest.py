@@ -0,0 +1,148 @@
+"""
+Shared fixtures: a local HTTP server that answers like the Alpha Vantage API
+"""
+
+import json
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmark import generate_alpha_vantage_series, generate_ohlcv
+from stock_data_fetcher import StockDataFetcher
+from stock_fetcher import StockFetcher
+
+
+class AlphaVantageStub:
+    """
+    Serves "Time Series (Daily)" payloads for every symbol except
+    INVALID ("Error Message") and DAILYCAP (a "per day" quota message).
+    The next `notes` requests get a per-minute "Note" instead of data.
+    """
+
+    def __init__(self, bars=250, delay=0.0):
+        self.bars = bars
+        self.delay = delay
+        self.notes = 0
+        self.requests = []
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), self._handler())
+        self.url = f"http://127.0.0.1:{self._server.server_address[1]}/query"
+
+    def _handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                params = {name: values[0] for name, values in parse_qs(urlparse(self.path).query).items()}
+                body = stub.answer(params)
+                data = json.dumps(body).encode()
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+        return Handler
+
+    def answer(self, params):
+        with self._lock:
+            self.requests.append(params)
+            throttled = self.notes > 0
+            if throttled:
+                self.notes -= 1
+        if self.delay:
+            time.sleep(self.delay)
+
+        symbol = params.get('symbol', '')
+        if throttled:
+            return {"Note": "Thank you for using Alpha Vantage! Our standard API call frequency is 5 calls per minute."}
+        if symbol == 'INVALID':
+            return {"Error Message": "Invalid API call. Please retry or visit the documentation."}
+        if symbol == 'DAILYCAP':
+            return {"Information": "Our standard API rate limit is 25 requests per day."}
+
+        # Newest bar first, like the API; compact output is the latest 100 bars
+        series = generate_alpha_vantage_series(self.bars)
+        if params.get('outputsize') == 'compact':
+            series = dict(list(series.items())[:100])
+        return {"Time Series (Daily)": series}
+
+    def symbols_requested(self):
+        return [params.get('symbol') for params in self.requests]
+
+    def start(self):
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+
+@pytest.fixture
+def alpha_vantage_stub():
+    stub = AlphaVantageStub().start()
+    yield stub
+    stub.stop()
+
+
+@pytest.fixture(autouse=True)
+def stop_tracemalloc():
+    """Profilers start tracemalloc; leaving it on would slow every later test down"""
+    tracing = tracemalloc.is_tracing()
+    yield
+    if not tracing and tracemalloc.is_tracing():
+        tracemalloc.stop()
+
+
+@pytest.fixture
+def make_fetcher(alpha_vantage_stub):
+    """
+    Build StockFetchers pointed at the stub, without the per-minute quota and with a
+    short backoff; extra keyword arguments go to StockFetcher. All are closed afterwards.
+    """
+    fetchers = []
+
+    def make(**options):
+        options = {'base_url': alpha_vantage_stub.url, 'requests_per_minute': None, 'backoff': 0.05, **options}
+        fetchers.append(StockFetcher(**options))
+        return fetchers[-1]
+
+    yield make
+    for fetcher in fetchers:
+        fetcher.close()
+
+
+@pytest.fixture
+def random_walk():
+    return generate_ohlcv(600, seed=7)
+
+
+def pandas_indicators(data):
+    """The indicator columns computed one by one with the plain pandas methods"""
+    fetcher = StockDataFetcher()
+    macd, signal, histogram = fetcher.calculate_macd(data)
+    upper, middle, lower = fetcher.calculate_bollinger_bands(data)
+    return {
+        'SMA_20': fetcher.calculate_sma(data, 20),
+        'SMA_50': fetcher.calculate_sma(data, 50),
+        'EMA_20': fetcher.calculate_ema(data, 20),
+        'RSI': fetcher.calculate_rsi(data),
+        'MACD': macd,
+        'MACD_Signal': signal,
+        'MACD_Histogram': histogram,
+        'BB_Upper': upper,
+        'BB_Middle': middle,
+        'BB_Lower': lower,
+    }
@@ -0,0 +1,82 @@
+import asyncio
+import gzip
+import json
+import threading
+import time
+
+from analytics_server import AnalyticsServer, LRUCache
+
+PATH = '/api/data/AAPL?period=1y&format=records'
+
+
+async def _get(port, path, **headers):
+    """One HTTP/1.1 request; returns (status, headers, body)"""
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    lines = [f"GET {path} HTTP/1.1", "Host: localhost", "Connection: close"]
+    lines += [f"{name.replace('_', '-')}: {value}" for name, value in headers.items()]
+    writer.write(('\r\n'.join(lines) + '\r\n\r\n').encode())
+    response = await reader.read()
+    writer.close()
+    head, body = response.split(b'\r\n\r\n', 1)
+    status_line, *header_lines = head.decode('latin-1').split('\r\n')
+    headers = dict(line.split(': ', 1) for line in header_lines)
+    return int(status_line.split()[1]), headers, body
+
+
+def test_concurrent_requests_share_one_fetch_and_cached_body(random_walk):
+    server = AnalyticsServer(workers=4)
+    fetches = []
+    lock = threading.Lock()
+
+    def fetch_stock_data(symbol, period='1y', interval='1d'):
+        with lock:
+            fetches.append((symbol, period, interval))
+        # Keep the download in flight while the second request arrives
+        time.sleep(0.3)
+        return random_walk
+
+    server.fetcher.fetch_stock_data = fetch_stock_data
+
+    async def scenario():
+        listener = await asyncio.start_server(server.handle, '127.0.0.1', 0)
+        port = listener.sockets[0].getsockname()[1]
+        async with listener:
+            first, second = await asyncio.gather(_get(port, PATH), _get(port, PATH))
+            assert server.stats()['in_flight'] == 0
+            cached = await _get(port, PATH, accept_encoding='gzip')
+            revalidated = await _get(port, PATH, if_none_match=first[1]['ETag'])
+        return first, second, cached, revalidated
+
+    try:
+        first, second, cached, revalidated = asyncio.run(scenario())
+    finally:
+        server.executor.shutdown()
+
+    assert fetches == [('AAPL', '1y', '1d')]
+    assert first[0] == second[0] == 200
+    assert first[2] == second[2] and first[1]['ETag'] == second[1]['ETag']
+    assert len(json.loads(first[2])) == len(random_walk)
+
+    # The last two requests are served from the body cache
+    assert server.bodies.hits == 2
+    assert cached[1]['Content-Encoding'] == 'gzip'
+    assert gzip.decompress(cached[2]) == first[2]
+
+    assert revalidated[0] == 304
+    assert revalidated[1]['ETag'] == first[1]['ETag'] and revalidated[2] == b''
+    assert len(fetches) == 1
+
+
+def test_lru_cache_evicts_least_recently_used_and_expires():
+    cache = LRUCache(max_entries=2, ttl=None)
+    cache.put('a', 1)
+    cache.put('b', 2)
+    assert cache.get('a') == 1
+    cache.put('c', 3)
+    assert cache.get('b') is None
+    assert (cache.get('a'), cache.get('c')) == (1, 3)
+
+    expiring = LRUCache(ttl=0)
+    expiring.put('a', 1)
+    time.sleep(0.01)
+    assert expiring.get('a') is None and not expiring.entries
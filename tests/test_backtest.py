@@ -0,0 +1,54 @@
+import numpy as np
+
+from backtest import run_backtest, threshold_positions
+
+COST = 0.001
+
+
+def _loop_backtest(close, indicator, enter_below=30, exit_above=70, allow_short=True):
+    """Bar-by-bar reference: the position decided on a bar's close is held over the next bar"""
+    position, held_before, equity, peak = 0.0, 0.0, 1.0, 1.0
+    returns, held, trades, drawdown = [], [], 0, 0.0
+    for t in range(len(close)):
+        held_now = position if not np.isnan(close[t]) else 0.0
+        change = close[t] / close[t - 1] - 1 if t and not np.isnan(close[t] + close[t - 1]) else 0.0
+        strategy = held_now * change - COST * abs(held_now - held_before)
+        trades += held_now != held_before and held_now != 0
+        equity *= 1 + strategy
+        peak = max(peak, equity)
+        drawdown = min(drawdown, equity / peak - 1)
+        returns.append(strategy)
+        held.append(held_now)
+        held_before = held_now
+
+        # NaN (indicator warm-up) keeps the current position
+        if indicator[t] < enter_below:
+            position = 1.0
+        elif indicator[t] > exit_above:
+            position = -1.0 if allow_short else 0.0
+    valid = ~np.isnan(close)
+    strategy = np.array(returns)[valid]
+    return {'returns': np.array(returns), 'held': np.array(held), 'total_return': equity - 1,
+            'max_drawdown': drawdown, 'trades': trades, 'exposure': np.abs(held).sum() / valid.sum(),
+            'sharpe': strategy.mean() / strategy.std(ddof=1) * np.sqrt(252)}
+
+
+def test_vectorized_backtest_matches_bar_loop():
+    rng = np.random.default_rng(4)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, (2, 80)), axis=1))
+    indicator = rng.uniform(10, 90, (2, 80))
+    # NaN warm-up on both rows; the second symbol also lists late (NaN closes)
+    indicator[:, :14] = np.nan
+    close[1, :20] = np.nan
+    indicator[1, :20] = np.nan
+    # Long, then flipped short on the last bar; the signal on the last bar itself is never held
+    indicator[:, -3:] = 20, 80, 20
+
+    positions = threshold_positions(indicator, allow_short=True)
+    result = run_backtest(close, positions, COST)
+
+    assert np.all(result['held'][:, -2:] == [1, -1]) and np.all(positions[:, -1] == 1)
+    for row in range(2):
+        expected = _loop_backtest(close[row], indicator[row])
+        for name, values in expected.items():
+            np.testing.assert_allclose(result[name][row], values, rtol=1e-12, atol=1e-15, err_msg=name)
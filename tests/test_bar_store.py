@@ -0,0 +1,19 @@
+import numpy as np
+import pytest
+
+from bar_store import BarStore, records_to_frame
+from benchmark import generate_ohlcv
+from stock_data_fetcher import StockDataFetcher
+
+
+@pytest.mark.parametrize('chunk_bars', [7, 333, 1_000_000])
+def test_chunked_indicators_match_one_pass(tmp_path, chunk_bars):
+    store = BarStore(tmp_path)
+    store.append('AAA', '1m', generate_ohlcv(3000, freq='min'))
+    expected = StockDataFetcher().add_technical_indicators(records_to_frame(store.bars('AAA', '1m')))
+
+    chunks = list(store.iter_indicators('AAA', '1m', chunk_bars=chunk_bars))
+    assert all(np.shares_memory(bars, store.bars('AAA', '1m')) for bars, _ in chunks)
+    for name in chunks[0][1]:
+        values = np.concatenate([indicators[name] for _, indicators in chunks])
+        np.testing.assert_allclose(values, expected[name].to_numpy(), rtol=1e-9, atol=1e-9)
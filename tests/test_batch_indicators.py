@@ -0,0 +1,19 @@
+import pandas as pd
+
+from batch_indicators import BatchIndicatorEngine, stack_closes
+from benchmark import generate_ohlcv
+from conftest import pandas_indicators
+
+
+def test_batch_engine_matches_pandas_indicators(random_walk):
+    # The shorter history leaves a NaN-padded tail in its row of the matrix
+    frames = {'LONG': random_walk, 'SHORT': generate_ohlcv(200, seed=3)}
+    engine = BatchIndicatorEngine(block_size=64)
+    symbols, closes = stack_closes(frames)
+    results = engine.to_frames(frames, engine.add_technical_indicators(closes))
+
+    assert symbols == ['LONG', 'SHORT']
+    for symbol, data in frames.items():
+        for column, expected in pandas_indicators(data).items():
+            pd.testing.assert_series_equal(results[symbol][column], expected, check_names=False,
+                                           rtol=1e-9, atol=1e-9)
@@ -0,0 +1,52 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from correlation import (_gram, align_closes, correlation_matrix, covariance_matrix, returns_matrix,
+                         rolling_correlation, rolling_covariance)
+from benchmark import generate_ohlcv
+
+
+@pytest.fixture
+def returns():
+    """Returns of 12 symbols with late listings and trading gaps on an outer calendar"""
+    frames = {}
+    for seed in range(12):
+        data = generate_ohlcv(300, seed=seed)
+        if seed % 4 == 0:
+            data = data.iloc[40:]
+        if seed % 5 == 0:
+            data = data.drop(data.index[100:115])
+        frames[f'S{seed}'] = data
+    return returns_matrix(align_closes(frames))
+
+
+def test_weighted_symmetric_gram_matches_numpy():
+    rng = np.random.default_rng(0)
+    a = rng.normal(size=(7, 11))
+    weights = np.array([1, 1, 1, 1, -1, -1, -1], dtype=float)
+    out = np.zeros((11, 11))
+    _gram(a, weights=weights, block=4, out=out)
+    np.testing.assert_allclose(out, a.T @ (a * weights[:, None]), atol=1e-12)
+
+
+def test_full_matrices_match_pandas(returns):
+    assert returns.isna().any().any()
+    pd.testing.assert_frame_equal(covariance_matrix(returns, block=5, max_workers=2), returns.cov(), atol=1e-14)
+    pd.testing.assert_frame_equal(correlation_matrix(returns, block=5, max_workers=2), returns.corr(), atol=1e-12)
+
+
+@pytest.mark.parametrize('step,refresh', [(1, None), (3, 7)])
+def test_rolling_matrices_match_pandas(returns, step, refresh):
+    window = 30
+    expected_cov = returns.rolling(window).cov()
+    expected_corr = returns.rolling(window).corr()
+
+    dates = []
+    for date, matrix in rolling_covariance(returns, window, step=step, refresh=refresh, block=5):
+        np.testing.assert_allclose(matrix, expected_cov.loc[date].to_numpy(), atol=1e-14)
+        dates.append(date)
+    for date, matrix in rolling_correlation(returns, window, step=step, refresh=refresh, block=5, max_workers=2):
+        np.testing.assert_allclose(matrix, expected_corr.loc[date].to_numpy(), atol=1e-10)
+    # The window rolls off well past its first fill
+    assert len(dates) == len(returns) // step
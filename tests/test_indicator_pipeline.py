@@ -0,0 +1,14 @@
+import pandas as pd
+
+from conftest import pandas_indicators
+from stock_data_fetcher import StockDataFetcher
+
+
+def test_pipeline_matches_pandas_indicators(random_walk):
+    fetcher = StockDataFetcher()
+    result = fetcher.add_technical_indicators(random_walk)
+
+    for column, expected in pandas_indicators(random_walk).items():
+        pd.testing.assert_series_equal(result[column], expected, check_names=False, rtol=1e-10, atol=1e-10)
+    # SMA 20 and the Bollinger middle band share their rolling sum
+    assert fetcher.pipeline_stats['nodes_reused'] > 0
@@ -0,0 +1,43 @@
+import threading
+
+from instrumentation import Profiler
+
+
+def test_peak_memory_of_a_lone_stage():
+    profiler = Profiler()
+    with profiler.stage('outer'):
+        with profiler.stage('inner'):
+            buffer = bytearray(5_000_000)
+        del buffer
+
+    peaks = {record['stage']: record['peak_memory'] for record in profiler.records}
+    assert peaks['inner'] >= 5_000_000
+    assert peaks['outer'] >= peaks['inner']
+    assert profiler.totals()['inner']['unmeasured'] == 0
+
+
+def test_overlapping_stages_on_other_threads_are_not_measured():
+    profiler = Profiler()
+    inside = threading.Barrier(2)
+
+    def work():
+        with profiler.stage('worker'):
+            inside.wait()
+            bytearray(1_000_000)
+            inside.wait()
+
+    threads = [threading.Thread(target=work) for _ in range(2)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    with profiler.stage('after'):
+        pass
+
+    peaks = [record['peak_memory'] for record in profiler.records if record['stage'] == 'worker']
+    assert peaks == [None, None]
+    totals = profiler.totals()
+    assert totals['worker']['peak_memory'] is None
+    assert totals['worker']['unmeasured'] == 2
+    assert totals['after']['peak_memory'] is not None
+    assert "overlapped" in profiler.summary()
@@ -0,0 +1,73 @@
+import os
+import threading
+
+import pandas as pd
+
+from ohlcv_store import OHLCVStore
+
+
+def test_last_timestamp_keeps_stored_timezone(tmp_path):
+    store = OHLCVStore(tmp_path)
+    naive = pd.DataFrame({'Close': [1.0, 2.0]}, index=pd.date_range('2024-01-01', periods=2))
+    aware = naive.tz_localize('America/New_York')
+    store.write('NAIVE', 'daily', naive)
+    store.write('AWARE', 'daily', aware)
+
+    assert store.last_timestamp('NAIVE', 'daily') == pd.Timestamp('2024-01-02')
+    assert store.last_timestamp('NAIVE', 'daily').tzinfo is None
+    assert store.last_timestamp('AWARE', 'daily') == pd.Timestamp('2024-01-02', tz='America/New_York')
+
+
+def test_offline_serves_stored_bars_without_network(tmp_path, alpha_vantage_stub, make_fetcher):
+    store = OHLCVStore(tmp_path)
+    seeded = make_fetcher(store=store).fetch_stock_data('AAA', output='dataframe')
+    requests_made = len(alpha_vantage_stub.requests)
+
+    offline = make_fetcher(store=store, offline=True)
+    data = offline.fetch_stock_data('AAA', output='dataframe')
+    missing = offline.fetch_stock_data('BBB', output='dataframe')
+
+    assert len(alpha_vantage_stub.requests) == requests_made
+    pd.testing.assert_frame_equal(data, seeded)
+    assert 'error' in missing
+
+
+def test_incremental_refresh_appends_new_bars(tmp_path, alpha_vantage_stub, make_fetcher):
+    store = OHLCVStore(tmp_path)
+    fetcher = make_fetcher(store=store)
+    assert len(fetcher.fetch_stock_data('AAA', output='dataframe')) == 250
+
+    alpha_vantage_stub.bars = 260
+    refreshed = fetcher.fetch_stock_data('AAA', output='dataframe')
+
+    assert len(refreshed) == 260
+    assert len(store.load('AAA', 'daily')) == 260
+    # Only the compact tail is downloaded on a refresh
+    assert alpha_vantage_stub.requests[-1]['outputsize'] == 'compact'
+
+
+def test_concurrent_syncs_of_one_symbol(tmp_path, alpha_vantage_stub, make_fetcher):
+    alpha_vantage_stub.delay = 0.1
+    store = OHLCVStore(tmp_path)
+    periods = ['3month', '1month', '3month', '1month']
+    fetchers = [make_fetcher(store=store) for _ in periods]
+    results = [None] * len(periods)
+    start = threading.Barrier(len(periods))
+
+    def sync(slot):
+        start.wait()
+        results[slot] = fetchers[slot].fetch_stock_data('AAA', period=periods[slot], output='dataframe')
+
+    threads = [threading.Thread(target=sync, args=(slot,)) for slot in range(len(periods))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert all(isinstance(result, pd.DataFrame) for result in results)
+    assert len(store.load('AAA', 'daily')) == alpha_vantage_stub.bars
+    # One full download; the syncs queued behind it only refresh the tail
+    assert [params['outputsize'] for params in alpha_vantage_stub.requests].count('full') == 1
+    # Only the committed generation is left on disk
+    entries = sorted(os.listdir(tmp_path / 'AAA' / 'daily'))
+    assert len(entries) == 2 and entries[1] == 'manifest.json' and entries[0].startswith('gen-')
@@ -0,0 +1,40 @@
+import threading
+
+
+def test_concurrent_identical_requests_share_one_call(alpha_vantage_stub, make_fetcher):
+    alpha_vantage_stub.delay = 0.3
+    fetcher = make_fetcher()
+    results = [None, None]
+    start = threading.Barrier(2)
+
+    def fetch(slot):
+        start.wait()
+        results[slot] = fetcher.fetch_stock_data('AAA', output='dataframe')
+
+    threads = [threading.Thread(target=fetch, args=(slot,)) for slot in range(2)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert alpha_vantage_stub.symbols_requested() == ['AAA']
+    assert fetcher.scheduler.stats['coalesced'] == 1
+    assert all(len(result) == alpha_vantage_stub.bars for result in results)
+
+
+def test_rate_limit_note_is_retried(alpha_vantage_stub, make_fetcher):
+    alpha_vantage_stub.notes = 1
+    fetcher = make_fetcher()
+    data = fetcher.fetch_stock_data('AAA', output='dataframe')
+
+    assert len(data) == alpha_vantage_stub.bars
+    assert alpha_vantage_stub.symbols_requested() == ['AAA', 'AAA']
+    assert fetcher.scheduler.stats['throttled'] == 1
+
+
+def test_daily_limit_is_not_retried(alpha_vantage_stub, make_fetcher):
+    fetcher = make_fetcher()
+    result = fetcher.fetch_stock_data('DAILYCAP')
+
+    assert 'rate limit' in result['error']
+    assert alpha_vantage_stub.symbols_requested() == ['DAILYCAP']
@@ -0,0 +1,19 @@
+import pandas as pd
+
+from resampling import resample_ohlcv
+
+
+def test_weekly_bars_keep_corporate_actions():
+    index = pd.bdate_range('2024-01-01', periods=15)
+    data = pd.DataFrame({'Open': 1.0, 'High': 2.0, 'Low': 0.5, 'Close': 1.5, 'Volume': 10,
+                         'Dividends': 0.0, 'Stock Splits': 0.0, 'SMA_20': 1.0}, index=index)
+    data.loc[index[2], 'Stock Splits'] = 2.0
+    data.loc[index[3], 'Stock Splits'] = 3.0
+    data.loc[index[8], 'Dividends'] = 0.25
+
+    weekly = resample_ohlcv(data, 'weekly')
+
+    assert list(weekly.columns) == ['Open', 'High', 'Low', 'Close', 'Volume', 'Dividends', 'Stock Splits']
+    assert weekly['Stock Splits'].tolist() == [6.0, 0.0, 0.0]
+    assert weekly['Dividends'].tolist() == [0.0, 0.25, 0.0]
+    assert weekly['Volume'].tolist() == [50, 50, 50]
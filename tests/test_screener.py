@@ -0,0 +1,50 @@
+import numpy as np
+import pandas as pd
+
+from benchmark import generate_ohlcv
+from conftest import pandas_indicators
+from screener import Screener
+
+COLUMNS = {'sma_20': 'SMA_20', 'sma_50': 'SMA_50', 'ema_20': 'EMA_20', 'rsi': 'RSI', 'macd': 'MACD',
+           'macd_signal': 'MACD_Signal', 'macd_histogram': 'MACD_Histogram',
+           'bb_upper': 'BB_Upper', 'bb_lower': 'BB_Lower'}
+
+
+def _reference(frames):
+    """The screener table recomputed symbol by symbol from the full histories"""
+    rows = {}
+    for symbol, data in frames.items():
+        indicators = pd.DataFrame(pandas_indicators(data))
+        closes = data['Close']
+        histogram = indicators['MACD_Histogram']
+        row = {column: indicators[name].iloc[-1] for column, name in COLUMNS.items()}
+        row['close'] = closes.iloc[-1]
+        row['change_pct'] = closes.pct_change().iloc[-1] * 100
+        row['macd_cross_up'] = len(data) > 1 and histogram.iloc[-2] <= 0 < histogram.iloc[-1]
+        row['macd_cross_down'] = len(data) > 1 and histogram.iloc[-2] >= 0 > histogram.iloc[-1]
+        row['bars'] = len(data)
+        rows[symbol] = row
+    return pd.DataFrame.from_dict(rows, orient='index')
+
+
+def test_incremental_updates_match_per_symbol_recompute(random_walk):
+    full = {'AAA': random_walk, 'BBB': generate_ohlcv(300, seed=11), 'CCC': generate_ohlcv(40, seed=5)}
+    seeded = {'AAA': 500, 'BBB': 200, 'CCC': 10}
+    frames = {symbol: data.iloc[:seeded[symbol]] for symbol, data in full.items()}
+    screener = Screener.from_frames(frames)
+
+    for step in range(30):
+        # CCC only trades every third bar, so rows advance unevenly
+        symbols = [symbol for symbol in full if symbol != 'CCC' or step % 3 == 0]
+        bars = {}
+        for symbol in symbols:
+            frames[symbol] = full[symbol].iloc[:len(frames[symbol]) + 1]
+            bars[symbol] = frames[symbol]['Close'].iloc[-1]
+        screener.update_bars(bars)
+
+    table = screener.table()
+    expected = _reference(frames)
+    for column in expected.columns:
+        np.testing.assert_allclose(table.loc[expected.index, column].to_numpy(dtype=float),
+                                   expected[column].to_numpy(dtype=float), rtol=1e-9, equal_nan=True,
+                                   err_msg=column)
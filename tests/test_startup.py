@@ -0,0 +1,17 @@
+import statistics
+
+from benchmark import HEAVY_MODULES, STARTUP_BUDGET, heavy_imports, time_command
+
+
+def test_main_help_within_startup_budget():
+    median = statistics.median(time_command(['main.py', '--help'], 3))
+    assert median <= STARTUP_BUDGET, f"main.py --help took {median:.3f}s (budget {STARTUP_BUDGET}s)"
+
+
+def test_library_imports_stay_light():
+    # Runs `import stock_data, stock_data_fetcher, ...` in a fresh interpreter
+    assert heavy_imports() == [], f"Importing the library modules loads one of {HEAVY_MODULES}"
+
+
+def test_main_import_stays_light():
+    assert heavy_imports(['main']) == []
@@ -0,0 +1,13 @@
+def test_fetch_many_against_stub(alpha_vantage_stub, make_fetcher):
+    results = make_fetcher().fetch_many(['AAA', 'BBB', 'AAA', 'INVALID', 'BBB'], period='3month')
+
+    assert list(results) == ['AAA', 'BBB', 'INVALID']
+    for symbol in ('AAA', 'BBB'):
+        records = results[symbol]
+        assert len(records) == alpha_vantage_stub.bars
+        assert all(record['symbol'] == symbol for record in records)
+        assert {'close', 'sma_20', 'rsi'} <= set(records[-1])
+    assert results['INVALID'] == {"error": "Invalid symbol: INVALID"}
+
+    # Duplicates are requested once
+    assert sorted(alpha_vantage_stub.symbols_requested()) == ['AAA', 'BBB', 'INVALID']
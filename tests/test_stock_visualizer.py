@@ -0,0 +1,36 @@
+import matplotlib
+
+matplotlib.use('Agg')
+
+import numpy as np
+import pytest
+from matplotlib import style
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+
+from benchmark import generate_ohlcv
+from stock_data_fetcher import StockDataFetcher
+from stock_visualizer import CHART_STYLE, draw_price_chart, update_price_chart
+
+
+def _draw(data, max_points):
+    fig = Figure(figsize=(15, 12))
+    FigureCanvasAgg(fig)
+    return fig, draw_price_chart(fig, data, 'AAA', max_points)
+
+
+@pytest.mark.parametrize('max_points', [None, 300])
+def test_incremental_update_matches_fresh_render(max_points):
+    data = StockDataFetcher().add_technical_indicators(generate_ohlcv(600))
+    with style.context(CHART_STYLE):
+        fresh_fig, fresh = _draw(data, max_points)
+        updated_fig, updated = _draw(data.iloc[:550], max_points)
+        update_price_chart(updated, data, max_points)
+
+        for fresh_ax, updated_ax in zip(fresh, updated):
+            np.testing.assert_allclose(updated_ax.get_xlim(), fresh_ax.get_xlim(), rtol=1e-9)
+            np.testing.assert_allclose(updated_ax.get_ylim(), fresh_ax.get_ylim(), rtol=1e-9)
+            assert updated_ax.get_position().bounds == pytest.approx(fresh_ax.get_position().bounds)
+            updated_ticks = [label.get_text() for label in updated_ax.get_xticklabels()]
+            fresh_ticks = [label.get_text() for label in fresh_ax.get_xticklabels()]
+            assert updated_ticks == fresh_ticks
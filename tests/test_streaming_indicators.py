@@ -0,0 +1,31 @@
+import numpy as np
+
+from conftest import pandas_indicators
+from streaming_indicators import (StreamingBollingerBands, StreamingEMA, StreamingMACD, StreamingRSI,
+                                  StreamingSMA)
+
+
+def test_streaming_indicators_match_pandas_when_fed_in_chunks(random_walk):
+    seed, rest = random_walk.iloc[:120], random_walk['Close'].to_numpy()[120:]
+    indicators = {
+        'SMA_20': StreamingSMA.from_history(seed, 20),
+        'SMA_50': StreamingSMA.from_history(seed, 50),
+        'EMA_20': StreamingEMA.from_history(seed, 20),
+        'RSI': StreamingRSI.from_history(seed),
+        'MACD': StreamingMACD.from_history(seed),
+        'BB': StreamingBollingerBands.from_history(seed),
+    }
+    outputs = {name: [] for name in indicators}
+    for chunk in np.array_split(rest, [1, 7, 100, 101, 300]):
+        for name, indicator in indicators.items():
+            outputs[name].append(indicator.update_many(chunk))
+
+    streamed = {name: np.concatenate(values) for name, values in outputs.items()}
+    macd, bands = streamed.pop('MACD'), streamed.pop('BB')
+    streamed.update({'MACD': macd[:, 0], 'MACD_Signal': macd[:, 1], 'MACD_Histogram': macd[:, 2],
+                     'BB_Upper': bands[:, 0], 'BB_Middle': bands[:, 1], 'BB_Lower': bands[:, 2]})
+
+    expected = pandas_indicators(random_walk)
+    for column, values in streamed.items():
+        np.testing.assert_allclose(values, expected[column].to_numpy()[120:], rtol=1e-9, atol=1e-9,
+                                   err_msg=column)
@@ -0,0 +1,42 @@
+import pytest
+
+from benchmark import generate_ohlcv
+from instrumentation import Profiler, set_profiler
+from ohlcv_store import OHLCVStore
+from stock_data_fetcher import StockDataFetcher
+from watchlist import WatchlistPipeline
+
+
+@pytest.fixture
+def offline_store(tmp_path):
+    store = OHLCVStore(tmp_path)
+    for seed, symbol in enumerate(['AAA', 'BBB']):
+        # Prices in the thousands, where float32 rounding shows in the 4th decimal
+        data = generate_ohlcv(300, seed=seed)
+        data[['Open', 'High', 'Low', 'Close']] *= 37.3
+        store.write(symbol, '1d', data)
+    return store
+
+
+@pytest.mark.parametrize('cpu_workers', [0, 1])
+def test_summary_rows_match_a_single_symbol_run(offline_store, cpu_workers):
+    pipeline = WatchlistPipeline(period='max', cpu_workers=cpu_workers, store=offline_store, offline=True)
+    rows = pipeline.run(['AAA', 'BBB'])
+
+    for row in rows:
+        expected = StockDataFetcher().add_technical_indicators(offline_store.load(row['symbol'], '1d'))
+        for field, column in [('close', 'Close'), ('rsi', 'RSI'), ('macd', 'MACD'), ('sma_50', 'SMA_50')]:
+            assert row[field] == round(float(expected[column].iloc[-1]), 4)
+
+
+def test_profile_includes_worker_stages(offline_store):
+    profiler = Profiler()
+    previous = set_profiler(profiler)
+    try:
+        WatchlistPipeline(period='max', cpu_workers=1, store=offline_store, offline=True).run(['AAA', 'BBB'])
+    finally:
+        set_profiler(previous)
+
+    stages = [record['stage'] for record in profiler.records]
+    assert stages.count('watchlist.indicators') == 2
+    assert stages.count('fetch_stock_data') == 2
@@ -0,0 +1,205 @@
+"""
+Watchlist - Batch analysis of many symbols in one process
+
+Symbols flow through a bounded pipeline: downloads run on a thread pool
+(network-bound), indicators and optional charts run on a process pool
+(CPU-bound), and summary rows are written as soon as each symbol finishes.
+At most max_pending symbols are in flight at once, so memory stays flat
+however long the watchlist is.
+"""
+
+import csv
+import os
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, wait, FIRST_COMPLETED
+
+from stock_data_fetcher import StockDataFetcher
+from instrumentation import Profiler, get_profiler, set_profiler, stage
+from memory_utils import compact_volume
+
+SUMMARY_FIELDS = ['symbol', 'date', 'close', 'change_pct', 'rsi', 'macd', 'macd_signal',
+                  'macd_histogram', 'sma_20', 'sma_50', 'rows', 'chart', 'error']
+
+# The only columns summarize and the charts read; everything else stays behind in the parent
+JOB_COLUMNS = ['Open', 'High', 'Low', 'Close', 'Volume']
+
+
+def read_watchlist(path):
+    """
+    Read symbols from a file: one or more per line, separated by spaces or commas
+    Text after '#' is ignored; duplicates are dropped keeping the first occurrence
+    """
+    symbols = []
+    seen = set()
+    with open(path) as f:
+        for line in f:
+            line = line.split('#', 1)[0]
+            for symbol in line.replace(',', ' ').split():
+                symbol = symbol.upper()
+                if symbol not in seen:
+                    seen.add(symbol)
+                    symbols.append(symbol)
+    return symbols
+
+
+def _last(data, column):
+    if column not in data.columns:
+        return None
+    value = data[column].iloc[-1]
+    return None if value != value else round(float(value), 4)
+
+
+def summarize(symbol, data, chart_dir=None, max_points=None):
+    """
+    Compute indicators for one symbol and return its summary row
+    With chart_dir, the price chart is rendered there as well
+    Indicators are computed in float64 so the row matches a single-symbol run
+    """
+    fetcher = StockDataFetcher()
+    with stage('watchlist.indicators', symbol=symbol, rows=len(data)):
+        data = fetcher.add_technical_indicators(data)
+
+    close = data['Close']
+    row = {
+        'symbol': symbol,
+        'date': data.index[-1].strftime('%Y-%m-%d'),
+        'close': _last(data, 'Close'),
+        'change_pct': round(float(close.iloc[-1] / close.iloc[-2] - 1) * 100, 2) if len(data) > 1 else None,
+        'rsi': _last(data, 'RSI'),
+        'macd': _last(data, 'MACD'),
+        'macd_signal': _last(data, 'MACD_Signal'),
+        'macd_histogram': _last(data, 'MACD_Histogram'),
+        'sma_20': _last(data, 'SMA_20'),
+        'sma_50': _last(data, 'SMA_50'),
+        'rows': len(data),
+    }
+
+    if chart_dir is not None:
+        # Imported here so summary-only runs never load matplotlib in the workers
+        from stock_visualizer import render_chart_file
+        filename = os.path.join(chart_dir, f"{symbol}_analysis.png")
+        with stage('watchlist.chart', symbol=symbol, rows=len(data)):
+            render_chart_file(symbol, data, filename, max_points=max_points)
+        row['chart'] = filename
+    return row
+
+
+def _job_frame(data):
+    """
+    The part of a downloaded frame a worker needs, made cheaper to pickle
+    Prices stay float64; only volume is narrowed, which is lossless
+    """
+    data = data[[column for column in JOB_COLUMNS if column in data.columns]]
+    if 'Volume' in data.columns:
+        data = data.assign(Volume=compact_volume(data['Volume']))
+    return data
+
+
+def _summarize_job(job, profile=None):
+    """
+    Run summarize, turning errors into error rows. Returns (row, stage records).
+    profile is (track_memory,) to collect the stages into a fresh profiler: worker
+    processes would otherwise report into their own disabled default one.
+    """
+    symbol = job[0]
+    if profile is not None:
+        profiler = Profiler(track_memory=profile[0])
+        previous = set_profiler(profiler)
+    try:
+        row = summarize(*job)
+    except Exception as e:
+        row = {'symbol': symbol, 'error': f"Error analyzing {symbol}: {e}"}
+    finally:
+        if profile is not None:
+            set_profiler(previous)
+    return row, profiler.records if profile is not None else []
+
+
+class WatchlistPipeline:
+    def __init__(self, period='1y', interval='1d', io_workers=16, cpu_workers=None,
+                 max_pending=64, chart_dir=None, max_points=2000, store=None, offline=False):
+        self.period = period
+        self.interval = interval
+        self.io_workers = io_workers
+        # None = one process per core; 0 computes on the calling thread (small lists, debugging)
+        self.cpu_workers = cpu_workers
+        self.max_pending = max(1, max_pending)
+        self.chart_dir = chart_dir
+        self.max_points = max_points
+        self.fetcher = StockDataFetcher(store=store, offline=offline)
+
+    def _fetch(self, symbol):
+        return self.fetcher.fetch_stock_data(symbol, period=self.period, interval=self.interval)
+
+    def run(self, symbols, summary_path=None, progress=None):
+        """
+        Fetch and analyze every symbol; returns summary rows in watchlist order
+        Rows are appended to summary_path (CSV) as each symbol completes.
+        progress, if given, is called as progress(done, total, row).
+        """
+        symbols = list(symbols)
+        if self.chart_dir is not None:
+            os.makedirs(self.chart_dir, exist_ok=True)
+
+        rows = {}
+        summary_file = open(summary_path, 'w', newline='') if summary_path else None
+        writer = csv.DictWriter(summary_file, fieldnames=SUMMARY_FIELDS) if summary_file else None
+        if writer:
+            writer.writeheader()
+
+        def finish(row):
+            rows[row['symbol']] = row
+            if writer:
+                writer.writerow(row)
+            if progress:
+                progress(len(rows), len(symbols), row)
+
+        io_pool = ThreadPoolExecutor(max_workers=self.io_workers)
+        cpu_pool = ProcessPoolExecutor(max_workers=self.cpu_workers) if self.cpu_workers != 0 else None
+        parent_profiler = get_profiler()
+        profile = (parent_profiler.track_memory,) if parent_profiler.enabled else None
+        try:
+            remaining = iter(symbols)
+            fetching = {}
+            computing = {}
+            exhausted = False
+            while True:
+                # Keep the pipeline full without letting downloaded frames pile up
+                while not exhausted and len(fetching) + len(computing) < self.max_pending:
+                    symbol = next(remaining, None)
+                    if symbol is None:
+                        exhausted = True
+                    else:
+                        fetching[io_pool.submit(self._fetch, symbol)] = symbol
+                if not fetching and not computing:
+                    break
+
+                done, _ = wait(list(fetching) + list(computing), return_when=FIRST_COMPLETED)
+                for future in done:
+                    if future in fetching:
+                        symbol = fetching.pop(future)
+                        data = future.result()
+                        if data is None or data.empty:
+                            finish({'symbol': symbol, 'error': f"No data for {symbol}"})
+                            continue
+                        if cpu_pool is None:
+                            # Stages run on this thread and report into the active profiler directly
+                            finish(_summarize_job((symbol, data, self.chart_dir, self.max_points))[0])
+                        else:
+                            job = (symbol, _job_frame(data), self.chart_dir, self.max_points)
+                            computing[cpu_pool.submit(_summarize_job, job, profile)] = symbol
+                    else:
+                        symbol = computing.pop(future)
+                        try:
+                            row, records = future.result()
+                            parent_profiler.add_records(records)
+                            finish(row)
+                        except Exception as e:
+                            finish({'symbol': symbol, 'error': f"Error analyzing {symbol}: {e}"})
+        finally:
+            io_pool.shutdown()
+            if cpu_pool is not None:
+                cpu_pool.shutdown()
+            if summary_file:
+                summary_file.close()
+
+        return [rows[symbol] for symbol in symbols if symbol in rows]